@@ -0,0 +1,11 @@
+import os
+import sys
+
+# `python -m wifi_app`: the headless CLI (see cli.py). The app's modules
+# import each other as top-level packages (core, services, utils), as they
+# do when main.py is run from this directory.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+main()
@@ -0,0 +1,71 @@
+import heapq
+import ipaddress
+import random
+import threading
+import time
+
+# Simulated ARP responder: a transport for core.arp_sweep.ArpSweep that
+# answers from a table of live hosts instead of touching the network.
+
+
+class SimulatedArpTransport:
+    """
+    Replies to requests for addresses in `hosts` (ip -> mac) after a random
+    latency in `latency` seconds. `loss` is the fraction of requests that go
+    unanswered. Every address sent is recorded in `requested`, with its
+    send time in `sent_at`.
+    """
+    def __init__(self, hosts, latency=(0.001, 0.02), loss=0.0, seed=0):
+        self.hosts = dict(hosts)
+        self.latency = latency
+        self.loss = loss
+        self.requested = []
+        self.sent_at = []
+        self._rng = random.Random(seed)
+        self._pending = []
+        self._cond = threading.Condition()
+
+    def send(self, ips):
+        now = time.monotonic()
+        with self._cond:
+            for ip in ips:
+                self.requested.append(ip)
+                self.sent_at.append(now)
+                mac = self.hosts.get(ip)
+                if mac is None or self._rng.random() < self.loss:
+                    continue
+                due = now + self._rng.uniform(*self.latency)
+                heapq.heappush(self._pending, (due, ip, mac))
+            self._cond.notify()
+
+    def recv(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._pending and self._pending[0][0] <= now:
+                    due, ip, mac = heapq.heappop(self._pending)
+                    return ip, mac
+                if now >= deadline:
+                    return None
+                wait = deadline - now
+                if self._pending:
+                    wait = min(wait, self._pending[0][0] - now)
+                self._cond.wait(wait)
+
+    def close(self):
+        pass
+
+
+def make_hosts(network, count, seed=0):
+    """
+    Picks `count` live hosts at random addresses in `network`.
+    """
+    rng = random.Random(seed)
+    network = ipaddress.IPv4Network(network)
+    offsets = rng.sample(range(1, network.num_addresses - 1), count)
+    hosts = {}
+    for offset in offsets:
+        ip = str(network.network_address + offset)
+        hosts[ip] = ":".join(f"{rng.randrange(256):02x}" for _ in range(6))
+    return hosts
@@ -0,0 +1,38 @@
+"""
+ARP sweep of /24, /20 and /16 networks against a simulated responder:
+total sweep time and when the first and last devices were reported,
+compared with the legacy single srp() over a hard-coded /24.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_arp
+"""
+import time
+
+from benchmarks.arp_responder import SimulatedArpTransport, make_hosts
+from core.arp_sweep import ArpSweep
+
+
+def main():
+    print(f"{'network':<16}{'hosts':>7}{'found':>7}{'legacy':>8}"
+          f"{'first s':>9}{'last s':>8}{'total s':>9}")
+    for network, live in (("10.0.0.0/24", 40), ("10.0.0.0/20", 300), ("10.0.0.0/16", 2000)):
+        hosts = make_hosts(network, live)
+
+        # The old scan only ever asked for the /24 around the local address
+        # (here 10.0.0.x), so hosts outside it were never found.
+        legacy = sum(1 for ip in hosts if ip.startswith("10.0.0."))
+
+        transport = SimulatedArpTransport(hosts)
+        sweep = ArpSweep(transport, batch_size=256, rate=20000, linger=0.5)
+        times = []
+        start = time.perf_counter()
+        found = sweep.sweep(network, on_device=lambda d: times.append(time.perf_counter() - start))
+        total = time.perf_counter() - start
+
+        assert {d.ip for d in found} == set(hosts)
+        print(f"{network:<16}{live:>7}{len(found):>7}{legacy:>8}"
+              f"{times[0]:>9.3f}{times[-1]:>8.3f}{total:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
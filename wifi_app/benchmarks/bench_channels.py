@@ -0,0 +1,102 @@
+"""
+Channel analysis on simulated scans of 100, 500 and 2000 APs spread over
+the 2.4, 5 and 6 GHz bands at 20-160 MHz. Reports ChannelAnalyzer.analyze()
+on a new scan (cold) and on the same scan again (cached), against a plain
+Python loop over APs and channels computing the same utilization, and
+checks the two agree.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_channels
+"""
+import random
+import time
+
+import numpy as np
+
+from core.channel_analyzer import (BANDS, ChannelAnalyzer, NOISE_FLOOR_DBM, STRONG_DBM,
+                                   resolve_centers)
+from utils.records import AccessPoint, AccessPointBatch
+
+SIZES = (100, 500, 2000)
+# Share of APs per band and the widths they use
+MIX = [('2.4', 0.5, (20, 20, 20, 40)), ('5', 0.4, (20, 40, 80, 80, 160)), ('6', 0.1, (80, 160))]
+
+
+def simulate(count, seed=0):
+    rng = random.Random(seed)
+    aps = []
+    for i in range(count):
+        band, width_options = rng.choices([(b, w) for b, _, w in MIX],
+                                          weights=[share for _, share, _ in MIX])[0]
+        channels = BANDS[band]['channels']
+        if band == '2.4':
+            channel = rng.choice([1, 6, 11, 1, 6, 11, 3, 9])
+        else:
+            channel = rng.choice(channels)
+        aps.append(AccessPoint(f"net{i % 300}", f"02:00:00:{i >> 16 & 0xff:02x}:"
+                               f"{i >> 8 & 0xff:02x}:{i & 0xff:02x}",
+                               rng.randint(5, 100), channel, "WPA2-Personal", "CCMP",
+                               band=band, width=rng.choice(width_options)))
+    return aps
+
+
+def _frequency(band, channel):
+    if band == '2.4':
+        return 2484 if channel == 14 else 2407 + 5 * channel
+    return (5000 if band == '5' else 5950) + 5 * channel
+
+
+def python_utilization(aps):
+    """
+    {(band, channel): utilization}, one AP and channel at a time.
+    """
+    result = {}
+    for ap in aps:
+        width = max(ap.width, 20)
+        center = int(resolve_centers(np.array([BANDS[ap.band]['code']]), np.array([ap.channel]),
+                                     np.array([width]), np.array([ap.center]))[0])
+        middle = _frequency(ap.band, center)
+        dbm = ap.signal / 2 - 100
+        weight = min(max((dbm - NOISE_FLOOR_DBM) / (STRONG_DBM - NOISE_FLOOR_DBM), 0), 1)
+        for channel in BANDS[ap.band]['channels']:
+            frequency = _frequency(ap.band, channel)
+            covered = min(middle + width / 2, frequency + 10) - max(middle - width / 2, frequency - 10)
+            fraction = min(max(covered / 20, 0), 1)
+            key = (ap.band, channel)
+            result[key] = result.get(key, 0.0) + fraction * weight
+    return result
+
+
+def main():
+    print(f"{'APs':>6}{'cold ms':>10}{'cached ms':>11}{'python loop ms':>16}{'speedup':>9}")
+    for count in SIZES:
+        aps = simulate(count)
+        batch = AccessPointBatch.from_records(aps)
+        analyzer = ChannelAnalyzer()
+        analyzer.analyze(simulate(10, seed=1))
+
+        start = time.perf_counter()
+        report = analyzer.analyze(batch)
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(100):
+            analyzer.analyze(batch)
+        cached_ms = (time.perf_counter() - start) * 10
+
+        start = time.perf_counter()
+        expected = python_utilization(aps)
+        python_ms = (time.perf_counter() - start) * 1000
+
+        for band in BANDS:
+            for channel, utilization in report.utilization(band).items():
+                assert abs(utilization - expected.get((band, channel), 0.0)) < 1e-3, (band, channel)
+        print(f"{count:>6}{cold_ms:>10.2f}{cached_ms:>11.4f}{python_ms:>16.1f}"
+              f"{python_ms / cold_ms:>8.0f}x")
+
+    print("recommended: " + "; ".join(
+        f"{band} GHz " + ", ".join(r.label() for r in report.best(band)) for band in BANDS))
+
+
+if __name__ == "__main__":
+    main()
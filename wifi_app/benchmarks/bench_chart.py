@@ -0,0 +1,84 @@
+"""
+Frame time of the channel overlap chart: the legacy per-network
+plot/fill_between loop vs ChannelChartRenderer, at 50, 200 and 1000 networks.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_chart
+"""
+import random
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+
+from ui.channel_chart import CHANNEL_PLANS, ChannelChartRenderer
+from utils.records import AccessPoint, AccessPointBatch
+
+
+def make_batch(n, plan, seed=0):
+    rng = random.Random(seed)
+    channels = CHANNEL_PLANS[plan]['channels']
+    aps = [AccessPoint(f"Net{i}", "00:11:22:33:44:55", signal=rng.randrange(1, 100),
+                       channel=rng.choice(channels)) for i in range(n)]
+    return AccessPointBatch.from_records(aps)
+
+
+def legacy_frame(axes, batch):
+    """
+    The original WifiTab.update_chart (2.4 GHz only).
+    """
+    axes.clear()
+    axes.set_xlabel('Channel (2.4 GHz)')
+    axes.set_ylabel('Signal Strength')
+    axes.set_ylim(0, 1.1)
+    axes.set_xlim(1, 14)
+    axes.set_xticks(range(1, 15))
+    axes.grid(True, linestyle='--', alpha=0.3)
+    x = np.linspace(1, 14, 500)
+    colors = ['#007acc', '#28a745', '#dc3545', '#ffc107', '#17a2b8', '#e83e8c']
+    for i in range(len(batch)):
+        channel = batch.channel[i]
+        if channel > 14 or channel < 1:
+            continue
+        y = batch.signal[i] / 100.0 * np.exp(-0.5 * ((x - channel) / 1.0)**2)
+        color = colors[i % len(colors)]
+        axes.plot(x, y, color=color, alpha=0.8)
+        axes.fill_between(x, y, alpha=0.2, color=color)
+
+
+def frame_time(update, canvas, batch, frames=10):
+    update(batch)
+    canvas.draw()
+    start = time.perf_counter()
+    for _ in range(frames):
+        update(batch)
+        canvas.draw()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    print(f"{'plan':<6}{'networks':>10}{'legacy ms':>12}{'renderer ms':>14}")
+    for plan in ('2.4', '5'):
+        for n in (50, 200, 1000):
+            batch = make_batch(n, plan)
+
+            fig = Figure(figsize=(5, 4), dpi=100)
+            canvas = FigureCanvasAgg(fig)
+            renderer = ChannelChartRenderer(fig.add_subplot(111), plan=plan)
+            new = frame_time(renderer.update, canvas, batch)
+
+            legacy = float('nan')
+            if plan == '2.4':
+                fig = Figure(figsize=(5, 4), dpi=100)
+                canvas = FigureCanvasAgg(fig)
+                axes = fig.add_subplot(111)
+                legacy = frame_time(lambda b: legacy_frame(axes, b), canvas, batch,
+                                    frames=3 if n > 200 else 10)
+            print(f"{plan:<6}{n:>10}{legacy:>12.1f}{new:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+HistoryStore ingest rate and query latency: 10M Wi-Fi samples (1000 BSSIDs
+x 10000 scans, one scan every 10 s, about 28 hours) through the normal
+record_wifi_scan() path, then "signal of one BSSID over the last 24h",
+"when did MAC Y first appear" and the hourly retention pass.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_history [samples]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from utils.history import HistoryStore
+from utils.records import AccessPoint, Device
+
+
+def timed_ms(func, repeat=20):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    bssids = 1000
+    scans = samples // bssids
+    rng = random.Random(0)
+    aps = [AccessPoint(f"Net{i}", f"02:00:00:00:{i // 256:02x}:{i % 256:02x}",
+                       signal=rng.randrange(1, 100), channel=rng.choice((1, 6, 11)))
+           for i in range(bssids)]
+    devices = [Device(f"10.0.0.{i + 1}", f"04:00:00:00:00:{i:02x}") for i in range(50)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.sqlite3")
+        store = HistoryStore(path, raw_days=1, maintenance_interval=10 ** 9)
+        now = int(time.time())
+        first = now - scans * 10
+
+        start = time.perf_counter()
+        for scan in range(scans):
+            ts = first + scan * 10
+            for ap in aps[scan % 7::97]:
+                ap.signal = rng.randrange(1, 100)
+            store.record_wifi_scan(aps, ts=ts)
+            if scan % 30 == 0:
+                store.record_devices(devices[:10 + scan % 40], ts=ts)
+            if scan % 100 == 99:
+                # Stay within the store's pending-queue bound
+                store.flush()
+        store.flush()
+        total = time.perf_counter() - start
+        assert store.dropped == 0
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+
+        print(f"ingest: {samples:,} samples, {samples / total:,.0f} samples/s written, "
+              f"{size / samples:.1f} bytes/sample on disk")
+
+        bssid = aps[123].bssid
+        ms, rows = timed_ms(lambda: store.signal_history(bssid, since=now - 86400))
+        print(f"signal of one BSSID, last 24h: {ms:.2f} ms ({len(rows)} rows)")
+        ms, seen = timed_ms(lambda: store.device_first_seen(devices[45].mac), repeat=1000)
+        print(f"first appearance of one MAC:  {ms * 1000:.0f} us")
+
+        start = time.perf_counter()
+        store.apply_retention(now=now)
+        print(f"retention pass (roll up >1 day old): {time.perf_counter() - start:.2f} s")
+        ms, rows = timed_ms(lambda: store.signal_hourly(bssid))
+        print(f"hourly history of one BSSID: {ms:.2f} ms ({len(rows)} hours)")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Repeat network scans with the device inventory: a full ARP sweep, then
+delta scans that read a (simulated) neighbor table and probe only stale
+devices. Reports time per scan, ARP requests sent and the joined / moved /
+left events, for /24 and /20 networks against a simulated responder at the
+default 1000 requests/s (a /16 full sweep takes over a minute that way).
+
+  full       first scan of the subnet
+  delta      right after: nothing stale, neighbor table only
+  stale      every device due for a probe (stale_after elapsed)
+  churn      stale again, with 3 devices gone, 2 new and 1 moved to another IP
+  resweep    full sweep after the churn
+
+Delta scans only find new devices that show up in the neighbor table; the
+others wait for the next full sweep (every full_interval, 10 minutes).
+
+Hostname lookups are left out; they are cached by the resolver either way.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_inventory
+"""
+import ipaddress
+import time
+from collections import Counter
+
+import core.network_scanner as network_scanner
+from benchmarks.arp_responder import SimulatedArpTransport, make_hosts
+from core.device_inventory import DeviceInventory
+from core.network_scanner import NetworkScanner
+from utils.records import Device
+
+
+class _NoResolver:
+    def resolve(self, ip):
+        pass
+
+
+class SimulatedScanner(NetworkScanner):
+    """
+    NetworkScanner over SimulatedArpTransport, with a neighbor table holding
+    every fourth live host, as if only those had talked to us lately.
+    """
+    def __init__(self, hosts, inventory):
+        super().__init__(transport=self._transport, inventory=inventory)
+        self.hosts = hosts
+        self.requested = 0
+
+    def _transport(self, iface=None):
+        transport = SimulatedArpTransport(self.hosts)
+        # Counts the requests as they go out
+        send = transport.send
+
+        def counted(ips):
+            ips = list(ips)
+            self.requested += len(ips)
+            send(ips)
+        transport.send = counted
+        return transport
+
+    def read_neighbor_table(self):
+        return [Device(ip, mac) for ip, mac in list(self.hosts.items())[::4]]
+
+    def resolve_hostnames(self, devices, on_resolved=None):
+        pass
+
+
+def main():
+    network_scanner.get_resolver = _NoResolver
+    print(f"{'network':<16}{'scan':<8}{'present':>8}{'requests':>10}{'time s':>8}  events")
+    for network, live in (("10.0.0.0/24", 40), ("10.0.0.0/20", 300)):
+        subnet = ipaddress.IPv4Network(network)
+        hosts = make_hosts(network, live)
+        inventory = DeviceInventory(stale_after=120)
+        scanner = SimulatedScanner(hosts, inventory)
+
+        for scan in ('full', 'delta', 'stale', 'churn', 'resweep'):
+            if scan in ('stale', 'churn'):
+                inventory.stale_after = 0
+            if scan == 'churn':
+                ips = list(hosts)
+                for ip in ips[1:4]:
+                    del hosts[ip]
+                spare = [str(ip) for ip in subnet.hosts() if str(ip) not in hosts]
+                hosts[spare[0]] = "02:00:00:00:00:01"
+                hosts[spare[1]] = "02:00:00:00:00:02"
+                # Same MAC, new address
+                hosts[spare[2]] = hosts.pop(ips[4])
+
+            events = Counter()
+            scanner.requested = 0
+            start = time.perf_counter()
+            present = scanner.scan_subnet(subnet, on_event=lambda kind, d: events.update([kind]),
+                                          full=scan in ('full', 'resweep'))
+            elapsed = time.perf_counter() - start
+            summary = ", ".join(f"{count} {kind}" for kind, count in sorted(events.items()))
+            print(f"{network:<16}{scan:<8}{len(present):>8}{scanner.requested:>10}"
+                  f"{elapsed:>8.3f}  {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Sustained probe rate of LatencyEngine on loopback (127.0.0.0/8), for a
+growing number of targets at 50 Hz each, with the CPU share it took. The
+legacy PingWorker ran one `ping` process per probe; its per-probe cost is
+shown for comparison.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_latency [icmp|tcp|udp]
+"""
+import platform
+import subprocess
+import sys
+import time
+
+from core.latency_engine import LatencyEngine
+
+
+def legacy_probe_ms(count=5):
+    param = '-n' if platform.system().lower() == 'windows' else '-c'
+    start = time.perf_counter()
+    try:
+        for _ in range(count):
+            subprocess.run(['ping', param, '1', '127.0.0.1'], capture_output=True)
+    except OSError:
+        return float('nan')
+    return (time.perf_counter() - start) / count * 1000
+
+
+def main():
+    method = sys.argv[1] if len(sys.argv) > 1 else 'auto'
+    hz = 50
+    duration = 3.0
+    print(f"legacy subprocess ping: {legacy_probe_ms():.1f} ms per probe (1 target, 1 Hz max)")
+    print(f"{'method':<8}{'targets':>8}{'target/s':>10}{'achieved/s':>12}{'lost':>7}{'cpu %':>8}")
+    for n in (10, 100, 500, 1000):
+        targets = [f"127.0.{i // 250}.{i % 250 + 1}" for i in range(n)]
+        samples = [0]
+
+        def on_sample(target, seq, rtt, stats):
+            samples[0] += 1
+
+        engine = LatencyEngine(targets, interval=1.0 / hz, timeout=0.5, method=method,
+                               port=9, on_sample=on_sample)
+        cpu = time.process_time()
+        engine.run(duration=duration)
+        cpu = time.process_time() - cpu
+        lost = sum(s.lost for s in engine.stats.values())
+        print(f"{engine.prober.name:<8}{n:>8}{n * hz:>10}{samples[0] / duration:>12.0f}"
+              f"{lost:>7}{cpu / duration * 100:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
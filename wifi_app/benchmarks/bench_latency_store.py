@@ -0,0 +1,52 @@
+"""
+Per-sample cost of keeping a rolling latency window: the legacy paired
+lists trimmed with pop(0) (plus np.percentile for p50/p95/p99) vs
+LatencySeries, for windows of 60 samples up to four hours at 1 Hz.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_latency_store
+"""
+import random
+import time
+
+import numpy as np
+
+from utils.latency_store import LatencySeries
+
+
+def legacy(samples, window):
+    xs, ys = [], []
+    for i, rtt in enumerate(samples):
+        ys.append(rtt)
+        xs.append(i)
+        if len(ys) > window:
+            ys.pop(0)
+            xs.pop(0)
+        np.percentile(ys, [50, 95, 99])
+
+
+def ring(samples, window):
+    series = LatencySeries(window)
+    for i, rtt in enumerate(samples):
+        series.append(float(i), rtt)
+        series.percentiles
+
+
+def per_sample_us(func, samples, window):
+    start = time.perf_counter()
+    func(samples, window)
+    return (time.perf_counter() - start) / len(samples) * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    samples = [rng.lognormvariate(3, 0.5) for _ in range(30000)]
+    print(f"{'window':>8}{'legacy us':>11}{'ring us':>9}{'ring bytes':>12}")
+    for window in (60, 3600, 4 * 3600):
+        old = per_sample_us(legacy, samples, window)
+        new = per_sample_us(ring, samples, window)
+        print(f"{window:>8}{old:>11.1f}{new:>9.1f}{LatencySeries(window).nbytes:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Full sweeps of several interfaces against simulated ARP responders: a
+/24 office LAN, a second adapter on the same LAN (swept once), a /22 lab
+network and a slow /20 VLAN whose hosts answer after 0.2-0.8 s. Reports
+the total time of scanning the interfaces one after another and of
+NetworkScanner.scan(), which sweeps them in parallel, with each
+interface's own time and the merged device count.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_multi_subnet
+"""
+import ipaddress
+import time
+
+import core.network_scanner as network_scanner
+from benchmarks.arp_responder import SimulatedArpTransport, make_hosts
+from core.device_inventory import DeviceInventory
+from core.interfaces import Interface
+from core.network_scanner import NetworkScanner
+
+# name, network, live hosts, reply latency
+NETWORKS = [
+    ("eth0", "10.0.0.0/24", 40, (0.001, 0.02)),
+    ("wlan0", "10.0.0.0/24", 40, (0.001, 0.02)),
+    ("lab1", "10.1.0.0/22", 100, (0.001, 0.02)),
+    ("vlan20", "10.2.0.0/20", 300, (0.2, 0.8)),
+]
+
+
+class _NoResolver:
+    def resolve(self, ip):
+        pass
+
+
+class SimulatedScanner(NetworkScanner):
+    """
+    NetworkScanner over one SimulatedArpTransport per interface, with an
+    empty neighbor table.
+    """
+    def __init__(self):
+        super().__init__(transport=self._transport, inventory=DeviceInventory())
+        self.hosts = {}
+        self.latency = {}
+        self.interfaces_up = []
+        for name, network, live, latency in NETWORKS:
+            ip = str(next(ipaddress.IPv4Network(network).hosts()))
+            self.interfaces_up.append(Interface(name, ip, ipaddress.IPv4Network(network)))
+            self.hosts[name] = make_hosts(network, live)
+            self.latency[name] = latency
+
+    def _transport(self, iface=None):
+        return SimulatedArpTransport(self.hosts[iface], latency=self.latency[iface])
+
+    def list_interfaces(self):
+        return self.interfaces_up
+
+    def read_neighbor_table(self):
+        return []
+
+    def resolve_hostnames(self, devices, on_resolved=None):
+        pass
+
+
+def main():
+    network_scanner.get_resolver = _NoResolver
+
+    scanner = SimulatedScanner()
+    start = time.perf_counter()
+    sequential = {}
+    for interface in scanner.interfaces_up[:1] + scanner.interfaces_up[2:]:
+        began = time.perf_counter()
+        found = scanner.scan_subnet(interface.network, full=True, iface=interface.name)
+        sequential[interface.name] = (time.perf_counter() - began, len(found))
+    sequential_s = time.perf_counter() - start
+
+    scanner = SimulatedScanner()
+    start = time.perf_counter()
+    devices = scanner.scan(full=True)
+    parallel_s = time.perf_counter() - start
+    timings = {t['interface']: t for t in scanner.timings}
+
+    print(f"{'interface':<10}{'network':<14}{'devices':>8}{'sequential s':>14}{'parallel s':>12}")
+    for name, network, _, _ in NETWORKS:
+        if name not in timings:
+            print(f"{name:<10}{network:<14}{'(same network as eth0, not swept)':>34}")
+            continue
+        print(f"{name:<10}{network:<14}{timings[name]['devices']:>8}{sequential[name][0]:>14.2f}"
+              f"{timings[name]['elapsed_s']:>12.2f}")
+    print(f"{'total':<24}{len(devices):>8}{sequential_s:>14.2f}{parallel_s:>12.2f}")
+    print("completion order: " + ", ".join(t['interface'] for t in scanner.timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+OUI vendor lookup: the mmap'd prefix index against parsing the registry
+into a dict at startup (what scapy's load_manuf does). Reports load time,
+lookups per second for distinct MACs and for a scan's worth of repeated
+ones, and memory: the index's resident pages after the repeated lookups
+and after the distinct ones, against the heap held by the dict.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_oui
+"""
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from utils import oui
+
+
+def resident_kb(path):
+    """
+    Resident size of the mapping of `path`, from /proc/self/smaps (Linux).
+    """
+    try:
+        with open('/proc/self/smaps') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    total = 0
+    inside = False
+    for line in lines:
+        fields = line.split()
+        if '-' in fields[0] and len(fields) >= 5:
+            inside = fields[-1] == path
+        elif inside and fields[0] == 'Rss:':
+            total += int(fields[1])
+    return total
+
+
+def parse_to_dict():
+    table = {}
+    for bits, prefix, name in oui.scapy_manuf():
+        table[(bits, prefix)] = name
+    return table
+
+
+def dict_lookup(table, mac):
+    value = int(mac.replace(':', ''), 16)
+    if value & oui._LOCAL_BIT:
+        return None
+    for bits in (36, 28, 24):
+        name = table.get((bits, value >> (48 - bits)))
+        if name is not None:
+            return name
+    return None
+
+
+def rate(lookup, macs):
+    start = time.perf_counter()
+    for mac in macs:
+        lookup(mac)
+    return len(macs) / (time.perf_counter() - start)
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), 'oui.idx')
+    start = time.perf_counter()
+    counts = oui.compile_index(oui.scapy_manuf(), path)
+    compile_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = oui.OuiIndex(path)
+    open_ms = (time.perf_counter() - start) * 1000
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    table = parse_to_dict()
+    parse_ms = (time.perf_counter() - start) * 1000
+    dict_kb = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+
+    # Distinct MACs under registered OUIs, plus some unknown and randomised
+    rng = random.Random(0)
+    ouis = list(index._keys24)
+    values = [(rng.choice(ouis) << 24) | rng.getrandbits(24) for _ in range(200000)]
+    values += [rng.getrandbits(48) for _ in range(50000)]
+    macs = [':'.join(f"{value:012x}"[i:i + 2] for i in range(0, 12, 2)) for value in values]
+    # A scan's worth of addresses, looked up again on every scan
+    scan = macs[:300] * 500
+
+    matches = sum(index.lookup(mac) == dict_lookup(table, mac) for mac in macs[:20000])
+    assert matches == 20000, matches
+
+    # Fresh mapping, so residency reflects only the lookups below
+    index.close()
+    index = oui.OuiIndex(path)
+    repeated = rate(index.lookup, scan)
+    scan_kb = resident_kb(path) or 0
+    distinct = rate(index.lookup, macs)
+    distinct_kb = resident_kb(path) or 0
+    dict_distinct = rate(lambda mac: dict_lookup(table, mac), macs)
+
+    print(f"registry: {counts[24]} /24, {counts[28]} /28, {counts[36]} /36 "
+          f"(compiled once in {compile_s:.2f} s, {index.size / 1024:.0f} KB file)")
+    print(f"{'':<12}{'load ms':>9}{'distinct/s':>12}{'ns each':>9}{'repeated/s':>12}{'ns each':>9}")
+    print(f"{'mmap index':<12}{open_ms:>9.2f}{distinct:>12,.0f}{1e9 / distinct:>9.0f}"
+          f"{repeated:>12,.0f}{1e9 / repeated:>9.0f}")
+    print(f"{'dict':<12}{parse_ms:>9.1f}{dict_distinct:>12,.0f}{1e9 / dict_distinct:>9.0f}")
+    print(f"memory: index {scan_kb} KB resident after the repeated lookups, {distinct_kb} KB "
+          f"after the distinct ones (clean file pages, shared and reclaimable); "
+          f"dict {dict_kb:.0f} KB of heap")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
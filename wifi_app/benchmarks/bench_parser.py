@@ -0,0 +1,144 @@
+"""
+Compares the legacy per-line regex parser with utils.netsh_parser.
+
+First checks utils.netsh_parser against fixture captures of every Windows
+version and display language in benchmarks.netsh_captures, as decoded
+correctly and as garbled by the wrong code page (UTF-8 bytes read as
+cp850, cp850 bytes read as cp1252): every field of every BSSID must come
+out as the fixture says.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_parser
+"""
+import re
+import time
+
+from benchmarks.netsh_captures import _KEYS, VERSIONS, make_netsh_capture, make_netsh_fixture
+from utils.netsh_parser import parse_netsh_output
+
+
+def legacy_parse_netsh_output(output):
+    """
+    The original WifiScannerWorker.parse_netsh_output, minus the file write.
+    """
+    networks = []
+    lines = output.splitlines()
+    current_ssid = None
+    current_network_base = {}
+    debug_log = []
+    debug_log.append(f"Parsing {len(lines)} lines.")
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        ssid_match = re.search(r'^SSID\s+\d+.*:\s*(.*)$', line, re.IGNORECASE)
+        if ssid_match:
+            ssid_name = ssid_match.group(1).strip()
+            if not ssid_name:
+                ssid_name = "<Hidden>"
+            current_ssid = ssid_name
+            current_network_base = {
+                'SSID': ssid_name,
+                'Authentication': 'Unknown',
+                'Encryption': 'Unknown'
+            }
+            debug_log.append(f"MATCH SSID: {ssid_name}")
+            continue
+
+        if current_ssid:
+            if re.search(r'Auth', line, re.IGNORECASE):
+                parts = line.split(":", 1)
+                if len(parts) > 1:
+                    current_network_base['Authentication'] = parts[1].strip()
+            elif re.search(r'(Cryp|Enc|Chif)', line, re.IGNORECASE):
+                parts = line.split(":", 1)
+                if len(parts) > 1:
+                    current_network_base['Encryption'] = parts[1].strip()
+
+            bssid_match = re.search(r'BSSID.*:\s*([a-fA-F0-9:-]{17})', line, re.IGNORECASE)
+            if bssid_match:
+                bssid = bssid_match.group(1).strip().replace('-', ':')
+                ap_data = current_network_base.copy()
+                ap_data['BSSID'] = bssid
+                ap_data['Signal'] = 0
+                ap_data['Channel'] = 0
+                networks.append(ap_data)
+                debug_log.append(f"  MATCH BSSID: {bssid}")
+                continue
+            elif "BSSID" in line.upper():
+                debug_log.append(f"  FAILED BSSID MATCH: '{line}'")
+
+            if networks and networks[-1]['SSID'] == current_ssid:
+                last_net = networks[-1]
+                if re.search(r'Si(gnal|gnaux)', line, re.IGNORECASE):
+                    parts = line.split(":", 1)
+                    if len(parts) > 1:
+                        try:
+                            last_net['Signal'] = int(re.sub(r'[^0-9]', '', parts[1]))
+                        except:
+                            last_net['Signal'] = 0
+                elif re.search(r'C(hannel|anal)', line, re.IGNORECASE):
+                    parts = line.split(":", 1)
+                    if len(parts) > 1:
+                        try:
+                            last_net['Channel'] = int(re.sub(r'[^0-9]', '', parts[1]))
+                        except:
+                            last_net['Channel'] = 0
+    return networks
+
+
+def lines_per_second(parse, capture, min_time=1.0):
+    n_lines = capture.count("\n") + 1
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        parse(capture)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return n_lines * runs / elapsed
+
+
+# How a capture can reach the parser
+ENCODINGS = {
+    'unicode': lambda text: text,
+    'utf-8 as cp850': lambda text: text.encode('utf-8').decode('cp850'),
+    'cp850 as cp1252': lambda text: text.encode('cp850').decode('cp1252', errors='replace'),
+}
+
+
+def check_fixtures():
+    print(f"{'fixture':<16}" + "".join(f"{name:>18}" for name in ENCODINGS))
+    for version in VERSIONS:
+        for locale in _KEYS:
+            capture, expected = make_netsh_fixture(locale=locale, version=version)
+            results = []
+            for encode in ENCODINGS.values():
+                parsed = parse_netsh_output(encode(capture))
+                assert len(parsed) == len(expected), (version, locale)
+                for ap, fields in zip(parsed, expected):
+                    for field, value in fields.items():
+                        assert getattr(ap, field) == value, (version, locale, field,
+                                                             getattr(ap, field), value)
+                results.append(f"{len(parsed)} APs ok")
+            print(f"{version + ' ' + locale:<16}" + "".join(f"{r:>18}" for r in results))
+    print()
+
+
+def main():
+    check_fixtures()
+    print(f"{'capture':<22}{'legacy lines/s':>16}{'new lines/s':>16}{'speedup':>10}")
+    for locale in ('en', 'fr'):
+        for n_ssids, per_ssid in ((100, 3), (300, 4), (1000, 5)):
+            capture = make_netsh_capture(n_ssids, per_ssid, locale=locale)
+            # Both parsers must agree before timing them
+            assert legacy_parse_netsh_output(capture) == [ap.as_dict() for ap in parse_netsh_output(capture)]
+            legacy = lines_per_second(legacy_parse_netsh_output, capture)
+            new = lines_per_second(parse_netsh_output, capture)
+            label = f"{locale} {n_ssids}x{per_ssid} BSSIDs"
+            print(f"{label:<22}{legacy:>16,.0f}{new:>16,.0f}{new / legacy:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Passive discovery: replays a synthetic 10-minute capture of 200 devices
+(ARP, mDNS, SSDP, NetBIOS; see discovery_captures) through the listener
+with batched parsing and with a flush per packet, reporting packets per
+second, CPU per packet, inventory updates and how many devices came out
+with a hostname, model or services. Then runs the live listener: CPU
+over a few idle seconds, and under a burst of mDNS/SSDP/NetBIOS
+datagrams sent to it over loopback from a child process.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_passive
+"""
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+from benchmarks import discovery_captures
+from core.device_inventory import DeviceInventory
+from core.passive_discovery import PassiveListener, decode_frame
+from utils.pcap import read_pcap
+
+IDLE_S = 3
+BURST = 20000
+
+
+def replay(path, batch_interval):
+    listener = PassiveListener(DeviceInventory(), batch_interval=batch_interval)
+    cpu = time.process_time()
+    start = time.perf_counter()
+    if batch_interval:
+        listener.replay(path)
+    else:
+        for _, linktype, frame in read_pcap(path):
+            packet = decode_frame(frame, linktype)
+            if packet is not None:
+                listener.feed(*packet)
+                listener.flush()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    devices = listener.inventory.present()
+    enriched = sum(1 for d in devices if d.hostname not in ('', "Unknown") or d.model or d.services)
+    return listener.stats, elapsed, cpu, enriched
+
+
+def send_burst(payloads, count, ready):
+    ready.wait()
+    senders = {port: socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for port in payloads}
+    ports = list(payloads)
+    for i in range(count):
+        port = ports[i % len(ports)]
+        senders[port].sendto(payloads[port][i % len(payloads[port])], ('127.0.0.1', port))
+        if i % 200 == 199:
+            # Stay under the socket buffers
+            time.sleep(0.002)
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), 'lan.pcap')
+    frames, announcing = discovery_captures.build(200, 10)
+    discovery_captures.write_pcap(path, frames)
+    print(f"capture: {len(frames)} frames over 10 minutes, 200 devices, {announcing} announcing")
+
+    print(f"{'':<22}{'packets/s':>11}{'CPU us/pkt':>12}{'parsed':>8}{'batches':>9}{'updates':>9}"
+          f"{'enriched':>10}")
+    for name, interval in (("batched (0.5 s)", 0.5), ("flush per packet", 0)):
+        stats, elapsed, cpu, enriched = replay(path, interval)
+        print(f"{name:<22}{stats['packets'] / elapsed:>11,.0f}{cpu / stats['packets'] * 1e6:>12.1f}"
+              f"{stats['parsed']:>8}{stats['batches']:>9}{stats['updates']:>9}{enriched:>10}")
+
+    # Live: the listener's own sockets, idle and then under load
+    listener = PassiveListener(DeviceInventory(), arp=False)
+    thread = listener.start()
+    time.sleep(0.5)
+    print(f"live sources: {', '.join(listener.listening) or 'none (ports unavailable)'}")
+    cpu = time.process_time()
+    time.sleep(IDLE_S)
+    idle = time.process_time() - cpu
+    print(f"idle: {idle * 1000:.1f} ms CPU over {IDLE_S} s ({idle / IDLE_S * 100:.2f}% of a core)")
+
+    payloads = {}
+    for _, frame in frames:
+        kind, data, _ = decode_frame(frame) or ('arp', None, None)
+        port = {'mdns': 5353, 'ssdp': 1900, 'netbios-ns': 137, 'netbios-dgm': 138}.get(kind)
+        if port is not None and len(payloads.setdefault(port, [])) < 500:
+            payloads[port].append(data)
+    ready = multiprocessing.Event()
+    sender = multiprocessing.Process(target=send_burst, args=(payloads, BURST, ready))
+    sender.start()
+    cpu = time.process_time()
+    start = time.perf_counter()
+    ready.set()
+    sender.join()
+    time.sleep(listener.batch_interval + 0.2)
+    elapsed = time.perf_counter() - start
+    busy = time.process_time() - cpu
+    received = listener.stats['packets']
+    print(f"burst: {received}/{BURST} datagrams received in {elapsed:.2f} s, "
+          f"{busy * 1000:.0f} ms CPU ({busy / max(received, 1) * 1e6:.1f} us/datagram), "
+          f"{listener.stats['batches']} batches")
+    listener.stop()
+    thread.join(timeout=2)
+
+
+if __name__ == "__main__":
+    main()
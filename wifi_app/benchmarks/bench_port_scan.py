@@ -0,0 +1,121 @@
+"""
+Port scan of 200 hosts x the 28 'common' ports against local listener
+stubs on 127.0.1.0/24, served from a child process: SSH, FTP and HTTP
+servers that answer the banner grab, a silent raw service, and three
+"filtered" ports per host (a full accept queue, so SYNs are dropped).
+Everything else is closed. Reports
+probes per second and CPU per probe for the scanner with adaptive
+timeouts, with a fixed 1 s timeout, without banner grabs, and for a
+64-thread pool of blocking connects (no banners) as the baseline.
+
+Linux only (binds many 127.0.1.x addresses).
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_port_scan
+"""
+import asyncio
+import multiprocessing
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.port_scanner import PORT_SETS, PortScanner
+
+HOSTS = [f"127.0.1.{i}" for i in range(1, 201)]
+PORTS = PORT_SETS['common']
+BANNERS = {22: b"SSH-2.0-OpenSSH_9.6\r\n", 21: b"220 (vsFTPd 3.0.5) FTP server ready\r\n"}
+HTTP = 80
+SILENT = 9100
+FILTERED = (445, 3389, 8443)
+
+
+def serve_stubs(hosts, ready, done):
+    """
+    Runs the stub services until `done` is set; meant for a child process,
+    so their CPU time stays out of the measurements.
+    """
+    loop = asyncio.new_event_loop()
+
+    async def serve(port, reader, writer):
+        try:
+            if port in BANNERS:
+                writer.write(BANNERS[port])
+            elif port == HTTP:
+                await reader.readuntil(b"\r\n\r\n")
+                writer.write(b"HTTP/1.1 200 OK\r\nServer: stub-httpd/1.0\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            await reader.read(1024)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    for host in hosts:
+        for port in (*BANNERS, HTTP, SILENT):
+            loop.run_until_complete(
+                asyncio.start_server(lambda r, w, port=port: serve(port, r, w), host, port))
+    # Filtered ports: listen(0) with its one queue slot taken
+    blackholes = []
+    for host in hosts:
+        for port in FILTERED:
+            server = socket.socket()
+            server.bind((host, port))
+            server.listen(0)
+            blackholes += [server, socket.create_connection((host, port))]
+    ready.set()
+    loop.run_until_complete(loop.run_in_executor(None, done.wait))
+
+
+def thread_pool(hosts, ports, workers=64, timeout=1.0):
+    def probe(job):
+        sock = socket.socket()
+        sock.settimeout(timeout)
+        try:
+            return sock.connect_ex(job) == 0
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
+    jobs = [(ip, port) for port in ports for ip in hosts]
+    cpu = time.process_time()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        found = sum(pool.map(probe, jobs))
+    elapsed = time.perf_counter() - start
+    return {'probes': len(jobs), 'open': found, 'elapsed_s': elapsed,
+            'probes_per_s': len(jobs) / elapsed,
+            'cpu_us_per_probe': (time.process_time() - cpu) / len(jobs) * 1e6}
+
+
+def main():
+    ready, done = multiprocessing.Event(), multiprocessing.Event()
+    stubs = multiprocessing.Process(target=serve_stubs, args=(HOSTS, ready, done), daemon=True)
+    stubs.start()
+    ready.wait()
+    try:
+        print(f"{'':<26}{'probes':>8}{'open':>6}{'time s':>8}{'probes/s':>10}{'CPU us/probe':>14}"
+              f"  identified")
+        runs = [
+            ("adaptive timeouts", dict()),
+            ("fixed 1 s timeout", dict(min_timeout=1.0)),
+            ("no banners", dict(banners=False)),
+        ]
+        for name, options in runs:
+            scanner = PortScanner(PORTS, **options)
+            found = scanner.scan(HOSTS)
+            m = scanner.metrics()
+            services = sorted({f"{r.service}:{r.product}" for results in found.values()
+                               for r in results if r.product})
+            print(f"{name:<26}{m['probes']:>8}{m['open']:>6}{m['elapsed_s']:>8.2f}"
+                  f"{m['probes_per_s']:>10,.0f}{m['cpu_us_per_probe']:>14.0f}  {', '.join(services)}")
+        m = thread_pool(HOSTS, PORTS)
+        print(f"{'thread pool (64)':<26}{m['probes']:>8}{m['open']:>6}{m['elapsed_s']:>8.2f}"
+              f"{m['probes_per_s']:>10,.0f}{m['cpu_us_per_probe']:>14.0f}")
+    finally:
+        done.set()
+        stubs.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
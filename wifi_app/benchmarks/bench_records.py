@@ -0,0 +1,49 @@
+"""
+Per-scan allocation of dict records vs slotted AccessPoint records,
+measured with tracemalloc on a 500-BSSID capture.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_records
+"""
+import tracemalloc
+
+from benchmarks.bench_parser import legacy_parse_netsh_output
+from benchmarks.netsh_captures import make_netsh_capture
+from utils.netsh_parser import parse_netsh_output
+from utils.records import AccessPointBatch
+
+
+def measure(func, *args):
+    """
+    Returns (retained bytes, peak bytes, result) for one call of func.
+    """
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current - before, peak - before, result
+
+
+def main():
+    capture = make_netsh_capture(n_ssids=125, bssids_per_ssid=4)
+    # Warm up regex caches and interned strings so they are not counted
+    legacy_parse_netsh_output(capture)
+    records = parse_netsh_output(capture)
+    AccessPointBatch.from_records(records)
+
+    legacy_retained, legacy_peak, legacy = measure(legacy_parse_netsh_output, capture)
+    new_retained, new_peak, new = measure(parse_netsh_output, capture)
+    batch_retained, _, batch = measure(AccessPointBatch.from_records, new)
+    assert len(legacy) == len(new) == len(batch) == 500
+
+    print(f"{'500 BSSIDs':<28}{'retained':>12}{'peak':>12}{'per AP':>10}")
+    for label, retained, peak in (("dict records (legacy)", legacy_retained, legacy_peak),
+                                  ("AccessPoint records", new_retained, new_peak),
+                                  ("AccessPointBatch columns", batch_retained, batch_retained)):
+        print(f"{label:<28}{retained:>12,}{peak:>12,}{retained / 500:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Hostname resolution wall time for 1000 hosts of which 10% have a slow PTR
+lookup: the legacy per-scan 20-thread pool vs HostnameResolver, cold and
+with a warm cache. Lookups are faked, nothing touches the network.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_resolver
+"""
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.hostname_resolver import HostnameResolver
+from utils.records import Device
+
+FAST = 0.005
+SLOW = 2.0
+
+
+def make_devices(n, slow_fraction, seed=0):
+    rng = random.Random(seed)
+    devices = [Device(f"10.0.{i // 250}.{i % 250 + 1}", f"00:00:00:00:{i // 256:02x}:{i % 256:02x}")
+               for i in range(n)]
+    slow = {d.ip for d in rng.sample(devices, int(n * slow_fraction))}
+    return devices, slow
+
+
+def fake_gethostbyaddr(slow):
+    def gethostbyaddr(ip):
+        time.sleep(SLOW if ip in slow else FAST)
+        return f"host-{ip}", [], [ip]
+    return gethostbyaddr
+
+
+def fake_ptr(slow):
+    async def reverse_dns(ip):
+        await asyncio.sleep(SLOW if ip in slow else FAST)
+        return f"host-{ip}"
+    return reverse_dns
+
+
+def legacy_resolve(devices, gethostbyaddr):
+    """
+    The original NetworkScanWorker.resolve_hostnames.
+    """
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        future_to_device = {executor.submit(gethostbyaddr, d.ip): d for d in devices}
+        for future in future_to_device:
+            d = future_to_device[future]
+            try:
+                d.hostname = future.result()[0]
+            except:
+                d.hostname = "Unknown"
+
+
+def main():
+    devices, slow = make_devices(1000, 0.10)
+
+    start = time.perf_counter()
+    legacy_resolve(devices, fake_gethostbyaddr(slow))
+    legacy = time.perf_counter() - start
+
+    resolver = HostnameResolver(sources=[fake_ptr(slow)], concurrency=64, timeout=0.5)
+    done = []
+    start = time.perf_counter()
+    resolver.resolve_devices(devices, lambda d: done.append(time.perf_counter() - start))
+    cold = time.perf_counter() - start
+    fast = sorted(done)[len(devices) - len(slow) - 1]
+
+    start = time.perf_counter()
+    resolver.resolve_devices(devices)
+    warm = time.perf_counter() - start
+
+    print(f"{'hosts':>6}{'slow':>6}{'legacy s':>10}{'cold s':>9}{'fast hosts s':>14}{'warm s':>9}")
+    print(f"{len(devices):>6}{len(slow):>6}{legacy:>10.2f}{cold:>9.2f}{fast:>14.2f}{warm:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Scans spent per phase by the fixed-interval loop vs ScanScheduler, on a
+simulated radio whose results go through four phases: stable, roaming
+(signals moving and the strongest BSSID flipping), hidden (tab not visible,
+so the scanner is paused) and 5 bursts of 4 rapid "Force Refresh" clicks.
+Time is scaled down 100x (the 5 s default interval becomes 50 ms) so the
+run takes a few seconds.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_scan_scheduler
+"""
+import random
+import threading
+import time
+
+from core.scan_scheduler import ScanScheduler
+from core.wifi_scanner import WifiScanner
+from utils.records import AccessPoint
+
+SCALE = 0.01
+PHASE = 300 * SCALE
+SCAN_COST = 3.0 * SCALE
+
+
+class SimulatedRadio:
+    """
+    Backend whose results depend on the current phase. Each scan takes
+    SCAN_COST seconds, like a real sweep.
+    """
+    name = 'simulated'
+
+    def __init__(self, n=60, seed=0):
+        self.rng = random.Random(seed)
+        self.aps = [AccessPoint(f"Net{i // 3}", f"00:00:00:00:00:{i:02x}",
+                                signal=self.rng.randrange(20, 90)) for i in range(n)]
+        self.phase = 'stable'
+        self.scans = {}
+
+    def scan(self):
+        time.sleep(SCAN_COST)
+        self.scans[self.phase] = self.scans.get(self.phase, 0) + 1
+        if self.phase == 'roaming':
+            for ap in self.aps:
+                ap.signal = max(1, min(99, ap.signal + self.rng.randrange(-25, 26)))
+        return [AccessPoint(ap.ssid, ap.bssid, signal=ap.signal) for ap in self.aps]
+
+
+def run_phases(radio, pause, resume, request):
+    for phase in ('stable', 'roaming', 'hidden', 'burst'):
+        radio.phase = phase
+        if phase == 'hidden':
+            pause()
+        if phase == 'burst':
+            resume()
+            for _ in range(5):
+                for _ in range(4):
+                    request()
+                time.sleep(PHASE / 10)
+        time.sleep(PHASE)
+
+
+def fixed_loop(radio, stop, interval=5 * SCALE):
+    """
+    The original WifiScannerWorker.run: scan, sleep, regardless.
+    """
+    while not stop.is_set():
+        radio.scan()
+        stop.wait(interval)
+
+
+def main():
+    radio = SimulatedRadio()
+    stop = threading.Event()
+    thread = threading.Thread(target=fixed_loop, args=(radio, stop))
+    thread.start()
+    run_phases(radio, lambda: None, lambda: None, lambda: None)
+    stop.set()
+    thread.join()
+    legacy = radio.scans
+
+    radio = SimulatedRadio()
+    scheduler = ScanScheduler(interval=5 * SCALE, min_interval=2 * SCALE, max_interval=30 * SCALE,
+                              window=60 * SCALE)
+    scanner = WifiScanner(radio, scheduler)
+    thread = threading.Thread(target=scanner.run, args=(lambda networks: None,))
+    thread.start()
+    run_phases(radio, scanner.pause, scanner.resume, scanner.request_scan)
+    metrics = scanner.metrics()
+    scanner.stop()
+    thread.join()
+
+    print(f"{'phase':<10}{'fixed scans':>13}{'scheduled':>11}")
+    for phase in ('stable', 'roaming', 'hidden', 'burst'):
+        print(f"{phase:<10}{legacy.get(phase, 0):>13}{radio.scans.get(phase, 0):>11}")
+    print(f"{'total':<10}{sum(legacy.values()):>13}{sum(radio.scans.values()):>11}")
+    print(f"scheduler: {metrics['requests']} requests, {metrics['coalesced']} coalesced, "
+          f"duty cycle {metrics['duty_cycle'] * 100:.1f}% over the last minute (unscaled), "
+          f"final interval {metrics['interval'] / SCALE:.1f} s (unscaled)")
+
+
+if __name__ == "__main__":
+    main()
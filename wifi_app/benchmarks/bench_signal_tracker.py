@@ -0,0 +1,142 @@
+"""
+Signal tracking over a simulated walk: 300 BSSIDs scanned every 5 s for
+two hours (1440 scans). Each BSSID's true level drifts slowly, the client
+walks away from its AP and back, and every reading has 4 dB of noise;
+a weak BSSID is missed by a scan now and then.
+
+Reports SignalTracker.update() time per scan at the start and the end of
+the run (it should not grow with history), the error of the raw readings,
+an EWMA (alpha 0.3) and the tracker's smoothed level against the true
+level, how far the displayed percentage jumps from scan to scan, how
+often table rows drop out and come back, the trend measured while the
+client walks away, and the roams detected against the simulated ones.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_signal_tracker
+"""
+import time
+
+import numpy as np
+
+from core.signal_tracker import SignalTracker
+from utils.records import AccessPoint
+
+APS = 300
+SCANS = 1440
+INTERVAL = 5.0
+NOISE_DB = 4.0
+# Client AP fades at this rate (dB/s) for FADE_SCANS scans, then recovers
+FADE_DB_S = -0.1
+FADE_SCANS = 60
+
+
+def simulate(seed=0):
+    """
+    (scans [[AccessPoint]], true dBm per scan (SCANS x APS), connected
+    AP index per scan).
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(-92, -45, APS)
+    drift = np.cumsum(rng.normal(0, 0.15, (SCANS, APS)), axis=0)
+    truth = base + drift
+    # The client's AP (0) fades as the client walks off and recovers on the
+    # way back; AP 1 does the opposite. Roams happen when one is 8 dB
+    # stronger than the other.
+    phase = (np.arange(SCANS) // FADE_SCANS) % 2
+    step = np.where(phase == 0, 1, -1) * FADE_DB_S * INTERVAL
+    walk = np.cumsum(step)
+    truth[:, 0] = -50 + walk
+    truth[:, 1] = -50 + (walk.min() - walk)
+    connected = []
+    current = 0
+    for scan in range(SCANS):
+        other = 1 - current
+        if truth[scan, other] > truth[scan, current] + 8:
+            current = other
+        connected.append(current)
+
+    bssids = [f"02:00:00:00:{i >> 8:02x}:{i & 0xff:02x}" for i in range(APS)]
+    readings = truth + rng.normal(0, NOISE_DB, truth.shape)
+    # Readings below -88 dBm are missed by a scan half the time
+    missed = (readings < -88) & (rng.random(truth.shape) < 0.5)
+    scans = []
+    for scan in range(SCANS):
+        aps = []
+        for i in np.flatnonzero(~missed[scan]).tolist():
+            quality = int(max(0, min(100, 2 * (readings[scan, i] + 100))))
+            aps.append(AccessPoint(f"net{i % 90}", bssids[i], quality, 1 + i % 11,
+                                   associated=i == connected[scan]))
+        scans.append(aps)
+    return scans, truth, connected, bssids
+
+
+def main():
+    scans, truth, connected, bssids = simulate()
+    tracker = SignalTracker()
+    times = []
+    smoothed = np.full(truth.shape, np.nan)
+    shown = np.full(truth.shape, np.nan)
+    raw = np.full(truth.shape, np.nan)
+    ewma = np.full(truth.shape, np.nan)
+    trend = np.full(SCANS, np.nan)
+    previous = {}
+    rows_dropped = raw_rows_dropped = 0
+    last_rows = last_raw = set()
+    roams = []
+    index = {bssid: i for i, bssid in enumerate(bssids)}
+
+    for scan, aps in enumerate(scans):
+        now = scan * INTERVAL
+        start = time.perf_counter()
+        tracks, events = tracker.update(aps, now=now)
+        times.append((time.perf_counter() - start) * 1000)
+
+        for ap in aps:
+            i = index[ap.bssid]
+            raw[scan, i] = ap.signal / 2 - 100
+            ewma[scan, i] = raw[scan, i] if i not in previous \
+                else 0.3 * raw[scan, i] + 0.7 * previous[i]
+            previous[i] = ewma[scan, i]
+        for track in tracks:
+            i = index[track.bssid]
+            shown[scan, i] = track.signal
+            if track.present:
+                smoothed[scan, i] = track.dbm
+        trend[scan] = tracker.track(bssids[0]).trend
+        roams += [event for kind, event in events if kind == 'roamed']
+
+        rows = {track.bssid for track in tracks}
+        raw_rows = {ap.bssid for ap in aps}
+        rows_dropped += len(last_rows - rows)
+        raw_rows_dropped += len(last_raw - raw_rows)
+        last_rows, last_raw = rows, raw_rows
+
+    times = np.array(times)
+    print(f"{APS} BSSIDs, {SCANS} scans every {INTERVAL:.0f} s, "
+          f"{np.mean([len(s) for s in scans]):.0f} APs per scan")
+    print(f"update:  first 100 scans {times[:100].mean():.3f} ms, "
+          f"last 100 {times[-100:].mean():.3f} ms, p99 {np.percentile(times, 99):.3f} ms")
+
+    def error(estimate):
+        # Skip the first few scans, which only have a reading or two
+        return np.sqrt(np.nanmean((estimate[5:] - truth[5:]) ** 2))
+    print(f"RMS error vs true level: raw {error(raw):.2f} dB, EWMA {error(ewma):.2f} dB, "
+          f"tracker {error(smoothed):.2f} dB")
+
+    raw_quality = np.clip(2 * (raw + 100), 0, 100)
+    jumps = np.nanmean(np.abs(np.diff(raw_quality, axis=0)))
+    print(f"scan-to-scan change of the displayed %: raw {jumps:.1f}, "
+          f"tracked {np.nanmean(np.abs(np.diff(shown, axis=0))):.1f}")
+    print(f"table rows dropping out between scans: raw {raw_rows_dropped}, tracked {rows_dropped}")
+
+    fading = np.arange(SCANS) % (2 * FADE_SCANS)
+    settled = (fading >= 20) & (fading < FADE_SCANS)
+    print(f"trend while fading at {FADE_DB_S * 60:+.1f} dB/min: "
+          f"mean {trend[settled].mean():+.1f}, std {trend[settled].std():.1f} dB/min")
+
+    expected = sum(1 for a, b in zip(connected, connected[1:]) if a != b)
+    print(f"roams: {len(roams)} detected, {expected} simulated")
+
+
+if __name__ == "__main__":
+    main()
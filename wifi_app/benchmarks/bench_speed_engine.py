@@ -0,0 +1,49 @@
+"""
+SpeedTestEngine against the bundled LocalSpeedServer over loopback, with
+the server in a separate process so the two do not share a GIL: throughput
+per direction for 1, 4 and 8 streams, the sample rate actually delivered,
+idle vs loaded latency, and how long cancel() takes to return.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_speed_engine
+"""
+import subprocess
+import sys
+import threading
+import time
+
+from core.speed_test import HttpEndpoint, SpeedTestEngine
+
+DURATION = 3.0
+WARMUP = 1.0
+
+
+def main():
+    server = subprocess.Popen([sys.executable, "-m", "core.speed_server", "127.0.0.1", "0"],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        endpoint = HttpEndpoint(server.stdout.readline().strip())
+        print(f"{'streams':>8}{'down Gbps':>11}{'up Gbps':>9}{'samples Hz':>12}"
+              f"{'idle ms':>9}{'loaded ms':>11}")
+        for streams in (1, 4, 8):
+            samples = []
+            engine = SpeedTestEngine(endpoint, streams=streams, duration=DURATION, warmup=WARMUP,
+                                     on_sample=lambda *sample: samples.append(sample))
+            result = engine.run()
+            loaded = max(result.download_latency_ms, result.upload_latency_ms)
+            print(f"{streams:>8}{result.download_mbps / 1000:>11.2f}{result.upload_mbps / 1000:>9.2f}"
+                  f"{len(samples) / (2 * DURATION):>12.1f}{result.idle_latency_ms:>9.2f}{loaded:>11.2f}")
+
+        engine = SpeedTestEngine(endpoint, streams=8, duration=60)
+        threading.Timer(2.0, engine.cancel).start()
+        start = time.perf_counter()
+        result = engine.run()
+        print(f"cancel after 2.0 s of a 60 s run: returned at {time.perf_counter() - start:.3f} s, "
+              f"partial download {result.download_mbps / 1000:.2f} Gbps")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Start-up cost of the headless CLI and the Qt GUI, each in a fresh
+interpreter, with a regression check.
+
+- cli: time from spawn until the first JSON line, and peak RSS.
+- gui: time from spawn until MainWindow's first paint (offscreen QPA), until
+  the first tab is built, and peak RSS by then.
+- imports: `-X importtime` of ui.main_window, the slowest modules by
+  cumulative time.
+
+Exits non-zero if the GUI's first paint takes longer than --max-paint
+seconds, or if any of the heavy modules were imported before it.
+POSIX only (os.wait4).
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_startup [--max-paint 0.6]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be loaded before the window is on screen
+HEAVY = ('matplotlib', 'pyqtgraph', 'numpy', 'scapy', 'speedtest')
+
+GUI = """
+import os, sys, time
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication
+from ui.main_window import MainWindow
+HEAVY = %r
+
+class FirstPaint(QObject):
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint:
+            app.removeEventFilter(self)
+            loaded = [m for m in HEAVY if m in sys.modules]
+            print("paint", ",".join(loaded) or "-", flush=True)
+        return False
+
+def poll():
+    if window.pages:
+        print("tab", flush=True)
+        os._exit(0)
+
+app = QApplication([])
+first_paint = FirstPaint()
+app.installEventFilter(first_paint)
+window = MainWindow()
+window.show()
+timer = QTimer()
+timer.timeout.connect(poll)
+timer.start(1)
+app.exec()
+""" % (HEAVY,)
+
+CLI = [sys.executable, "-m", "wifi_app", "--history", "off",
+       "ping", "127.0.0.1", "--interval", "0.2", "--duration", "0.3"]
+
+
+def spawn(command, cwd):
+    env = {**os.environ, "PYWIFIMAN_HISTORY": "off"}
+    return subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, env=env, text=True)
+
+
+def finish(proc):
+    proc.stdout.read()
+    _, _, usage = os.wait4(proc.pid, 0)
+    # ru_maxrss is in KB on Linux
+    return usage.ru_maxrss / 1024
+
+
+def measure_cli():
+    start = time.perf_counter()
+    proc = spawn(CLI, os.path.dirname(HERE))
+    proc.stdout.readline()
+    ready = time.perf_counter() - start
+    return ready, finish(proc)
+
+
+def measure_gui():
+    start = time.perf_counter()
+    proc = spawn([sys.executable, "-c", GUI], HERE)
+    _, loaded = proc.stdout.readline().split()
+    paint = time.perf_counter() - start
+    proc.stdout.readline()
+    tab = time.perf_counter() - start
+    return paint, tab, finish(proc), [] if loaded == '-' else loaded.split(',')
+
+
+def import_times(module, top=8):
+    """
+    Cumulative `-X importtime` of `module` and of its slowest direct
+    imports, in µs.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=HERE, capture_output=True, text=True)
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Each module is listed after its imports, one level deeper
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == module:
+            return int(cumulative), sorted(children, reverse=True)[:top]
+        if depth == 0:
+            children = []
+        elif depth == 1:
+            children.append((int(cumulative), name.strip()))
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-paint', type=float, default=0.6,
+                        help="fail if the GUI's first paint takes longer (s)")
+    args = parser.parse_args()
+
+    total, slowest = import_times('ui.main_window')
+    print(f"import ui.main_window: {total / 1000:.0f} ms")
+    for us, name in slowest:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+
+    cli_ready, cli_rss = measure_cli()
+    paint, tab, gui_rss, loaded = measure_gui()
+    print(f"{'':<6}{'first paint s':>14}{'first tab s':>13}{'peak MB':>9}")
+    print(f"{'cli':<6}{cli_ready:>14.2f}{'':>13}{cli_rss:>9.0f}")
+    print(f"{'gui':<6}{paint:>14.2f}{tab:>13.2f}{gui_rss:>9.0f}")
+
+    failures = []
+    if paint > args.max_paint:
+        failures.append(f"first paint {paint:.2f} s > {args.max_paint:.2f} s")
+    if loaded:
+        failures.append(f"loaded before first paint: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Site survey heatmaps at the size the survey view has to stay interactive
+with: 5,000 samples along a walk over a 2000 x 1200 px floor plan, with
+200 simulated APs (log-distance path loss plus shadowing). Each sample
+sees the few dozen APs in range.
+
+Reports the time to add one sample (mean and p99), to fetch a BSSID's
+map and to redraw the heatmap with matplotlib (Agg), against rebuilding
+the maps from every sample so far, which is what recomputing on each new
+sample costs. Also checks the interpolation against the simulated signal
+at points between the samples.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_survey
+"""
+import time
+
+import numpy as np
+
+from core.site_survey import SurveyHeatmap
+
+WIDTH, HEIGHT = 2000, 1200
+APS = 200
+SAMPLES = 5000
+
+
+def simulate(seed=0):
+    """
+    (samples [(x, y, [(bssid, signal)])], signal(x, y) per AP).
+    """
+    rng = np.random.default_rng(seed)
+    ap_x = rng.uniform(0, WIDTH, APS)
+    ap_y = rng.uniform(0, HEIGHT, APS)
+    power = rng.uniform(100, 125, APS)
+
+    def signal(x, y):
+        distance = np.hypot(ap_x - x, ap_y - y) + 10
+        # ~ -30 dB per decade of distance, in the 0-100% quality scale
+        return np.clip(power - 60 * np.log10(distance / 10), 0, 100)
+
+    # Serpentine walk down corridors 60 px apart
+    t = np.linspace(0, 1, SAMPLES)
+    lanes = HEIGHT // 60
+    lane = np.minimum((t * lanes).astype(int), lanes - 1)
+    along = (t * lanes) % 1.0
+    xs = np.where(lane % 2 == 0, along, 1 - along) * (WIDTH - 20) + 10
+    ys = lane * 60 + 30 + rng.normal(0, 4, SAMPLES)
+    bssids = [f"00:11:22:{i >> 8:02x}:{i & 0xff:02x}:00" for i in range(APS)]
+    samples = []
+    for x, y in zip(xs, ys):
+        levels = signal(x, y) + rng.normal(0, 3, APS)
+        # Below ~15% the AP is not in the scan
+        seen = np.flatnonzero(levels > 15)
+        samples.append((x, y, [(bssids[i], int(levels[i])) for i in seen]))
+    return samples, signal, bssids
+
+
+def main():
+    samples, signal, bssids = simulate()
+    seen = [len(readings) for _, _, readings in samples]
+    print(f"{SAMPLES} samples x {APS} BSSIDs, {np.mean(seen):.0f} seen per sample "
+          f"({min(seen)}-{max(seen)})")
+
+    heatmap = SurveyHeatmap(WIDTH, HEIGHT)
+    add_ms = []
+    for x, y, readings in samples:
+        start = time.perf_counter()
+        heatmap.add(x, y, readings)
+        add_ms.append((time.perf_counter() - start) * 1000)
+    add_ms = np.array(add_ms)
+    print(f"grid {heatmap.columns} x {heatmap.rows} cells, radius {heatmap.radius:.0f} px, "
+          f"{heatmap.nbytes() / 2**20:.1f} MB")
+    print(f"add sample:    mean {add_ms.mean():.3f} ms, p99 {np.percentile(add_ms, 99):.3f} ms, "
+          f"last 500 mean {add_ms[-500:].mean():.3f} ms")
+
+    start = time.perf_counter()
+    for bssid in bssids[:50]:
+        heatmap.bssid_map(bssid)
+    print(f"bssid map:     {(time.perf_counter() - start) / 50 * 1000:.3f} ms")
+
+    start = time.perf_counter()
+    rebuilt = SurveyHeatmap(WIDTH, HEIGHT)
+    for x, y, readings in samples:
+        rebuilt.add(x, y, readings)
+    rebuild_ms = (time.perf_counter() - start) * 1000
+    print(f"rebuild from all {SAMPLES} samples: {rebuild_ms:.0f} ms per update "
+          f"({rebuild_ms / add_ms.mean():,.0f}x the incremental add)")
+    assert np.allclose(np.nan_to_num(rebuilt.best()), np.nan_to_num(heatmap.best()))
+
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure(figsize=(8, 5), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    axes = figure.add_subplot(111)
+    image = axes.imshow(heatmap.best(), extent=heatmap.extent, vmin=0, vmax=100, cmap='RdYlGn',
+                        interpolation='bilinear')
+    canvas.draw()
+    start = time.perf_counter()
+    for _ in range(20):
+        image.set_data(heatmap.best())
+        canvas.draw()
+    print(f"redraw:        {(time.perf_counter() - start) / 20 * 1000:.1f} ms")
+
+    # Error at points between the samples, against the simulated signal
+    rng = np.random.default_rng(1)
+    errors = []
+    for _ in range(2000):
+        x, y, _ = samples[rng.integers(SAMPLES)]
+        x, y = x + rng.uniform(-30, 30), y + rng.uniform(-30, 30)
+        estimate = heatmap.value_at(x, y)
+        if not np.isnan(estimate):
+            levels = signal(x, y)
+            errors.append(abs(estimate - levels.max()))
+    print(f"best-signal error between samples: mean {np.mean(errors):.1f}, "
+          f"p90 {np.percentile(errors, 90):.1f} (percentage points)")
+
+
+if __name__ == "__main__":
+    main()
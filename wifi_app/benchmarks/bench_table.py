@@ -0,0 +1,100 @@
+"""
+Refresh cost of the Wi-Fi table: the legacy QTableWidget rebuild vs the
+diffing AccessPointTableModel, for 1000 rows with 5% churn per scan
+(rows leaving, rows appearing and signal changes). Runs headless.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_table
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem
+
+from ui.table_models import AccessPointTableModel
+from utils.records import AccessPoint
+
+
+def make_ap(rng, i):
+    bssid = ":".join(f"{b:02x}" for b in i.to_bytes(6, "big"))
+    return AccessPoint(f"Net{i}", bssid, signal=rng.randrange(1, 100),
+                       channel=rng.randrange(1, 14), authentication="WPA2-Personal")
+
+
+def make_scans(n, churn, scans, seed=0):
+    """
+    Yields `scans` successive scans of n networks where a `churn` fraction
+    disappears, the same number appears and another `churn` fraction
+    changes signal.
+    """
+    rng = random.Random(seed)
+    current = [make_ap(rng, i) for i in range(n)]
+    next_id = n
+    k = int(n * churn)
+    result = [list(current)]
+    for _ in range(scans):
+        for i in rng.sample(range(len(current)), k):
+            current[i] = make_ap(rng, next_id)
+            next_id += 1
+        for i in rng.sample(range(len(current)), k):
+            ap = current[i]
+            current[i] = AccessPoint(ap.ssid, ap.bssid, signal=rng.randrange(1, 100),
+                                     channel=ap.channel, authentication=ap.authentication)
+        result.append(list(current))
+    return result
+
+
+def legacy_update(table, networks):
+    """
+    The original WifiTab.update_table.
+    """
+    table.setSortingEnabled(False)
+    table.setRowCount(0)
+    for net in networks:
+        row = table.rowCount()
+        table.insertRow(row)
+        table.setItem(row, 0, QTableWidgetItem(net.ssid))
+        table.setItem(row, 1, QTableWidgetItem(net.bssid))
+        table.setItem(row, 2, QTableWidgetItem(f"{net.signal}%"))
+        table.setItem(row, 3, QTableWidgetItem(str(net.channel)))
+        table.setItem(row, 4, QTableWidgetItem(net.authentication))
+    table.setSortingEnabled(True)
+
+
+def update_time(update, app, scans):
+    update(scans[0])
+    app.processEvents()
+    start = time.perf_counter()
+    for scan in scans[1:]:
+        update(scan)
+        app.processEvents()
+    return (time.perf_counter() - start) / (len(scans) - 1) * 1000
+
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    scans = make_scans(1000, 0.05, scans=20)
+
+    table = QTableWidget()
+    table.setColumnCount(5)
+    table.resize(800, 600)
+    table.show()
+    legacy = update_time(lambda s: legacy_update(table, s), app, scans)
+
+    model = AccessPointTableModel()
+    view = QTableView()
+    view.setModel(model)
+    view.setSortingEnabled(True)
+    view.resize(800, 600)
+    view.show()
+    new = update_time(model.update, app, scans)
+
+    print(f"{'rows':>6}{'churn':>8}{'legacy ms':>12}{'model ms':>11}")
+    print(f"{1000:>6}{'5%':>8}{legacy:>12.1f}{new:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+UI update delivery under load: a worker thread emits 10 ping samples per
+100 ms tick (10 targets at 10 Hz, 2 ms to redraw the latency graph), a
+burst of three Wi-Fi scans every second (requests piling up; 30 ms to
+redraw the table and chart) and 60 devices/s during a network scan
+(0.5 ms per table upsert), for 5 seconds.
+Redraw costs are simulated by busy-waiting on the UI thread.
+
+Compares connecting the signals straight to the handlers (one queued slot
+call per emission, as the tabs used to) with routing them through the
+UpdateBus (ui.frame_pump). Reports the redraws run, UI-thread time spent
+in them, latency from emission to handling, the longest stall of a 10 ms
+heartbeat timer (how long the window stops responding) and the bus's own
+counters.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_update_bus
+"""
+import os
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PySide6.QtCore import QCoreApplication, QEventLoop, QThread, QTimer, Signal
+
+from core.update_bus import UpdateBus, append
+from ui.frame_pump import FramePump, route
+
+DURATION = 5.0
+TICK = 0.1
+PINGS_PER_TICK = 10
+SCAN_EVERY = 1.0
+SCAN_BURST = 3
+DEVICES_PER_S = 60
+PING_REDRAW_MS = 2.0
+CHART_REDRAW_MS = 30.0
+UPSERT_MS = 0.5
+
+
+def busy(ms):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+class Producer(QThread):
+    # Emission time (perf_counter)
+    ping = Signal(float)
+    scan = Signal(float)
+    device = Signal(float)
+
+    def run(self):
+        start = time.perf_counter()
+        next_scan = next_device = start
+        tick = start
+        while tick - start < DURATION:
+            for _ in range(PINGS_PER_TICK):
+                self.ping.emit(time.perf_counter())
+            if tick >= next_scan:
+                for _ in range(SCAN_BURST):
+                    self.scan.emit(time.perf_counter())
+                next_scan += SCAN_EVERY
+            while next_device <= tick:
+                self.device.emit(time.perf_counter())
+                next_device += 1 / DEVICES_PER_S
+            tick += TICK
+            time.sleep(max(0.0, tick - time.perf_counter()))
+
+
+class Handlers:
+    """
+    Simulated tab slots; each takes the list of values since its last call.
+    """
+    def __init__(self):
+        self.redraws = 0
+        self.busy_s = 0.0
+        self.latencies = []
+
+    def _handled(self, stamps, cost_ms):
+        start = time.perf_counter()
+        busy(cost_ms)
+        end = time.perf_counter()
+        self.redraws += 1
+        self.busy_s += end - start
+        self.latencies += [end - stamp for stamp in stamps]
+
+    def pings(self, stamps):
+        self._handled(stamps, PING_REDRAW_MS)
+
+    def scans(self, stamps):
+        self._handled(stamps, CHART_REDRAW_MS)
+
+    def devices(self, stamps):
+        self._handled(stamps, UPSERT_MS * len(stamps))
+
+
+def run(app, through_bus):
+    handlers = Handlers()
+    producer = Producer()
+    if through_bus:
+        bus = UpdateBus()
+        pump = FramePump(bus)
+        bus.subscribe('ping', handlers.pings, merge=append)
+        bus.subscribe('scan', handlers.scans, merge=append)
+        bus.subscribe('device', handlers.devices, merge=append)
+        route(producer.ping, bus, 'ping')
+        route(producer.scan, bus, 'scan')
+        route(producer.device, bus, 'device')
+    else:
+        bus = pump = None
+        producer.ping.connect(lambda stamp: handlers.pings([stamp]))
+        producer.scan.connect(lambda stamp: handlers.scans([stamp]))
+        producer.device.connect(lambda stamp: handlers.devices([stamp]))
+
+    gaps = []
+    last_beat = [time.perf_counter()]
+
+    def beat():
+        now = time.perf_counter()
+        gaps.append(now - last_beat[0])
+        last_beat[0] = now
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(beat)
+    heartbeat.start(10)
+
+    loop = QEventLoop()
+    producer.finished.connect(loop.quit)
+    producer.start()
+    loop.exec()
+    producer.wait()
+    # Let the UI thread work through whatever is still queued
+    expected = DURATION / TICK * PINGS_PER_TICK
+    while len(handlers.latencies) < expected:
+        app.processEvents(QEventLoop.AllEvents, 50)
+    app.processEvents(QEventLoop.AllEvents, 300)
+    heartbeat.stop()
+    if pump is not None:
+        pump.timer.stop()
+
+    latencies = np.array(handlers.latencies) * 1000
+    return {
+        'redraws': handlers.redraws,
+        'busy_s': handlers.busy_s,
+        'p50': np.percentile(latencies, 50),
+        'p95': np.percentile(latencies, 95),
+        'max': latencies.max(),
+        'stall': max(gaps) * 1000,
+        'bus': bus.metrics() if bus is not None else None,
+    }
+
+
+def main():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    pings = int(DURATION / TICK * PINGS_PER_TICK)
+    scans = int(DURATION / SCAN_EVERY * SCAN_BURST)
+    print(f"{DURATION:.0f} s: {pings} ping samples, {scans} scans, "
+          f"{int(DURATION * DEVICES_PER_S)} devices emitted")
+    for name, through_bus in (("direct slots", False), ("update bus", True)):
+        result = run(app, through_bus)
+        print(f"{name:>12}: {result['redraws']:5d} handler calls, {result['busy_s']:.2f} s on the "
+              f"UI thread, latency p50 {result['p50']:.0f} ms p95 {result['p95']:.0f} ms "
+              f"max {result['max']:.0f} ms, longest stall {result['stall']:.0f} ms")
+        if result['bus'] is not None:
+            metrics = result['bus']
+            print(f"{'':>12}  bus: {metrics['frames']} frames, {metrics['coalesced']} coalesced, "
+                  f"{metrics['deferred']} deferred, {metrics['over_budget']} over budget, "
+                  f"frame p95 {metrics['frame_p95_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
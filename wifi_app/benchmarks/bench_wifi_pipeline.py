@@ -0,0 +1,94 @@
+"""
+Whole Wi-Fi pipeline with no radio: WifiScanner on a ReplayBackend reading
+recorded netsh and iw captures, then the table model update and the channel
+chart render, per stage and per scan. Captures are synthetic and seeded, so
+runs are repeatable. Runs headless.
+
+Run from the wifi_app directory:
+    python -m benchmarks.bench_wifi_pipeline [capture dir]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PySide6.QtWidgets import QApplication
+
+from benchmarks.netsh_captures import make_iw_capture, make_netsh_capture
+from core.wifi_backends import ReplayBackend
+from core.wifi_scanner import WifiScanner
+from ui.channel_chart import ChannelChartRenderer
+from ui.table_models import AccessPointTableModel
+from utils.records import AccessPointBatch
+
+SCANS = 20
+
+
+def write_captures(directory, make, n_ssids):
+    for i in range(SCANS):
+        with open(os.path.join(directory, f"scan-{i:03d}.txt"), 'w', encoding='utf-8') as f:
+            f.write(make(n_ssids=n_ssids, seed=i))
+
+
+def run(scanner, model, chart, canvas):
+    """
+    Median ms per stage over one pass of the captures.
+    """
+    stages = {'scan': [], 'table': [], 'chart': []}
+    bssids = 0
+    for _ in range(len(scanner.backend.captures)):
+        start = time.perf_counter()
+        networks = scanner.scan()
+        parsed = time.perf_counter()
+        model.update(networks)
+        tabled = time.perf_counter()
+        chart.update(AccessPointBatch.from_records(networks))
+        canvas.draw()
+        drawn = time.perf_counter()
+        stages['scan'].append(parsed - start)
+        stages['table'].append(tabled - parsed)
+        stages['chart'].append(drawn - tabled)
+        bssids += len(networks)
+    return bssids, {k: statistics.median(v) * 1000 for k, v in stages.items()}
+
+
+def main():
+    # The model needs a QApplication alive for the whole run
+    _app = QApplication([])
+    model = AccessPointTableModel()
+    fig = Figure(figsize=(5, 4), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    chart = ChannelChartRenderer(fig.add_subplot(111))
+
+    if len(sys.argv) > 1:
+        cases = [(os.path.basename(sys.argv[1].rstrip('/')), sys.argv[1])]
+        tmp = None
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        cases = []
+        for fmt, make in (('netsh', make_netsh_capture), ('iw', make_iw_capture)):
+            for n_ssids in (30, 300):
+                directory = os.path.join(tmp.name, f"{fmt}-{n_ssids}")
+                os.mkdir(directory)
+                write_captures(directory, make, n_ssids)
+                cases.append((f"{fmt} x{n_ssids * 3}", directory))
+
+    print(f"{'captures':<14}{'bssids':>8}{'scan ms':>9}{'table ms':>10}{'chart ms':>10}{'total ms':>10}")
+    for name, directory in cases:
+        scanner = WifiScanner(ReplayBackend(directory))
+        bssids, ms = run(scanner, model, chart, canvas)
+        print(f"{name:<14}{bssids:>8}{ms['scan']:>9.2f}{ms['table']:>10.2f}"
+              f"{ms['chart']:>10.2f}{sum(ms.values()):>10.2f}")
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Synthetic captures of a busy home/office LAN for the passive discovery
+benchmark: Ethernet frames carrying ARP, mDNS announcements (and queries),
+SSDP NOTIFYs and NetBIOS registrations and host announcements, each
+repeated the way real devices repeat them.
+
+    python -m benchmarks.discovery_captures out.pcap [devices] [minutes]
+"""
+import random
+import socket
+import struct
+import sys
+
+from utils.pcap import write_pcap
+
+MODELS = [('_googlecast._tcp', 'md', "Chromecast Ultra"), ('_airplay._tcp', 'model', "AppleTV6,2"),
+          ('_ipp._tcp', 'ty', "Brother HL-L2350DW"), ('_hap._tcp', 'md', "Hue Bridge"),
+          ('_raop._tcp', 'am', "AudioAccessory5,1")]
+UPNP = ["MediaRenderer", "InternetGatewayDevice", "MediaServer", "ZonePlayer"]
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'>{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    return ~(total + (total >> 16)) & 0xFFFF
+
+
+def ethernet(src_mac, dst_mac, ethertype, payload):
+    return dst_mac + src_mac + struct.pack('>H', ethertype) + payload
+
+
+def udp_frame(src_mac, src_ip, dst_ip, src_port, dst_port, payload, dst_mac=b'\xff' * 6):
+    udp = struct.pack('>HHHH', src_port, dst_port, 8 + len(payload), 0) + payload
+    header = struct.pack('>BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 0, 0, 255, 17, 0,
+                         socket.inet_aton(src_ip), socket.inet_aton(dst_ip))
+    header = header[:10] + struct.pack('>H', _checksum(header)) + header[12:]
+    return ethernet(src_mac, dst_mac, 0x0800, header + udp)
+
+
+def arp_frame(src_mac, src_ip, target_ip, reply=False):
+    payload = struct.pack('>HHBBH6s4s6s4s', 1, 0x0800, 6, 4, 2 if reply else 1, src_mac,
+                          socket.inet_aton(src_ip), b'\0' * 6, socket.inet_aton(target_ip))
+    return ethernet(src_mac, b'\xff' * 6, 0x0806, payload)
+
+
+def dns_name(name):
+    return b''.join(bytes([len(label)]) + label.encode() for label in name.split('.')) + b'\0'
+
+
+def dns_record(name, rtype, rdata, ttl=120):
+    return dns_name(name) + struct.pack('>HHIH', rtype, 0x8001, ttl, len(rdata)) + rdata
+
+
+def mdns_announcement(hostname, ip, service, key, model):
+    instance = f"{hostname}.{service}.local"
+    txt = b''.join(bytes([len(item)]) + item for item in
+                   (f"{key}={model}".encode(), b"id=3f2a", b"ve=05"))
+    records = [
+        dns_record(f"{service}.local", 12, dns_name(instance), 4500),
+        dns_record(instance, 33, struct.pack('>HHH', 0, 0, 8009) + dns_name(f"{hostname}.local")),
+        dns_record(instance, 16, txt, 4500),
+        dns_record(f"{hostname}.local", 1, socket.inet_aton(ip)),
+    ]
+    return struct.pack('>HHHHHH', 0, 0x8400, 0, len(records), 0, 0) + b''.join(records)
+
+
+def mdns_query(service):
+    return struct.pack('>HHHHHH', 0, 0, 1, 0, 0, 0) + dns_name(f"{service}.local") + b'\0\x0c\0\x01'
+
+
+def ssdp_notify(ip, kind):
+    return (f"NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nCACHE-CONTROL: max-age=1800\r\n"
+            f"LOCATION: http://{ip}:1400/xml/device_description.xml\r\n"
+            f"NT: urn:schemas-upnp-org:device:{kind}:1\r\nNTS: ssdp:alive\r\n"
+            f"SERVER: Linux/4.9 UPnP/1.0 Sonos/70.3-35220 (ZPS12)\r\n"
+            f"USN: uuid:RINCON_{ip.replace('.', '')}::urn:schemas-upnp-org:device:{kind}:1\r\n\r\n"
+            ).encode()
+
+
+def netbios_name(name, suffix=0x20):
+    raw = name.upper().ljust(15)[:15].encode() + bytes([suffix])
+    return bytes([32]) + bytes(c for b in raw for c in (0x41 + (b >> 4), 0x41 + (b & 0xF))) + b'\0'
+
+
+def netbios_registration(name, ip):
+    question = netbios_name(name) + b'\0\x20\0\x01'
+    additional = b'\xc0\x0c' + struct.pack('>HHIH', 0x20, 1, 300000, 6) + b'\0\0' + socket.inet_aton(ip)
+    return struct.pack('>HHHHHH', 0x1234, 0x2910, 1, 0, 0, 1) + question + additional
+
+
+def netbios_host_announcement(name, ip):
+    header = struct.pack('>BBH4sHHH', 0x11, 0x02, 0x4321, socket.inet_aton(ip), 138, 0, 0)
+    return header + netbios_name(name) + netbios_name("WORKGROUP", 0x1D) + b'\xff\x53MB' + b'\0' * 40
+
+
+def build(devices=200, minutes=10, seed=0):
+    """
+    (timestamp, frame) pairs, time ordered; and the number of devices that
+    announce something beyond ARP.
+    """
+    rng = random.Random(seed)
+    frames = []
+    duration = minutes * 60
+    announcing = 0
+    for i in range(devices):
+        mac = bytes([0x00, 0x1A, 0x11, 0, i >> 8, i & 0xFF])
+        ip = f"192.168.{i // 250}.{i % 250 + 2}"
+        start = rng.uniform(0, 5)
+        # Everyone ARPs for the gateway now and then
+        for t in range(int(start), duration, 30):
+            frames.append((t + rng.random(), arp_frame(mac, ip, "192.168.0.1")))
+        role = i % 4
+        if role == 0:
+            service, key, model = MODELS[i % len(MODELS)]
+            hostname = f"device-{i}"
+            payload = mdns_announcement(hostname, ip, service, key, model)
+            # Announced three times at startup, then refreshed every 60 s
+            times = [start + 1, start + 2, start + 4] + list(range(60, duration, 60))
+            frames += [(t, udp_frame(mac, ip, "224.0.0.251", 5353, 5353, payload)) for t in times]
+            for t in range(int(start), duration, 20):
+                query = mdns_query(rng.choice(MODELS)[0])
+                frames.append((t + 0.5, udp_frame(mac, ip, "224.0.0.251", 5353, 5353, query)))
+        elif role == 1:
+            # A NOTIFY per device type, each sent twice, every 90 s
+            for t in range(int(start), duration, 90):
+                for kind in UPNP[:2 + i % 3]:
+                    payload = ssdp_notify(ip, kind)
+                    for repeat in range(2):
+                        frames.append((t + repeat * 0.1,
+                                       udp_frame(mac, ip, "239.255.255.250", 1900, 1900, payload)))
+        elif role == 2:
+            name = f"WS-{i:04d}"
+            registration = netbios_registration(name, ip)
+            frames += [(start + k * 0.75, udp_frame(mac, ip, "192.168.0.255", 137, 137, registration))
+                       for k in range(3)]
+            announcement = netbios_host_announcement(name, ip)
+            frames += [(t, udp_frame(mac, ip, "192.168.0.255", 138, 138, announcement))
+                       for t in range(int(start), duration, 120)]
+        else:
+            continue
+        announcing += 1
+    frames.sort(key=lambda item: item[0])
+    return frames, announcing
+
+
+def main():
+    devices = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    minutes = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    frames, announcing = build(devices, minutes)
+    write_pcap(sys.argv[1], frames)
+    print(f"{len(frames)} frames, {devices} devices, {announcing} announcing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import random
+
+# Synthetic 'netsh wlan show networks mode=bssid' and 'iw dev <iface> scan
+# dump' captures for benchmarks.
+
+_KEYS = {
+    'en': {
+        'network_type': "Network type",
+        'infrastructure': "Infrastructure",
+        'auth': "Authentication",
+        'enc': "Encryption",
+        'signal': "Signal",
+        'radio': "Radio type",
+        'band': "Band",
+        'channel': "Channel",
+        'bss_load': "Bss Load",
+        'stations': "Connected Stations",
+        'utilization': "Channel Utilization",
+        'capacity': "Medium Available Capacity",
+        'basic_rates': "Basic rates (Mbps)",
+        'other_rates': "Other rates (Mbps)",
+        'header': "There are {count} networks currently visible.",
+    },
+    'fr': {
+        'network_type': "Type de réseau",
+        'infrastructure': "Infrastructure",
+        'auth': "Authentification",
+        'enc': "Chiffrement",
+        'signal': "Signal",
+        'radio': "Type de radio",
+        'band': "Bande",
+        'channel': "Canal",
+        'bss_load': "Charge BSS",
+        'stations': "Stations connectées",
+        'utilization': "Utilisation du canal",
+        'capacity': "Capacité disponible du support",
+        'basic_rates': "Taux de base (Mbits/s)",
+        'other_rates': "Autres taux (Mbits/s)",
+        'header': "Il existe actuellement {count} réseaux visibles.",
+    },
+    'de': {
+        'network_type': "Netzwerktyp",
+        'infrastructure': "Infrastruktur",
+        'auth': "Authentifizierung",
+        'enc': "Verschlüsselung",
+        'signal': "Signal",
+        'radio': "Funktyp",
+        'band': "Band",
+        'channel': "Kanal",
+        'bss_load': "BSS-Auslastung",
+        'stations': "Verbundene Stationen",
+        'utilization': "Kanalauslastung",
+        'capacity': "Verfügbare Medienkapazität",
+        'basic_rates': "Basisraten (MBit/s)",
+        'other_rates': "Andere Raten (MBit/s)",
+        'header': "Es sind zurzeit {count} Netzwerke sichtbar.",
+        'decimal_comma': True,
+    },
+    'es': {
+        'network_type': "Tipo de red",
+        'infrastructure': "Infraestructura",
+        'auth': "Autenticación",
+        'enc': "Cifrado",
+        'signal': "Señal",
+        'radio': "Tipo de radio",
+        'band': "Banda",
+        'channel': "Canal",
+        'bss_load': "Carga de BSS",
+        'stations': "Estaciones conectadas",
+        'utilization': "Uso del canal",
+        'capacity': "Capacidad disponible del medio",
+        'basic_rates': "Velocidades básicas (Mbps)",
+        'other_rates': "Otras velocidades (Mbps)",
+        'header': "Hay {count} redes visibles actualmente.",
+    },
+    'it': {
+        'network_type': "Tipo di rete",
+        'infrastructure': "Infrastruttura",
+        'auth': "Autenticazione",
+        'enc': "Crittografia",
+        'signal': "Segnale",
+        'radio': "Tipo di radio",
+        'band': "Banda",
+        'channel': "Canale",
+        'bss_load': "Carico BSS",
+        'stations': "Stazioni connesse",
+        'utilization': "Utilizzo canale",
+        'capacity': "Capacità disponibile del supporto",
+        'basic_rates': "Velocità di base (Mbps)",
+        'other_rates': "Altre velocità (Mbps)",
+        'header': "Sono attualmente visibili {count} reti.",
+    },
+    'pt': {
+        'network_type': "Tipo de rede",
+        'infrastructure': "Infraestrutura",
+        'auth': "Autenticação",
+        'enc': "Criptografia",
+        'signal': "Sinal",
+        'radio': "Tipo de rádio",
+        'band': "Banda",
+        'channel': "Canal",
+        'bss_load': "Carga do BSS",
+        'stations': "Estações conectadas",
+        'utilization': "Utilização do canal",
+        'capacity': "Capacidade disponível do meio",
+        'basic_rates': "Taxas básicas (Mbps)",
+        'other_rates': "Outras taxas (Mbps)",
+        'header': "Há {count} redes visíveis no momento.",
+    },
+}
+
+# Windows versions: which per-BSSID fields their netsh prints
+VERSIONS = {
+    # Windows 10: no band, no BSS load
+    'win10': {'band': False, 'bss_load': False},
+    # Windows 11: band, and the BSS Load element when the AP sends one
+    'win11': {'band': True, 'bss_load': True},
+}
+
+_AUTH = ["WPA2-Personal", "WPA3-Personal", "WPA2-Enterprise", "Open"]
+_ENC = ["CCMP", "GCMP", "None"]
+_CHANNELS = [1, 6, 11, 3, 9, 36, 40, 44, 48, 149, 153, 157, 161]
+_RADIOS = ["802.11ax", "802.11ac", "802.11n"]
+
+
+def _line(key, value, indent=4):
+    # netsh pads keys to a fixed column before the colon
+    return " " * indent + f"{key:<24}: {value}"
+
+
+def make_netsh_capture(n_ssids=100, bssids_per_ssid=3, locale='en', seed=0, version='win10'):
+    """
+    Builds a netsh capture with `n_ssids` networks of `bssids_per_ssid`
+    access points each, using the keys of `locale` (see _KEYS) and the
+    fields of Windows `version` (see VERSIONS).
+    """
+    return make_netsh_fixture(n_ssids, bssids_per_ssid, locale, seed, version)[0]
+
+
+def make_netsh_fixture(n_ssids=20, bssids_per_ssid=3, locale='en', seed=0, version='win11'):
+    """
+    (capture, expected): a capture as make_netsh_capture builds it and,
+    per BSSID, a dict of the AccessPoint fields parsing it must produce.
+    """
+    keys = _KEYS[locale]
+    fields = VERSIONS[version]
+    rng = random.Random(seed)
+    rate = (lambda r: r.replace('.', ',')) if keys.get('decimal_comma') else (lambda r: r)
+    lines = ["", "Interface name : Wi-Fi", keys['header'].format(count=n_ssids), ""]
+    expected = []
+    for s in range(n_ssids):
+        ssid = f"Network-{s:04d}" if s % 17 else ""
+        auth, enc = rng.choice(_AUTH), rng.choice(_ENC)
+        lines.append(f"SSID {s + 1} : {ssid}")
+        lines.append(_line(keys['network_type'], keys['infrastructure']))
+        lines.append(_line(keys['auth'], auth))
+        lines.append(_line(keys['enc'], enc))
+        for b in range(bssids_per_ssid):
+            mac = ":".join(f"{rng.randrange(256):02x}" for _ in range(6))
+            signal = rng.randrange(1, 100)
+            channel = rng.choice(_CHANNELS)
+            lines.append(_line(f"BSSID {b + 1}", mac))
+            lines.append(_line(keys['signal'], f"{signal}%", indent=9))
+            ap = {'ssid': ssid or "<Hidden>", 'bssid': mac, 'signal': signal,
+                  'dbm': signal / 2 - 100, 'channel': channel, 'authentication': auth,
+                  'encryption': enc, 'network_type': 'Infrastructure', 'radio': "802.11ax",
+                  'band': '', 'stations': -1, 'utilization': -1,
+                  'basic_rates': (1.0, 2.0, 5.5, 11.0),
+                  'other_rates': (6.0, 9.0, 12.0, 18.0, 24.0, 36.0, 48.0, 54.0)}
+            if fields['band'] or fields['bss_load']:
+                ap['radio'] = rng.choice(_RADIOS)
+            lines.append(_line(keys['radio'], ap['radio'], indent=9))
+            if fields['band']:
+                ap['band'] = '2.4' if channel <= 14 else '5'
+                lines.append(_line(keys['band'], f"{rate(ap['band'])} GHz", indent=9))
+            lines.append(_line(keys['channel'], str(channel), indent=9))
+            if fields['bss_load'] and rng.random() < 0.7:
+                ap['stations'] = rng.randrange(0, 40)
+                raw = rng.randrange(0, 256)
+                ap['utilization'] = round(raw * 100 / 255)
+                lines.append(_line(keys['bss_load'], "", indent=9))
+                lines.append(_line(keys['stations'], str(ap['stations']), indent=13))
+                lines.append(_line(keys['utilization'], f"{raw} ({ap['utilization']} %)",
+                                   indent=13))
+                lines.append(_line(keys['capacity'], str(rng.randrange(0, 31250)), indent=13))
+            lines.append(_line(keys['basic_rates'], rate("1 2 5.5 11"), indent=9))
+            lines.append(_line(keys['other_rates'], "6 9 12 18 24 36 48 54", indent=9))
+            expected.append(ap)
+        lines.append("")
+    return "\r\n".join(lines), expected
+
+
+_IW_SECURITY = {
+    "WPA2-Personal": ("RSN", "PSK"),
+    "WPA3-Personal": ("RSN", "SAE"),
+    "WPA2-Enterprise": ("RSN", "IEEE 802.1X"),
+    "Open": (None, None),
+}
+
+
+def _channel_freq(channel):
+    if channel == 14:
+        return 2484
+    return 2407 + 5 * channel if channel < 14 else 5000 + 5 * channel
+
+
+def make_iw_capture(n_ssids=100, bssids_per_ssid=3, seed=0):
+    """
+    Builds an 'iw dev wlan0 scan dump' capture with the same shape as
+    make_netsh_capture.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for s in range(n_ssids):
+        ssid = f"Network-{s:04d}" if s % 17 else ""
+        auth = rng.choice(_AUTH)
+        cipher = rng.choice(_ENC[:2])
+        element, suite = _IW_SECURITY[auth]
+        for b in range(bssids_per_ssid):
+            mac = ":".join(f"{rng.randrange(256):02x}" for _ in range(6))
+            channel = rng.choice(_CHANNELS)
+            privacy = " Privacy" if element else ""
+            lines += [
+                f"BSS {mac}(on wlan0)",
+                f"\tlast seen: {rng.randrange(10000)} ms ago",
+                f"\tTSF: {rng.randrange(10**12)} usec (0d, 00:00:00)",
+                f"\tfreq: {_channel_freq(channel)}.0",
+                "\tbeacon interval: 100 TUs",
+                f"\tcapability: ESS{privacy} ShortSlotTime (0x0411)",
+                f"\tsignal: {-rng.randrange(30, 95)}.00 dBm",
+                f"\tSSID: {ssid}",
+                "\tSupported rates: 1.0* 2.0* 5.5* 11.0* 6.0 9.0 12.0 18.0 ",
+            ]
+            if channel <= 14:
+                lines.append(f"\tDS Parameter set: channel {channel}")
+            if element:
+                lines += [
+                    f"\t{element}:\t * Version: 1",
+                    f"\t\t * Group cipher: {cipher}",
+                    f"\t\t * Pairwise ciphers: {cipher}",
+                    f"\t\t * Authentication suites: {suite}",
+                    "\t\t * Capabilities: 16-PTKSA-RC 1-GTKSA-RC (0x000c)",
+                ]
+            lines += [
+                "\tHT operation:",
+                f"\t\t * primary channel: {channel}",
+                "\t\t * secondary channel offset: no secondary",
+            ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,310 @@
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+
+from utils import history, trace
+
+# Headless command line: runs the core scanners without Qt and streams
+# results to stdout as JSON lines, one object per event.
+#
+#   python -m wifi_app wifi [--interval 5] [--once] [--metrics] [--channels] [--backend iw|netsh|replay:<path>]
+#   python -m wifi_app network [--interval 300] [--full] [--iface eth0 --iface eth1]
+#   python -m wifi_app ports [HOST ...] [--tcp common|22,80,8000-8100] [--udp 53,123]
+#   python -m wifi_app listen [--duration 60] [--no-arp] [--replay capture.pcap]
+#   python -m wifi_app ping 8.8.8.8 1.1.1.1 [--interval 0.2] [--method icmp]
+#   python -m wifi_app speed [--server speedtest|local|<url>] [--streams 4] [--duration 10]
+#   python -m wifi_app daemon [--wifi-interval 5] [--network-interval 300] [--ping 8.8.8.8] [--no-listen]
+#
+# Scanner modules are imported by the command that needs them, so startup
+# only pays for what runs.
+
+
+class JsonLinesWriter:
+    """
+    Thread-safe JSON-lines output; every record gets `ts` and `type`.
+    """
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def write(self, type, **fields):
+        line = json.dumps({'ts': round(time.time(), 3), 'type': type, **fields},
+                          ensure_ascii=False, default=str)
+        with self.lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def _access_point(ap):
+    return {'ssid': ap.ssid, 'bssid': ap.bssid, 'signal': ap.signal, 'dbm': round(ap.dbm, 1),
+            'channel': ap.channel, 'band': ap.band_name(), 'width': ap.width,
+            'authentication': ap.authentication, 'encryption': ap.encryption,
+            'vendor': ap.vendor, 'associated': ap.associated, 'radio': ap.radio,
+            'network_type': ap.network_type, 'basic_rates': ap.basic_rates,
+            'other_rates': ap.other_rates, 'stations': ap.stations,
+            'utilization': ap.utilization}
+
+
+def _device(device):
+    return {'ip': device.ip, 'mac': device.mac, 'hostname': device.hostname,
+            'kind': device.type, 'vendor': device.vendor, 'model': device.model,
+            'services': list(device.services)}
+
+
+def _rtt(rtt):
+    return None if rtt is None else round(rtt, 3)
+
+
+def wifi_job(out, interval, once, stop, backend=None, metrics=False, channels=False):
+    from core.signal_tracker import SignalTracker
+    from core.wifi_scanner import WifiScanner
+    scanner = WifiScanner(backend)
+    tracker = SignalTracker()
+    if channels:
+        from core.channel_analyzer import ChannelAnalyzer
+        analyzer = ChannelAnalyzer()
+
+    def on_scan(networks):
+        _, events = tracker.update(networks)
+        entries = []
+        for ap in networks:
+            track = tracker.track(ap.bssid)
+            entries.append({**_access_point(ap), 'smoothed_dbm': round(track.dbm, 1),
+                            'trend_db_min': round(track.trend, 1)})
+        out.write('wifi_scan', networks=entries)
+        for kind, event in events:
+            out.write('wifi_' + kind, **event.as_dict())
+        if channels:
+            out.write('wifi_channels', **analyzer.analyze(networks).as_dict())
+        if metrics:
+            out.write('wifi_metrics', **scanner.metrics())
+        if once:
+            scanner.stop()
+
+    threading.Thread(target=lambda: (stop.wait(), scanner.stop()), daemon=True).start()
+    scanner.run(on_scan, interval)
+
+
+def network_job(out, interval, stop, full=False, interfaces=None):
+    from core.network_scanner import NetworkScanner
+    scanner = NetworkScanner(interfaces=interfaces)
+
+    def on_interface(timing):
+        out.write('network_interface', **{**timing, 'elapsed_s': round(timing['elapsed_s'], 3)})
+
+    while not stop.is_set():
+        devices = scanner.scan(on_device=lambda d: out.write('device', **_device(d)),
+                               on_event=lambda kind, d: out.write('device_' + kind, **_device(d)),
+                               full=full, on_interface=on_interface)
+        out.write('network_scan', devices=len(devices))
+        if not interval:
+            return
+        stop.wait(interval)
+
+
+def listen_job(out, duration, arp, replay, stop):
+    from core.passive_discovery import PassiveListener
+    listener = PassiveListener(
+        arp=arp,
+        on_update=lambda devices: [out.write('device_update', **_device(d)) for d in devices],
+        on_event=lambda kind, d: out.write('device_' + kind, **_device(d)))
+    if replay:
+        listener.replay(replay)
+    else:
+        threading.Thread(target=lambda: (stop.wait(), listener.stop()), daemon=True).start()
+        listener.run(duration)
+    out.write('listen_stats', sources=listener.listening, **listener.stats)
+
+
+def ping_job(out, targets, interval, method, port, duration, stop):
+    from core.latency_engine import LatencyEngine
+
+    def on_sample(target, seq, rtt, stats):
+        out.write('ping', target=target, seq=seq, rtt_ms=_rtt(rtt),
+                  jitter_ms=round(stats.jitter, 3), loss_percent=round(stats.loss_percent, 1))
+
+    engine = LatencyEngine(targets, interval=interval, timeout=max(interval, 1.0),
+                           method=method, port=port, on_sample=on_sample)
+    threading.Thread(target=lambda: (stop.wait(), engine.stop()), daemon=True).start()
+    engine.run(duration)
+
+
+def ports_job(out, hosts, tcp, udp, concurrency, per_host, timeout, stop):
+    from core.port_scanner import PortScanner, parse_ports
+    if not hosts:
+        # No hosts given: scan the devices on the local network
+        from core.network_scanner import NetworkScanner
+        hosts = NetworkScanner().scan()
+        out.write('network_scan', devices=len(hosts))
+    scanner = PortScanner(parse_ports(tcp), parse_ports(udp), concurrency=concurrency,
+                          per_host=per_host, timeout=timeout,
+                          on_result=lambda result: out.write('port', **result.as_dict()))
+    threading.Thread(target=lambda: (stop.wait(), scanner.cancel()), daemon=True).start()
+    scanner.scan(hosts)
+    out.write('port_scan', **scanner.metrics())
+
+
+def speed_job(out, server, streams, duration, warmup, stop):
+    from core.speed_test import SpeedTestEngine, select_endpoint
+
+    def on_sample(phase, elapsed, mbps, latency):
+        out.write('speed_sample', phase=phase, elapsed_s=round(elapsed, 2),
+                  mbps=round(mbps, 2), latency_ms=_rtt(latency))
+
+    out.write('speed_progress', message="Finding best server...")
+    endpoint = select_endpoint(server)
+    try:
+        engine = SpeedTestEngine(endpoint, streams=streams, duration=duration, warmup=warmup,
+                                 on_sample=on_sample,
+                                 on_progress=lambda message: out.write('speed_progress', message=message))
+        threading.Thread(target=lambda: (stop.wait(), engine.cancel()), daemon=True).start()
+        result = engine.run()
+    finally:
+        endpoint.close()
+    out.write('speed', server=endpoint.url,
+              **{k: round(v, 2) if isinstance(v, float) else v for k, v in result.as_dict().items()})
+
+
+def _run_jobs(jobs, stop):
+    """
+    Runs each job in a thread until they all return or `stop` is set.
+    """
+    threads = [threading.Thread(target=job, name=name, daemon=True) for name, job in jobs]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads) and not stop.wait(0.2):
+        pass
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=2)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m wifi_app',
+                                     description="Headless PyWiFiman scanners, JSON lines on stdout.")
+    parser.add_argument('--history', metavar='PATH',
+                        help="record scans to this database, 'on' for ~/.pywifiman/history.sqlite3, "
+                             "or 'off' (default: $PYWIFIMAN_HISTORY, else off)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    wifi = commands.add_parser('wifi', help="scan Wi-Fi networks")
+    wifi.add_argument('--interval', type=float, default=5,
+                      help="starting interval, adapted to how fast results change")
+    wifi.add_argument('--once', action='store_true')
+    wifi.add_argument('--channels', action='store_true',
+                      help="also emit per-channel utilization and recommended channels")
+    wifi.add_argument('--metrics', action='store_true',
+                      help="emit scan rate and duty cycle after each scan")
+    wifi.add_argument('--backend', metavar='SPEC',
+                      help="netsh, iw[:IFACE] or replay:PATH (default: $PYWIFIMAN_WIFI_BACKEND or by platform)")
+
+    network = commands.add_parser('network', help="sweep the local network")
+    network.add_argument('--interval', type=float, default=0,
+                         help="repeat every INTERVAL seconds (default: scan once)")
+    network.add_argument('--iface', action='append', metavar='NAME',
+                         help="interface to scan, repeatable (default: every interface that is up)")
+    network.add_argument('--full', action='store_true',
+                         help="sweep the whole subnet every time instead of delta scans")
+
+    ports = commands.add_parser('ports', help="scan TCP/UDP ports and identify services")
+    ports.add_argument('hosts', nargs='*',
+                       help="addresses to scan (default: the devices found on the local network)")
+    ports.add_argument('--tcp', default='common', metavar='PORTS',
+                       help="port list, ranges or sets: common, web, well-known (default: common)")
+    ports.add_argument('--udp', default='', metavar='PORTS')
+    ports.add_argument('--concurrency', type=int, default=256)
+    ports.add_argument('--per-host', type=int, default=16)
+    ports.add_argument('--timeout', type=float, default=1.0,
+                       help="longest wait per probe; shortened per host from its measured RTT")
+
+    listen = commands.add_parser('listen', help="passively collect device announcements")
+    listen.add_argument('--duration', type=float,
+                        help="seconds to listen (default: until interrupted)")
+    listen.add_argument('--no-arp', action='store_true', help="do not watch ARP traffic")
+    listen.add_argument('--replay', metavar='PCAP',
+                        help="read packets from a capture file instead of the network")
+
+    ping = commands.add_parser('ping', help="probe latency to one or more targets")
+    ping.add_argument('targets', nargs='+')
+    ping.add_argument('--interval', type=float, default=1.0)
+    ping.add_argument('--method', choices=('auto', 'icmp', 'tcp', 'udp'), default='auto')
+    ping.add_argument('--port', type=int)
+    ping.add_argument('--duration', type=float)
+
+    speed = commands.add_parser('speed', help="run a speed test")
+    speed.add_argument('--server', metavar='SPEC',
+                       help="speedtest, local (loopback test server) or an http:// URL "
+                            "(default: $PYWIFIMAN_SPEED_SERVER or speedtest)")
+    speed.add_argument('--streams', type=int, default=4)
+    speed.add_argument('--duration', type=float, default=10,
+                       help="seconds per direction")
+    speed.add_argument('--warmup', type=float, default=2,
+                       help="seconds left out of the result at the start of each direction")
+
+    daemon = commands.add_parser('daemon', help="run the scanners continuously")
+    daemon.add_argument('--wifi-interval', type=float, default=5)
+    daemon.add_argument('--wifi-backend', metavar='SPEC')
+    daemon.add_argument('--network-interval', type=float, default=300)
+    daemon.add_argument('--ping', nargs='*', default=['8.8.8.8'], metavar='TARGET')
+    daemon.add_argument('--ping-interval', type=float, default=1.0)
+    daemon.add_argument('--no-wifi', action='store_true')
+    daemon.add_argument('--no-network', action='store_true')
+    daemon.add_argument('--no-listen', action='store_true',
+                        help="do not listen for device announcements")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    trace.configure_from_env()
+    if args.history is None:
+        history.configure_from_env()
+    else:
+        path = history.resolve_path(args.history)
+        if path is not None:
+            history.open_store(path)
+
+    out = JsonLinesWriter()
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    if args.command == 'wifi':
+        jobs = [('wifi', lambda: wifi_job(out, args.interval, args.once, stop,
+                                         args.backend, args.metrics, args.channels))]
+    elif args.command == 'network':
+        jobs = [('network', lambda: network_job(out, args.interval, stop, args.full,
+                                                args.iface))]
+    elif args.command == 'ports':
+        jobs = [('ports', lambda: ports_job(out, args.hosts, args.tcp, args.udp, args.concurrency,
+                                            args.per_host, args.timeout, stop))]
+    elif args.command == 'listen':
+        jobs = [('listen', lambda: listen_job(out, args.duration, not args.no_arp, args.replay,
+                                              stop))]
+    elif args.command == 'ping':
+        jobs = [('ping', lambda: ping_job(out, args.targets, args.interval, args.method,
+                                          args.port, args.duration, stop))]
+    elif args.command == 'speed':
+        jobs = [('speed', lambda: speed_job(out, args.server, args.streams, args.duration,
+                                            args.warmup, stop))]
+    else:
+        jobs = []
+        if not args.no_wifi:
+            jobs.append(('wifi', lambda: wifi_job(out, args.wifi_interval, False, stop,
+                                                  args.wifi_backend)))
+        if not args.no_network:
+            jobs.append(('network', lambda: network_job(out, args.network_interval, stop)))
+        if not args.no_listen:
+            jobs.append(('listen', lambda: listen_job(out, None, True, None, stop)))
+        if args.ping:
+            jobs.append(('ping', lambda: ping_job(out, args.ping, args.ping_interval, 'auto',
+                                                  None, None, stop)))
+        out.write('daemon_started', jobs=[name for name, _ in jobs])
+
+    try:
+        _run_jobs(jobs, stop)
+    finally:
+        history.close()
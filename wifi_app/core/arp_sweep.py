@@ -0,0 +1,108 @@
+import asyncio
+import ipaddress
+import time
+
+from utils.records import Device
+from utils.trace import get_tracer
+
+# Pipelined ARP sweep over an arbitrary IPv4 network.
+#
+# Requests go out in rate-limited batches while a receiver collects replies
+# concurrently, so hosts answering the first batch are reported while later
+# batches are still being sent. The wire is abstracted behind a transport
+# with two blocking calls:
+#   send(ips)       broadcast one ARP request per address
+#   recv(timeout)   next (ip, mac) reply, or None if nothing arrived in time
+# The scapy transport lives in core.network_scanner; the simulated
+# responder in benchmarks.arp_responder implements the same interface.
+
+tracer = get_tracer('arp_sweep')
+
+# Sweeps never cover more than a /16 (65534 hosts), however wide the
+# interface's prefix is.
+MIN_PREFIX = 16
+
+
+class ArpSweep:
+    """
+    Sweeps a network through `transport`, `batch_size` addresses at a time
+    at no more than `rate` requests per second. The sweep ends `linger`
+    seconds after the last batch went out.
+    """
+    def __init__(self, transport, batch_size=256, rate=1000, linger=1.5,
+                 poll_interval=0.1):
+        self.transport = transport
+        self.batch_size = batch_size
+        self.rate = rate
+        self.linger = linger
+        self.poll_interval = poll_interval
+
+    def sweep(self, network, on_device=None, hosts=None, stop=None):
+        """
+        Blocking entry point: runs the sweep in its own event loop and
+        returns the devices found, in the order they answered. `hosts`
+        limits the sweep to those addresses of `network`. Setting the
+        threading.Event `stop` ends the sweep early with what answered so far.
+        """
+        return asyncio.run(self.run(network, on_device, hosts, stop))
+
+    async def run(self, network, on_device=None, hosts=None, stop=None):
+        network = ipaddress.IPv4Network(network)
+        targets = network.hosts() if hosts is None else hosts
+        loop = asyncio.get_running_loop()
+        found = {}
+        sending_done = asyncio.Event()
+        last_sent = [time.monotonic()]
+        stopped = stop.is_set if stop is not None else lambda: False
+
+        async def send():
+            try:
+                batch = []
+                for ip in targets:
+                    batch.append(str(ip))
+                    if len(batch) == self.batch_size:
+                        if stopped():
+                            return
+                        await send_batch(batch)
+                        batch = []
+                if batch and not stopped():
+                    await send_batch(batch)
+            finally:
+                sending_done.set()
+
+        async def send_batch(batch):
+            started = time.monotonic()
+            await loop.run_in_executor(None, self.transport.send, batch)
+            last_sent[0] = time.monotonic()
+            tracer.debug("batch_sent", first=batch[0], count=len(batch))
+            # Rate limit: a batch "costs" len/rate seconds, minus time already spent sending
+            delay = len(batch) / self.rate - (last_sent[0] - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        async def receive():
+            while not (sending_done.is_set() and time.monotonic() - last_sent[0] > self.linger
+                       or stopped()):
+                reply = await loop.run_in_executor(None, self.transport.recv, self.poll_interval)
+                if reply is None:
+                    continue
+                ip, mac = reply
+                if ip in found or ipaddress.IPv4Address(ip) not in network:
+                    continue
+                device = Device(ip, mac, type='Dynamic')
+                found[ip] = device
+                if on_device is not None:
+                    on_device(device)
+
+        tracer.info("sweep_start", network=str(network),
+                    hosts=network.num_addresses if hosts is None else len(hosts))
+        sender = asyncio.ensure_future(send())
+        try:
+            await receive()
+        finally:
+            sender.cancel()
+        if not sender.cancelled():
+            sender.result()  # re-raise a transport error from the sender
+        tracer.info("sweep_cancelled" if stopped() else "sweep_done", network=str(network),
+                    found=len(found))
+        return list(found.values())
@@ -0,0 +1,274 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.records import AccessPointBatch, percent_to_dbm
+
+# Channel planning: how busy each 20 MHz channel of the 2.4, 5 and 6 GHz
+# bands is, and which channels to use.
+#
+# Every AP occupies the frequency span of its whole channel (20, 40, 80 or
+# 160 MHz around its centre channel; bonded channels whose centre the scan
+# did not report are placed on the standard channelization). For each AP
+# and each 20 MHz channel the overlapping fraction of that channel is
+# computed in one broadcast NumPy expression (APs x channels), weighted by
+# the AP's signal:
+#
+#   weight      0 at NOISE_FLOOR_DBM, 1 at STRONG_DBM, linear in dB between
+#   co_channel  sum of the weights of APs whose primary channel it is; they
+#               share airtime through CSMA
+#   overlap     weighted fractions from every other AP covering it
+#               (bonded secondaries, partially overlapping 2.4 GHz channels),
+#               which cannot defer to each other and are worse
+#   utilization co_channel + overlap
+#
+# A candidate channel of a given width scores the worst of its 20 MHz
+# channels (co_channel + OVERLAP_PENALTY * overlap), since one busy
+# subchannel is enough to force a wide channel down; blocks using 5 GHz
+# DFS channels get DFS_PENALTY, as radar detection can move them at any
+# time. The lowest scores are the recommendations. Reports are cached by
+# scan content, so redrawing or switching bands on the same scan costs a
+# dictionary lookup.
+
+NOISE_FLOOR_DBM = -90
+STRONG_DBM = -50
+OVERLAP_PENALTY = 2.0
+DFS_PENALTY = 0.05
+
+BANDS = {
+    '2.4': {
+        'code': 24,
+        'channels': list(range(1, 14)),
+        # The only three 20 MHz channels that do not overlap
+        'candidates': [1, 6, 11],
+        'widths': (20, 40),
+    },
+    '5': {
+        'code': 5,
+        'channels': [36, 40, 44, 48, 52, 56, 60, 64,
+                     100, 104, 108, 112, 116, 120, 124, 128, 132, 136, 140, 144,
+                     149, 153, 157, 161, 165],
+        'candidates': None,
+        'widths': (20, 40, 80, 160),
+    },
+    '6': {
+        'code': 6,
+        'channels': list(range(1, 234, 4)),
+        # Preferred scanning channels, where 6 GHz-only clients look first
+        'candidates': list(range(5, 234, 16)),
+        'widths': (20, 40, 80, 160),
+    },
+}
+
+# 5 GHz channels that need radar detection (DFS)
+DFS_CHANNELS = frozenset(range(52, 145, 4))
+
+# Width shown first for each band
+DEFAULT_WIDTHS = {'2.4': 20, '5': 80, '6': 160}
+
+
+def channel_frequency(band_code, channel):
+    """
+    Centre frequency in MHz of channel numbers (arrays) in a band given by
+    its code (24, 5 or 6).
+    """
+    base = np.select([band_code == 24, band_code == 5], [2407, 5000], 5950)
+    return np.where((band_code == 24) & (channel == 14), 2484, base + 5 * channel)
+
+
+def resolve_centers(band_code, channel, width, center):
+    """
+    Centre channels of the APs' whole channels: `center` where reported,
+    else the standard block a `width` channel holding `channel` falls in
+    (40 MHz in 2.4 GHz goes above the primary up to channel 7, below after).
+    """
+    channel = channel.astype(np.int32)
+    width = width.astype(np.int32)
+    step = 4 * np.maximum(width // 20, 1)
+    base = np.where(band_code == 6, 1, np.where(channel >= 149, 149, 36))
+    block = base + (channel - base) // step * step + step // 2 - 2
+    standard = np.where(band_code == 24, np.where(channel <= 7, channel + 2, channel - 2), block)
+    standard = np.where(width <= 20, channel, standard)
+    return np.where(center > 0, center.astype(np.int32), standard)
+
+
+def _weights(signal):
+    dbm = percent_to_dbm(signal.astype(np.float32))
+    return np.clip((dbm - NOISE_FLOOR_DBM) / (STRONG_DBM - NOISE_FLOOR_DBM), 0, 1)
+
+
+class Recommendation:
+    """
+    A candidate channel: primary `channel`, `width` MHz wide around
+    `center`; lower `score` is better.
+    """
+    __slots__ = ('band', 'channel', 'width', 'center', 'score', 'dfs')
+
+    def __init__(self, band, channel, width, center, score, dfs=False):
+        self.band = band
+        self.channel = channel
+        self.width = width
+        self.center = center
+        self.score = score
+        self.dfs = dfs
+
+    def label(self):
+        text = f"{self.channel}" if self.width == 20 else f"{self.channel} ({self.width} MHz)"
+        return text + (" DFS" if self.dfs else "")
+
+    def as_dict(self):
+        return {'band': self.band, 'channel': self.channel, 'width': self.width,
+                'center': self.center, 'score': round(self.score, 3), 'dfs': self.dfs}
+
+
+class ChannelReport:
+    """
+    Per-channel figures for each band ({'channels', 'utilization',
+    'co_channel', 'overlap', 'count'} arrays) and the ranked
+    Recommendations for each (band, width).
+    """
+    __slots__ = ('bands', 'recommendations', 'aps')
+
+    def __init__(self, bands, recommendations, aps):
+        self.bands = bands
+        self.recommendations = recommendations
+        self.aps = aps
+
+    def best(self, band, width=None, count=3):
+        width = width or DEFAULT_WIDTHS[band]
+        return self.recommendations.get((band, width), [])[:count]
+
+    def utilization(self, band):
+        table = self.bands[band]
+        return dict(zip(table['channels'].tolist(), table['utilization'].tolist()))
+
+    def as_dict(self):
+        return {
+            'aps': self.aps,
+            'channels': {band: {int(c): round(float(u), 3)
+                                for c, u in zip(t['channels'], t['utilization']) if u > 0}
+                         for band, t in self.bands.items()},
+            'recommendations': {band: [r.as_dict() for r in self.best(band)] for band in BANDS},
+        }
+
+
+class ChannelAnalyzer:
+    """
+    Builds ChannelReports from scans (AccessPointBatch or AccessPoints),
+    keeping the last `cache_size` of them.
+    """
+    def __init__(self, cache_size=8):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Every 20 MHz channel of every band, as one frequency axis
+        self._bands = []
+        codes, channels = [], []
+        for name, band in BANDS.items():
+            start = len(channels)
+            channels += band['channels']
+            codes += [band['code']] * len(band['channels'])
+            self._bands.append((name, slice(start, len(channels))))
+        self._codes = np.array(codes)
+        self._channels = np.array(channels)
+        centers = channel_frequency(self._codes, self._channels).astype(np.float32)
+        self._low = centers - 10
+        self._high = centers + 10
+        self._blocks = self._candidate_blocks()
+
+    def analyze(self, scan):
+        if not isinstance(scan, AccessPointBatch):
+            scan = AccessPointBatch.from_records(scan)
+        key = (bytes(scan.band), bytes(scan.channel), bytes(scan.width), bytes(scan.center),
+               bytes(scan.signal))
+        report = self._cache.get(key)
+        if report is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return report
+        self.misses += 1
+        report = self._analyze(scan)
+        self._cache[key] = report
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return report
+
+    def _analyze(self, scan):
+        band = np.frombuffer(scan.band, dtype=np.uint8).astype(np.int32)
+        channel = np.frombuffer(scan.channel, dtype=np.uint16).astype(np.int32)
+        width = np.maximum(np.frombuffer(scan.width, dtype=np.uint16).astype(np.int32), 20)
+        center = np.frombuffer(scan.center, dtype=np.uint16)
+        weight = _weights(np.frombuffer(scan.signal, dtype=np.uint8))
+
+        middle = channel_frequency(band, resolve_centers(band, channel, width, center))
+        low = (middle - width / 2).astype(np.float32)
+        high = (middle + width / 2).astype(np.float32)
+        # (APs, channels): fraction of each 20 MHz channel each AP covers
+        covered = np.minimum(high[:, None], self._high[None, :]) \
+            - np.maximum(low[:, None], self._low[None, :])
+        fraction = np.clip(covered / 20, 0, 1)
+        primary = (band[:, None] == self._codes[None, :]) & (channel[:, None] == self._channels[None, :])
+
+        weighted = fraction * weight[:, None]
+        utilization = weighted.sum(axis=0)
+        co_channel = (primary * weight[:, None]).sum(axis=0)
+        overlap = utilization - co_channel
+        count = (fraction > 0).sum(axis=0)
+        cost = co_channel + OVERLAP_PENALTY * overlap
+
+        bands = {}
+        for name, part in self._bands:
+            bands[name] = {'channels': self._channels[part], 'utilization': utilization[part],
+                           'co_channel': co_channel[part], 'overlap': overlap[part],
+                           'count': count[part]}
+
+        recommendations = {}
+        for (name, width_mhz), (members, subchannels, allowed, centers, dfs) in self._blocks.items():
+            # Worst subchannel of each block, then the least busy allowed primary in it
+            block_cost = cost[members]
+            scores = block_cost.max(axis=1) + 1e-3 * block_cost.sum(axis=1) + DFS_PENALTY * dfs
+            primaries = subchannels[np.arange(len(members)),
+                                    np.argmin(np.where(allowed, block_cost, np.inf), axis=1)]
+            recommendations[(name, width_mhz)] = [
+                Recommendation(name, int(primaries[i]), width_mhz, int(centers[i]),
+                               float(scores[i]), bool(dfs[i]))
+                for i in np.argsort(scores, kind='stable')]
+        return ChannelReport(bands, recommendations, len(channel))
+
+    def _candidate_blocks(self):
+        """
+        {(band, width): (indices of each block's 20 MHz channels on the
+        channel axis, their channel numbers, which of them may be the
+        primary, block centre channels, whether it uses DFS channels)},
+        one row per block.
+        """
+        index = {key: i for i, key in enumerate(zip(self._codes.tolist(), self._channels.tolist()))}
+        blocks = {}
+        for name, band in BANDS.items():
+            code = band['code']
+            candidates = band['candidates'] or band['channels']
+            for width in band['widths']:
+                if name == '2.4':
+                    # 20 MHz on 1/6/11; 40 MHz as 1+5, 6+10 (above) and 11+7 (below)
+                    groups = {c if width == 20 else (c + 2 if c <= 7 else c - 2):
+                              [c] if width == 20 else sorted((c, c + 4 if c <= 7 else c - 4))
+                              for c in candidates}
+                else:
+                    channels = np.array(band['channels'])
+                    centers = resolve_centers(np.full(len(channels), code), channels,
+                                              np.full(len(channels), width), np.zeros(len(channels)))
+                    groups = {}
+                    for center, c in zip(centers.tolist(), band['channels']):
+                        groups.setdefault(center, []).append(c)
+                    # Complete blocks with at least one candidate primary
+                    groups = {center: group for center, group in groups.items()
+                              if len(group) == width // 20 and any(c in candidates for c in group)}
+                if not groups:
+                    continue
+                subchannels = np.array(list(groups.values()))
+                members = np.vectorize(lambda c: index[(code, int(c))])(subchannels)
+                allowed = np.isin(subchannels, candidates)
+                dfs = np.isin(subchannels, list(DFS_CHANNELS)).any(axis=1) & (name == '5')
+                blocks[(name, width)] = (members, subchannels, allowed, np.array(list(groups)), dfs)
+        return blocks
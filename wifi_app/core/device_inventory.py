@@ -0,0 +1,306 @@
+import ipaddress
+import threading
+import time
+
+from utils import history, oui
+from utils.records import Device
+from utils.trace import get_tracer
+
+# Device inventory, keyed by MAC.
+#
+# Every scan result goes through update(), which keeps first/last seen, the
+# IPs each device has used and its hostname, and turns differences into
+# events:
+#   joined  a MAC not seen before, or one that had left, is back
+#   moved   a present device answered from a new IP
+#   left    a device was probed and did not answer
+#
+# The inventory is what lets NetworkScanner skip most of the work on repeat
+# scans: entries in the OS neighbor table count as seen, and only devices
+# that have not answered an ARP probe for `stale_after` seconds are probed
+# again. Neighbor table sightings do not reset that clock, since the OS keeps
+# entries around for a while after a device goes quiet. It also remembers
+# when each subnet was last swept in full.
+#
+# Passive discovery feeds it through observe(): ARP sightings count as
+# verified presence, and mDNS/SSDP/NetBIOS announcements fill in hostname,
+# model and services. An announcement from an IP no entry holds yet is kept
+# as a hint and applied when a scan finds the device.
+#
+# It is seeded from the history store when one is open, so first_seen
+# survives restarts; loaded devices start out absent until a scan sees them.
+
+tracer = get_tracer('device_inventory')
+
+# IPs remembered per device
+MAX_IPS = 16
+
+# Hostname values that mean "not resolved"
+_UNNAMED = (None, '', "Unknown")
+
+# Announcements held for IPs not in the inventory yet
+MAX_HINTS = 1024
+
+
+class InventoryEntry:
+    """
+    One device in the inventory. `ips` is oldest first.
+    """
+    __slots__ = ('mac', 'ip', 'hostname', 'type', 'first_seen', 'last_seen', 'last_verified',
+                 'ips', 'present', 'model', 'services')
+
+    def __init__(self, mac, ip, hostname="Unknown", type='Dynamic', first_seen=None,
+                 last_seen=None):
+        self.mac = mac
+        self.ip = ip
+        self.hostname = hostname
+        self.type = type
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        # Last time it answered a probe
+        self.last_verified = last_seen
+        self.ips = [ip]
+        self.present = True
+        self.model = ''
+        self.services = set()
+
+    def apply(self, announcement):
+        """
+        Merges what an announcement says; returns whether anything changed.
+        """
+        changed = False
+        if announcement.hostname and self.hostname in _UNNAMED:
+            self.hostname = announcement.hostname
+            changed = True
+        if announcement.model and announcement.model != self.model:
+            self.model = announcement.model
+            changed = True
+        if not self.services.issuperset(announcement.services):
+            self.services.update(announcement.services)
+            changed = True
+        return changed
+
+    def as_device(self):
+        return Device(self.ip, self.mac, hostname=self.hostname, type=self.type,
+                      vendor=oui.vendor(self.mac), model=self.model,
+                      services=tuple(sorted(self.services)))
+
+
+class DeviceInventory:
+    """
+    See the module comment. Thread-safe.
+    """
+    def __init__(self, stale_after=120):
+        self.stale_after = stale_after
+        self.entries = {}
+        self._by_ip = {}
+        self._swept = {}
+        self._hints = {}
+        self._lock = threading.Lock()
+
+    def load(self, store):
+        """
+        Seeds the inventory from a HistoryStore.
+        """
+        rows = store.devices_seen()
+        with self._lock:
+            for mac, ip, hostname, first_seen, last_seen in rows:
+                if mac in self.entries:
+                    continue
+                entry = InventoryEntry(mac, ip, hostname or "Unknown",
+                                       first_seen=first_seen, last_seen=last_seen)
+                entry.present = False
+                self.entries[mac] = entry
+        tracer.info("loaded", devices=len(rows))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, mac):
+        return self.entries.get(mac.lower())
+
+    def hostname(self, ip):
+        """
+        Last known hostname at `ip`, or None.
+        """
+        with self._lock:
+            entry = self._by_ip.get(ip)
+            if entry is None or entry.hostname in _UNNAMED:
+                return None
+            return entry.hostname
+
+    def present(self, network=None):
+        """
+        Devices currently present, optionally only those inside `network`.
+        """
+        network = ipaddress.IPv4Network(network) if network is not None else None
+        with self._lock:
+            return [e.as_device() for e in self.entries.values()
+                    if e.present and (network is None or ipaddress.IPv4Address(e.ip) in network)]
+
+    def stale_ips(self, network, now=None):
+        """
+        IPs of present devices in `network` that have not answered a probe
+        for stale_after seconds.
+        """
+        now = now or time.time()
+        network = ipaddress.IPv4Network(network)
+        with self._lock:
+            return [e.ip for e in self.entries.values()
+                    if e.present and now - e.last_verified >= self.stale_after
+                    and ipaddress.IPv4Address(e.ip) in network]
+
+    def last_sweep(self, network):
+        """
+        Time of the last full sweep of `network`, or None.
+        """
+        return self._swept.get(str(ipaddress.IPv4Network(network)))
+
+    def mark_swept(self, network, now=None):
+        self._swept[str(ipaddress.IPv4Network(network))] = now or time.time()
+
+    def update(self, seen, probed=(), now=None, verified=True):
+        """
+        Records the Devices in `seen`; `verified` says they answered a probe
+        rather than came from the neighbor table. Present devices not seen
+        whose IP is in `probed` (IPs or an IPv4Network) are marked gone.
+        Returns the events as [(kind, Device)].
+        """
+        now = now or time.time()
+        if isinstance(probed, ipaddress.IPv4Network):
+            network = probed
+            was_probed = lambda ip: ipaddress.IPv4Address(ip) in network
+        else:
+            was_probed = set(probed).__contains__
+        events = []
+        seen_macs = set()
+        with self._lock:
+            for device in seen:
+                mac = device.mac.lower()
+                seen_macs.add(mac)
+                entry = self.entries.get(mac)
+                if entry is None:
+                    entry = self.entries[mac] = InventoryEntry(mac, device.ip,
+                                                               device.hostname or "Unknown",
+                                                               device.type, now, now)
+                    if not verified:
+                        # Due for a probe on the next scan
+                        entry.last_verified = 0
+                    for hint in self._hints.pop(device.ip, ()):
+                        entry.apply(hint)
+                    events.append(('joined', entry))
+                else:
+                    if not entry.present:
+                        entry.present = True
+                        events.append(('joined', entry))
+                    elif entry.ip != device.ip:
+                        events.append(('moved', entry))
+                    if entry.ip != device.ip:
+                        entry.ip = device.ip
+                        if device.ip in entry.ips:
+                            entry.ips.remove(device.ip)
+                        entry.ips.append(device.ip)
+                        del entry.ips[:-MAX_IPS]
+                    entry.last_seen = now
+                    if verified:
+                        entry.last_verified = now
+                    entry.type = device.type
+                    if device.hostname not in _UNNAMED:
+                        entry.hostname = device.hostname
+                # Whoever held this IP before has moved on
+                previous = self._by_ip.get(device.ip)
+                if previous is not None and previous is not entry and previous.mac not in seen_macs \
+                        and previous.present and previous.ip == device.ip:
+                    previous.present = False
+                    events.append(('left', previous))
+                self._by_ip[device.ip] = entry
+
+            for entry in self.entries.values():
+                if entry.present and entry.mac not in seen_macs and was_probed(entry.ip):
+                    entry.present = False
+                    events.append(('left', entry))
+
+        for kind, entry in events:
+            tracer.info(kind, mac=entry.mac, ip=entry.ip)
+        return [(kind, entry.as_device()) for kind, entry in events]
+
+    def observe(self, announcements, now=None):
+        """
+        Merges passive discovery Announcements. Returns (the Devices whose
+        record changed, the events from devices first heard through ARP).
+        """
+        now = now or time.time()
+        sightings = {a.ip: Device(a.ip, a.mac) for a in announcements if a.mac}
+        events = self.update(sightings.values(), now=now) if sightings else []
+        changed = {}
+        with self._lock:
+            for announcement in announcements:
+                if announcement.mac:
+                    continue
+                entry = self._by_ip.get(announcement.ip)
+                if entry is None:
+                    hints = self._hints.setdefault(announcement.ip, [])
+                    if len(hints) < 8:
+                        hints.append(announcement)
+                    if len(self._hints) > MAX_HINTS:
+                        del self._hints[next(iter(self._hints))]
+                    continue
+                if entry.apply(announcement):
+                    changed[entry.mac] = entry
+            devices = [entry.as_device() for entry in changed.values()]
+        seen = {device.mac for device in devices}
+        devices += [device for kind, device in events if kind != 'left' and device.mac not in seen]
+        return devices, events
+
+    def enrich(self, device):
+        """
+        Fills in a scanned Device's hostname, model and services from what
+        is already known about it, so only unknown hosts get resolved.
+        """
+        with self._lock:
+            entry = self.entries.get(device.mac.lower()) or self._by_ip.get(device.ip)
+            if entry is None:
+                # Not recorded yet; announcements may have arrived first
+                hints = self._hints.get(device.ip, ())
+                hostname = next((h.hostname for h in hints if h.hostname), '')
+                model = next((h.model for h in reversed(hints) if h.model), '')
+                services = {service for h in hints for service in h.services}
+            else:
+                hostname, model, services = entry.hostname, entry.model, entry.services
+            if device.hostname in _UNNAMED and hostname not in _UNNAMED:
+                device.hostname = hostname
+            device.model = device.model or model
+            if services:
+                device.services = tuple(sorted(services.union(device.services)))
+        return device
+
+    def set_hostname(self, device):
+        """
+        Stores a hostname resolved after the device was recorded.
+        """
+        with self._lock:
+            entry = self.entries.get(device.mac.lower())
+            if entry is not None and device.hostname not in _UNNAMED:
+                entry.hostname = device.hostname
+
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory():
+    """
+    The process-wide inventory, seeded from the history store if one is
+    open the first time this is called.
+    """
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None:
+            _inventory = DeviceInventory()
+            store = history.get_store()
+            if store is not None:
+                try:
+                    _inventory.load(store)
+                except Exception as e:
+                    tracer.error("load_failed", error=repr(e))
+        return _inventory
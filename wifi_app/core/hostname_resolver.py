@@ -0,0 +1,238 @@
+import asyncio
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from utils.discovery_parser import read_dns_name
+from utils.trace import get_tracer
+
+# Long-lived hostname resolver shared by every network scan.
+#
+# Lookups run on a private asyncio loop in a daemon thread, at most
+# `concurrency` at a time, each source bounded by `timeout`. Results, names
+# and failures alike, are kept in an LRU cache with separate TTLs, so a
+# rescan only looks up hosts it hasn't seen recently. A lookup tries each
+# source in turn: reverse DNS (PTR), then NetBIOS node status, then a
+# unicast mDNS PTR query.
+
+tracer = get_tracer('hostname_resolver')
+
+UNKNOWN = "Unknown"
+
+
+class _DatagramQuery(asyncio.DatagramProtocol):
+    def __init__(self, payload, reply):
+        self.payload = payload
+        self.reply = reply
+
+    def connection_made(self, transport):
+        transport.sendto(self.payload)
+
+    def datagram_received(self, data, addr):
+        if not self.reply.done():
+            self.reply.set_result(data)
+
+    def error_received(self, exc):
+        if not self.reply.done():
+            self.reply.set_exception(exc)
+
+
+async def _udp_query(ip, port, payload):
+    loop = asyncio.get_running_loop()
+    reply = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _DatagramQuery(payload, reply), remote_addr=(ip, port))
+    try:
+        return await reply
+    finally:
+        transport.close()
+
+
+async def reverse_dns(ip):
+    loop = asyncio.get_running_loop()
+    try:
+        name = (await loop.run_in_executor(None, socket.gethostbyaddr, ip))[0]
+    except OSError:
+        return None
+    # Some resolvers echo the address back instead of failing
+    return None if name == ip else name
+
+
+# NBSTAT query for the wildcard name "*"
+_NBSTAT_QUERY = (struct.pack(">HHHHHH", 0x5057, 0, 1, 0, 0, 0)
+                 + b"\x20" + b"CK" + b"AA" * 15 + b"\x00"
+                 + struct.pack(">HH", 0x21, 1))
+
+
+async def netbios_name(ip):
+    data = await _udp_query(ip, 137, _NBSTAT_QUERY)
+    # Header (12), echoed name (34), type/class/ttl/rdlength (10), count (1)
+    if len(data) < 57:
+        return None
+    for i in range(data[56]):
+        entry = data[57 + 18 * i:57 + 18 * (i + 1)]
+        if len(entry) < 18:
+            break
+        name, suffix, flags = entry[:15], entry[15], struct.unpack(">H", entry[16:18])[0]
+        # Workstation service name, unique (not a group name)
+        if suffix == 0x00 and not flags & 0x8000:
+            return name.decode('ascii', 'replace').strip() or None
+    return None
+
+
+async def mdns_name(ip):
+    labels = ip.split(".")[::-1] + ["in-addr", "arpa"]
+    qname = b"".join(bytes([len(label)]) + label.encode() for label in labels) + b"\x00"
+    query = struct.pack(">HHHHHH", 0, 0, 1, 0, 0, 0) + qname + struct.pack(">HH", 12, 1)
+    data = await _udp_query(ip, 5353, query)
+    questions, answers = struct.unpack(">HH", data[4:8])
+    offset = 12
+    for _ in range(questions):
+        offset = read_dns_name(data, offset)[1] + 4
+    for _ in range(answers):
+        offset = read_dns_name(data, offset)[1]
+        rtype, _, _, length = struct.unpack(">HHIH", data[offset:offset + 10])
+        offset += 10
+        if rtype == 12:
+            name = read_dns_name(data, offset)[0]
+            return name[:-len(".local")] if name.endswith(".local") else name
+        offset += length
+    return None
+
+
+DEFAULT_SOURCES = (reverse_dns, netbios_name, mdns_name)
+
+
+class HostnameResolver:
+    """
+    Resolves IP addresses to hostnames through `sources`, async callables
+    returning a name or None. Thread-safe; resolve() can be called from any
+    thread and returns a concurrent.futures.Future.
+    """
+    def __init__(self, sources=DEFAULT_SOURCES, concurrency=32, timeout=1.0,
+                 ttl=3600, negative_ttl=300, max_entries=4096):
+        self.sources = tuple(sources)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._semaphore = None
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                # gethostbyaddr can't be cancelled, so abandoned lookups keep
+                # a thread busy; a wider pool keeps them from starving new ones.
+                loop.set_default_executor(ThreadPoolExecutor(
+                    max_workers=self.concurrency * 2, thread_name_prefix="resolver"))
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+                threading.Thread(target=loop.run_forever, name="hostname-resolver",
+                                 daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def cached(self, ip):
+        """
+        Returns the cached hostname (UNKNOWN for a cached failure), or None
+        when there is no live entry.
+        """
+        with self._lock:
+            entry = self._cache.get(ip)
+            if entry is None:
+                return None
+            name, expires = entry
+            if expires < time.monotonic():
+                del self._cache[ip]
+                return None
+            self._cache.move_to_end(ip)
+            return name
+
+    def _store(self, ip, name):
+        ttl = self.negative_ttl if name == UNKNOWN else self.ttl
+        with self._lock:
+            self._cache[ip] = (name, time.monotonic() + ttl)
+            self._cache.move_to_end(ip)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            self._in_flight.pop(ip, None)
+
+    def resolve(self, ip):
+        """
+        Returns a Future for the hostname of `ip` (UNKNOWN if no source
+        knows it). Concurrent requests for the same address share a lookup.
+        """
+        name = self.cached(ip)
+        if name is not None:
+            future = Future()
+            future.set_result(name)
+            return future
+        loop = self._ensure_loop()
+        with self._lock:
+            future = self._in_flight.get(ip)
+            if future is None:
+                future = asyncio.run_coroutine_threadsafe(self._lookup(ip), loop)
+                self._in_flight[ip] = future
+        return future
+
+    async def _lookup(self, ip):
+        name = None
+        async with self._semaphore:
+            for source in self.sources:
+                try:
+                    name = await asyncio.wait_for(source(ip), self.timeout)
+                except asyncio.TimeoutError:
+                    tracer.debug("lookup_timeout", ip=ip, source=source.__name__)
+                except Exception as e:
+                    tracer.debug("lookup_failed", ip=ip, source=source.__name__, error=repr(e))
+                if name:
+                    break
+        name = name or UNKNOWN
+        self._store(ip, name)
+        return name
+
+    def resolve_devices(self, devices, on_resolved=None):
+        """
+        Fills in `hostname` on each Device as its lookup completes, calling
+        on_resolved(device) for each one, and returns when all are done.
+        """
+        futures = []
+        for device in devices:
+            future = self.resolve(device.ip)
+            future.add_done_callback(lambda f, d=device: self._fill(d, f, on_resolved))
+            futures.append(future)
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _fill(device, future, on_resolved):
+        try:
+            device.hostname = future.result()
+        except Exception:
+            device.hostname = UNKNOWN
+        if on_resolved is not None:
+            on_resolved(device)
+
+
+_resolver = None
+
+
+def get_resolver():
+    """
+    The process-wide resolver, so its cache outlives individual scans.
+    """
+    global _resolver
+    if _resolver is None:
+        _resolver = HostnameResolver()
+    return _resolver
@@ -0,0 +1,104 @@
+import ipaddress
+import socket
+
+from core.arp_sweep import MIN_PREFIX
+from utils.trace import get_tracer
+
+# Local IPv4 interfaces worth sweeping.
+#
+# Every interface that is up and has an IPv4 address with a broadcast
+# domain is listed with its real prefix, from psutil: loopback, interfaces
+# without ARP (ifb, tun/wireguard and other point-to-point links) and /31
+# and /32 addresses are left out. Nothing here depends on a default route,
+# so isolated networks are found the same way as routed ones. Without
+# psutil the only interface found is the one holding the default route.
+
+tracer = get_tracer('interfaces')
+
+
+class Interface:
+    """
+    One IPv4 address on a local interface. `network` is the interface's
+    own prefix; sweep_network() is what an ARP sweep covers.
+    """
+    __slots__ = ('name', 'ip', 'network', 'mac', 'speed')
+
+    def __init__(self, name, ip, network, mac='', speed=0):
+        self.name = name
+        self.ip = ip
+        self.network = network
+        self.mac = mac
+        # Link speed in Mb/s, 0 when unknown
+        self.speed = speed
+
+    def sweep_network(self, min_prefix=MIN_PREFIX):
+        """
+        The network to sweep: `network`, narrowed around the interface's
+        address when it is wider than /min_prefix.
+        """
+        if self.network.prefixlen >= min_prefix:
+            return self.network
+        return ipaddress.IPv4Network(f"{self.ip}/{min_prefix}", strict=False)
+
+    def as_dict(self):
+        return {'name': self.name, 'ip': self.ip, 'network': str(self.network), 'mac': self.mac,
+                'speed': self.speed}
+
+    def __repr__(self):
+        return f"Interface({self.name!r}, ip={self.ip!r}, network={str(self.network)!r})"
+
+
+def default_route_ip():
+    """
+    Source address of the default route, or None when there is none.
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            # UDP connect() sends nothing, it only picks a route
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return None
+
+
+def list_interfaces(names=None):
+    """
+    The sweepable Interfaces, optionally only those named in `names`.
+    The one holding the default route, if any, comes first.
+    """
+    try:
+        import psutil
+        addresses = psutil.net_if_addrs()
+        stats = psutil.net_if_stats()
+    except Exception as e:
+        tracer.warning("psutil_unavailable", error=repr(e))
+        ip = default_route_ip()
+        if ip is None or (names and "default" not in names):
+            return []
+        return [Interface("default", ip, ipaddress.IPv4Network(f"{ip}/24", strict=False))]
+
+    link_family = getattr(psutil, 'AF_LINK', None)
+    interfaces = []
+    for name, addrs in addresses.items():
+        if names and name not in names:
+            continue
+        stat = stats.get(name)
+        if stat is None or not stat.isup:
+            continue
+        flags = getattr(stat, 'flags', '')
+        if 'loopback' in flags or 'noarp' in flags or 'pointopoint' in flags:
+            continue
+        mac = next((a.address.lower().replace('-', ':') for a in addrs
+                    if a.family == link_family and a.address), '')
+        for addr in addrs:
+            if addr.family != socket.AF_INET or not addr.netmask or addr.ptp:
+                continue
+            network = ipaddress.IPv4Network(f"{addr.address}/{addr.netmask}", strict=False)
+            if network.is_loopback or network.prefixlen > 30:
+                continue
+            interfaces.append(Interface(name, addr.address, network, mac, stat.speed))
+
+    default = default_route_ip()
+    interfaces.sort(key=lambda i: i.ip != default)
+    tracer.info("interfaces", found=[f"{i.name}:{i.network}" for i in interfaces])
+    return interfaces
@@ -0,0 +1,342 @@
+import asyncio
+import os
+import socket
+import struct
+import time
+from collections import deque
+
+from core.streams import stream
+from utils import history
+from utils.trace import get_tracer
+
+# Multi-target latency probing from a single event loop.
+#
+# Every target gets a probe every `interval` seconds (sub-second intervals
+# are fine); each probe carries a per-target sequence number, so a reply
+# that never arrives within `timeout` is counted as lost rather than
+# silently skipped. Probes go out as ICMP echo requests when the process
+# may open an ICMP socket (raw, or Linux's unprivileged datagram flavour)
+# and otherwise fall back to timing a TCP connect or a UDP round trip to
+# a closed port (the ICMP port-unreachable that comes back is the reply).
+
+tracer = get_tracer('latency_engine')
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def open_icmp_socket():
+    """
+    Returns (socket, is_raw) for the first ICMP socket type the OS allows,
+    or (None, False).
+    """
+    for kind in (socket.SOCK_RAW, socket.SOCK_DGRAM):
+        try:
+            sock = socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP)
+        except OSError:
+            continue
+        sock.setblocking(False)
+        return sock, kind == socket.SOCK_RAW
+    return None, False
+
+
+class IcmpProber:
+    """
+    ICMP echo over one shared socket; replies are matched on (address, seq).
+    """
+    name = 'icmp'
+
+    def __init__(self, sock, is_raw):
+        self.sock = sock
+        self.is_raw = is_raw
+        # Datagram ICMP sockets get their identifier rewritten by the kernel
+        self.ident = os.getpid() & 0xFFFF
+        self.waiting = {}
+
+    def start(self, loop):
+        loop.add_reader(self.sock.fileno(), self._on_readable)
+
+    def close(self, loop):
+        loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+
+    def _on_readable(self):
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            received = time.perf_counter()
+            if self.is_raw:
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            kind, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+            if kind != ICMP_ECHO_REPLY or (self.is_raw and ident != self.ident):
+                continue
+            future = self.waiting.pop((addr[0], seq), None)
+            if future is not None and not future.done():
+                future.set_result(received)
+
+    async def probe(self, ip, seq):
+        loop = asyncio.get_running_loop()
+        header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, self.ident, seq)
+        payload = b"pywifiman-latency"
+        packet = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0,
+                             _checksum(header + payload), self.ident, seq) + payload
+        future = loop.create_future()
+        self.waiting[(ip, seq)] = future
+        try:
+            sent = time.perf_counter()
+            self.sock.sendto(packet, (ip, 0))
+            received = await future
+            return (received - sent) * 1000
+        finally:
+            self.waiting.pop((ip, seq), None)
+
+
+class TcpProber:
+    """
+    Times a TCP handshake; a refused connection (RST) is still a reply.
+    """
+    name = 'tcp'
+
+    def __init__(self, port=443):
+        self.port = port
+
+    def start(self, loop):
+        pass
+
+    def close(self, loop):
+        pass
+
+    async def probe(self, ip, seq):
+        sent = time.perf_counter()
+        try:
+            _, writer = await asyncio.open_connection(ip, self.port)
+        except ConnectionRefusedError:
+            return (time.perf_counter() - sent) * 1000
+        rtt = (time.perf_counter() - sent) * 1000
+        writer.close()
+        return rtt
+
+
+class _UdpReply(asyncio.DatagramProtocol):
+    def __init__(self, future):
+        self.future = future
+
+    def _done(self):
+        if not self.future.done():
+            self.future.set_result(time.perf_counter())
+
+    def datagram_received(self, data, addr):
+        self._done()
+
+    def error_received(self, exc):
+        # ICMP port unreachable surfaces as ECONNREFUSED on a connected socket
+        self._done()
+
+
+class UdpProber:
+    """
+    Times a datagram to a (normally closed) high port until either an
+    answer or the ICMP port-unreachable comes back.
+    """
+    name = 'udp'
+
+    def __init__(self, port=33434):
+        self.port = port
+
+    def start(self, loop):
+        pass
+
+    def close(self, loop):
+        pass
+
+    async def probe(self, ip, seq):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpReply(future), remote_addr=(ip, self.port))
+        try:
+            sent = time.perf_counter()
+            transport.sendto(struct.pack("!H", seq))
+            received = await future
+            return (received - sent) * 1000
+        finally:
+            transport.close()
+
+
+def make_prober(method='auto', port=None):
+    """
+    'icmp', 'tcp', 'udp', or 'auto' (ICMP if a socket can be opened,
+    else TCP).
+    """
+    if method in ('auto', 'icmp'):
+        sock, is_raw = open_icmp_socket()
+        if sock is not None:
+            return IcmpProber(sock, is_raw)
+        if method == 'icmp':
+            raise PermissionError("ICMP sockets are not available to this process")
+        tracer.info("icmp_unavailable", fallback='tcp')
+    if method == 'udp':
+        return UdpProber(port or 33434)
+    return TcpProber(port or 443)
+
+
+class TargetStats:
+    """
+    Running per-target figures: last RTT, RFC 3550 jitter and loss over the
+    last `window` sequence numbers.
+    """
+    __slots__ = ('target', 'sent', 'received', 'lost', 'last_rtt', 'jitter', 'recent')
+
+    def __init__(self, target, window=100):
+        self.target = target
+        self.sent = 0
+        self.received = 0
+        self.lost = 0
+        self.last_rtt = None
+        self.jitter = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, rtt):
+        self.sent += 1
+        if rtt is None:
+            self.lost += 1
+            self.recent.append(False)
+            return
+        self.received += 1
+        if self.last_rtt is not None:
+            self.jitter += (abs(rtt - self.last_rtt) - self.jitter) / 16
+        self.last_rtt = rtt
+        self.recent.append(True)
+
+    @property
+    def loss_percent(self):
+        if not self.recent:
+            return 0.0
+        return 100.0 * self.recent.count(False) / len(self.recent)
+
+
+class LatencyEngine:
+    """
+    Probes every target every `interval` seconds. on_sample(target, seq,
+    rtt_ms, stats) is called on the engine's loop for each probe, with
+    rtt_ms None for a lost one.
+    """
+    def __init__(self, targets, interval=1.0, timeout=1.0, method='auto', port=None,
+                 on_sample=None):
+        self.targets = list(targets)
+        self.interval = interval
+        self.timeout = timeout
+        self.method = method
+        self.port = port
+        self.on_sample = on_sample
+        self.stats = {target: TargetStats(target) for target in self.targets}
+        self.prober = None
+        self._loop = None
+        self._stop = None
+        self._stopping = False
+
+    def run(self, duration=None, on_sample=None):
+        """
+        Blocks until stop() is called from another thread, or for
+        `duration` seconds. `on_sample` replaces the constructor's callback.
+        """
+        if on_sample is not None:
+            self.on_sample = on_sample
+        # Selector loop on every platform: the ICMP prober needs add_reader
+        loop = asyncio.SelectorEventLoop()
+        try:
+            loop.run_until_complete(self._main(duration))
+        finally:
+            loop.close()
+
+    def stream(self, duration=None):
+        """
+        Async iterator of (target, seq, rtt_ms, stats) samples.
+        """
+        def run(on_result):
+            self.run(duration, on_sample=lambda *sample: on_result(sample))
+        return stream(run, stop=self.stop)
+
+    def stop(self):
+        self._stopping = True
+        loop, stop = self._loop, self._stop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(stop.set)
+
+    async def _main(self, duration):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if self._stopping:
+            return
+        self.prober = make_prober(self.method, self.port)
+        self.prober.start(self._loop)
+        tracer.info("engine_start", method=self.prober.name, targets=len(self.targets),
+                    interval=self.interval)
+        tasks = [asyncio.ensure_future(self._probe_loop(target, i))
+                 for i, target in enumerate(self.targets)]
+        try:
+            if duration is None:
+                await self._stop.wait()
+            else:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), duration)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.prober.close(self._loop)
+
+    async def _probe_loop(self, target, index):
+        loop = self._loop
+        # Spread targets across the interval instead of probing in bursts
+        next_at = loop.time() + self.interval * index / max(len(self.targets), 1)
+        seq = 0
+        pending = set()
+        try:
+            while True:
+                delay = next_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                task = asyncio.ensure_future(self._probe(target, seq))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                seq = (seq + 1) & 0xFFFF
+                next_at += self.interval
+                # Fell behind (e.g. loop stalled): skip missed slots rather than bursting
+                if next_at < loop.time():
+                    next_at = loop.time() + self.interval
+        finally:
+            in_flight = list(pending)
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _probe(self, target, seq):
+        try:
+            rtt = await asyncio.wait_for(self.prober.probe(target, seq), self.timeout)
+        except (asyncio.TimeoutError, OSError):
+            rtt = None
+        stats = self.stats[target]
+        stats.record(rtt)
+        store = history.get_store()
+        if store is not None:
+            store.record_ping(target, rtt)
+        if self.on_sample is not None:
+            self.on_sample(target, seq, rtt, stats)
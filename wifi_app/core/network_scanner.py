@@ -0,0 +1,325 @@
+import ipaddress
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.arp_sweep import ArpSweep
+from core.device_inventory import get_inventory
+from core.hostname_resolver import get_resolver
+from core.interfaces import list_interfaces
+from core.streams import stream
+from utils import history, oui
+from utils.records import Device
+from utils.trace import get_tracer
+
+tracer = get_tracer('network_scanner')
+
+# Linux neighbor table, and its "complete entry" flag
+ARP_TABLE = '/proc/net/arp'
+ATF_COM = 0x2
+
+class ScapyArpTransport:
+    """
+    ArpSweep transport over a raw scapy layer-2 socket.
+    """
+    def __init__(self, iface=None):
+        # Imported here: scapy takes about a second to import
+        from scapy.all import ARP, Ether, conf
+        self._arp = ARP
+        self._ether = Ether
+        iface = iface or conf.iface
+        try:
+            self.socket = conf.L2socket(iface=iface, filter="arp")
+        except Exception:
+            # No BPF compiler (libpcap missing): recv() filters ARP itself
+            self.socket = conf.L2socket(iface=iface)
+
+    def send(self, ips):
+        for ip in ips:
+            self.socket.send(self._ether(dst="ff:ff:ff:ff:ff:ff")/self._arp(pdst=ip))
+
+    def recv(self, timeout):
+        if not self.socket.select([self.socket], timeout):
+            return None
+        packet = self.socket.recv()
+        ARP = self._arp
+        if packet is None or ARP not in packet or packet[ARP].op != 2:
+            return None
+        return packet[ARP].psrc, packet[ARP].hwsrc
+
+    def close(self):
+        self.socket.close()
+
+class NetworkScanner:
+    """
+    Finds the hosts on the local networks and keeps the device inventory up
+    to date. Every interface that is up is scanned (or only those named in
+    `interfaces`), each on its own thread, and the results are merged by
+    MAC; several interfaces on the same network are scanned once.
+
+    The first scan of a subnet, and one every `full_interval` seconds after,
+    is a full ARP sweep (falling back to the OS ARP table). Scans in between
+    are delta scans: the OS neighbor table is read first and only inventory
+    entries gone stale are probed again.
+
+    `transport(iface)` builds the ArpSweep transport for an interface name;
+    the default is a scapy socket on that interface.
+    """
+    def __init__(self, transport=None, inventory=None, full_interval=600, interfaces=None):
+        self.transport = transport or ScapyArpTransport
+        self.inventory = inventory
+        self.full_interval = full_interval
+        self.interfaces = interfaces
+        # Per-interface results of the last scan(), in completion order
+        self.timings = []
+        self._cancel = threading.Event()
+
+    def list_interfaces(self):
+        return list_interfaces(self.interfaces)
+
+    def get_local_ip(self):
+        """
+        Address of the first interface scan() covers, 127.0.0.1 if none.
+        """
+        found = self.list_interfaces()
+        return found[0].ip if found else "127.0.0.1"
+
+    def scan(self, on_device=None, on_event=None, full=False, on_interface=None):
+        """
+        Returns the Devices present after the scan. `on_device` is called
+        with each Device as soon as it answers, and again once its hostname
+        is known. `on_event(kind, device)` gets the inventory's joined /
+        moved / left events. `full` forces full sweeps. `on_interface`
+        gets each interface's timing dict as soon as that interface is done,
+        so a slow network does not hold up reporting the others.
+        """
+        # Interfaces sharing a network (Wi-Fi and Ethernet on one LAN) are swept once
+        targets = {}
+        for interface in self.list_interfaces():
+            targets.setdefault(interface.sweep_network(), interface)
+        tracer.info("scan", targets=[f"{i.name}:{subnet}" for subnet, i in targets.items()])
+        self.timings = []
+        self._cancel.clear()
+        if not targets:
+            return []
+
+        def scan_one(subnet, interface):
+            start = time.perf_counter()
+            mode = 'full' if self._needs_full(subnet, full) else 'delta'
+            try:
+                present = self.scan_subnet(subnet, on_device, on_event, full, iface=interface.name)
+                error = None
+            except Exception as e:
+                print(f"Scan error on {interface.name}: {e}", file=sys.stderr)
+                tracer.error("interface_failed", interface=interface.name, error=repr(e))
+                present, error = [], repr(e)
+            timing = {'interface': interface.name, 'network': str(subnet), 'mode': mode,
+                      'devices': len(present), 'elapsed_s': time.perf_counter() - start,
+                      'error': error}
+            self.timings.append(timing)
+            tracer.info("interface_scanned", **timing)
+            if on_interface is not None:
+                on_interface(timing)
+            return present
+
+        if len(targets) == 1:
+            results = [scan_one(*next(iter(targets.items())))]
+        else:
+            with ThreadPoolExecutor(len(targets), thread_name_prefix='scan') as pool:
+                futures = [pool.submit(scan_one, subnet, interface)
+                           for subnet, interface in targets.items()]
+                results = [future.result() for future in as_completed(futures)]
+
+        merged = {}
+        for present in results:
+            for device in present:
+                merged.setdefault(device.mac.lower(), device)
+        return list(merged.values())
+
+    def cancel(self):
+        """
+        Ends a running scan() early, from any thread. Sweeps stop sending and
+        stop waiting for replies, and devices that did not get to answer are
+        not reported as gone.
+        """
+        self._cancel.set()
+
+    def _needs_full(self, subnet, full=False):
+        inventory = self.inventory if self.inventory is not None else get_inventory()
+        last_sweep = inventory.last_sweep(subnet)
+        return full or last_sweep is None or time.time() - last_sweep >= self.full_interval
+
+    def scan_subnet(self, subnet, on_device=None, on_event=None, full=False, iface=None):
+        """
+        scan() for a given subnet, sweeping it through interface `iface`
+        (the default interface when None).
+        """
+        inventory = self.inventory if self.inventory is not None else get_inventory()
+        resolver = get_resolver()
+        full = self._needs_full(subnet, full)
+        tracer.info("scan_subnet", subnet=str(subnet), iface=iface, full=full)
+
+        def found(device):
+            device.vendor = sys.intern(oui.vendor(device.mac))
+            # Hostname, model and services already known, e.g. announced
+            inventory.enrich(device)
+            if device.hostname in ('', "Unknown"):
+                # Start the hostname lookup while the sweep is still running
+                resolver.resolve(device.ip)
+            if on_device is not None:
+                on_device(device)
+
+        if full:
+            devices, events = self._full_scan(subnet, found, inventory, iface)
+        else:
+            devices, events = self._delta_scan(subnet, found, inventory, iface)
+        if on_event is not None:
+            for kind, device in events:
+                on_event(kind, device)
+
+        # Resolve hostnames of devices the inventory had no name for
+        unnamed = [] if self._cancel.is_set() else \
+            [d for d in devices if d.hostname in ('', "Unknown")]
+
+        def resolved(device):
+            inventory.set_hostname(device)
+            if on_device is not None:
+                on_device(device)
+
+        self.resolve_hostnames(unnamed, resolved)
+
+        store = history.get_store()
+        if store is not None and devices:
+            store.record_devices(devices)
+        return inventory.present(subnet)
+
+    def _full_scan(self, subnet, found, inventory, iface=None):
+        devices = []
+        probed = ()
+        try:
+            # Try Scapy first
+            tracer.debug("scapy_start")
+            transport = self.transport(iface)
+            try:
+                devices = ArpSweep(transport).sweep(subnet, found, stop=self._cancel)
+            finally:
+                transport.close()
+            tracer.info("scapy_answered", count=len(devices))
+            if self._cancel.is_set():
+                return devices, inventory.update(devices)
+            # Only a completed sweep says anything about who is gone
+            probed = subnet
+            inventory.mark_swept(subnet)
+        except Exception as e:
+            print(f"Scapy scan error: {e}", file=sys.stderr)
+            tracer.error("scapy_failed", error=repr(e))
+
+        # Fallback to arp -a if Scapy likely failed (0 results often means interface issue or permissions)
+        if not devices:
+            tracer.info("arp_fallback")
+            # The OS table covers every interface; keep this subnet's entries
+            devices = [d for d in self.scan_arp_fallback()
+                       if ipaddress.IPv4Address(d.ip) in subnet]
+            for device in devices:
+                found(device)
+            return devices, inventory.update(devices, verified=False)
+        return devices, inventory.update(devices, probed)
+
+    def _delta_scan(self, subnet, found, inventory, iface=None):
+        neighbors = [d for d in self.read_neighbor_table()
+                     if ipaddress.IPv4Address(d.ip) in subnet]
+        for device in neighbors:
+            found(device)
+        events = inventory.update(neighbors, verified=False)
+
+        # Includes devices still in the neighbor table: the OS keeps entries
+        # for a while after a device has gone
+        stale = inventory.stale_ips(subnet)
+        answered = []
+        if stale:
+            try:
+                transport = self.transport(iface)
+                try:
+                    # A handful of addresses on the local link: replies
+                    # take milliseconds, no need to linger long
+                    answered = ArpSweep(transport, linger=0.3).sweep(subnet, found, hosts=stale,
+                                                                     stop=self._cancel)
+                finally:
+                    transport.close()
+            except Exception as e:
+                print(f"Scapy scan error: {e}", file=sys.stderr)
+                tracer.error("scapy_failed", error=repr(e))
+                stale = []
+        if self._cancel.is_set():
+            stale = []
+        events += inventory.update(answered, stale)
+        tracer.info("delta_scan", neighbors=len(neighbors), probed=len(stale),
+                    answered=len(answered))
+        devices = {d.mac.lower(): d for d in neighbors}
+        devices.update((d.mac.lower(), d) for d in answered)
+        return list(devices.values()), events
+
+    def read_neighbor_table(self):
+        """
+        Complete entries of the OS neighbor (ARP) table, as Devices.
+        """
+        if not os.path.exists(ARP_TABLE):
+            return self.scan_arp_fallback()
+        devices = []
+        try:
+            with open(ARP_TABLE) as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    # IP address, HW type, Flags, HW address, Mask, Device
+                    if len(fields) < 4 or not int(fields[2], 16) & ATF_COM:
+                        continue
+                    if fields[3] == "00:00:00:00:00:00":
+                        continue
+                    devices.append(Device(fields[0], fields[3]))
+        except (OSError, ValueError) as e:
+            print(f"Neighbor table error: {e}", file=sys.stderr)
+            tracer.error("neighbor_table_failed", error=repr(e))
+        return devices
+
+    # Former name, still used by older callers
+    scan_network_enhanced = scan
+
+    def stream(self):
+        """
+        Async iterator over the Devices of one scan, as they are reported.
+        """
+        return stream(self.scan, callback='on_device')
+
+    def scan_arp_fallback(self):
+        devices = []
+        try:
+            creation_flags = 0x08000000 if os.name == 'nt' else 0
+            result = subprocess.run(
+                ['arp', '-a'],
+                capture_output=True,
+                text=True,
+                encoding='cp850',
+                creationflags=creation_flags
+            )
+            for line in result.stdout.splitlines():
+                line = line.strip()
+                match = re.search(r'(\d+\.\d+\.\d+\.\d+)\s+([a-fA-F0-9-]{17})\s+(\w+)', line)
+                if match:
+                    devices.append(Device(match.group(1), match.group(2).replace('-', ':'),
+                                          type=match.group(3)))
+        except Exception as e:
+            print(f"ARP fallback error: {e}", file=sys.stderr)
+            tracer.error("arp_fallback_failed", error=repr(e))
+        return devices
+
+    def resolve_hostnames(self, devices, on_resolved=None):
+        """
+        Fills in hostnames through the shared resolver, calling
+        on_resolved(device) as each lookup finishes.
+        """
+        get_resolver().resolve_devices(devices, on_resolved)
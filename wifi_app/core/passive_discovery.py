@@ -0,0 +1,340 @@
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+from core.device_inventory import get_inventory
+from utils.discovery_parser import PARSERS, PORTS
+from utils.pcap import LINKTYPE_ETHERNET, LINKTYPE_LINUX_SLL, LINKTYPE_RAW, read_pcap
+from utils.trace import get_tracer
+
+# Passive device discovery: listens for what devices announce on their own
+# and merges it into the device inventory, without sending anything.
+#
+#   mDNS      224.0.0.251:5353     hostname, DNS-SD services, model (TXT)
+#   SSDP      239.255.255.250:1900 UPnP device/service types, server/model
+#   NetBIOS   broadcast 137/138    Windows/Samba hostnames
+#   ARP       every request/reply  IP <-> MAC, i.e. presence
+#
+# ARP comes from a packet socket bound to the ARP ethertype on Linux (the
+# kernel filters, nothing else is copied up) and otherwise from scapy's
+# sniffer, only when libpcap can compile the "arp" filter; sniffing every
+# packet unfiltered is exactly the CPU cost this avoids.
+#
+# The listener thread blocks in select() with no timeout while nothing is
+# queued, so an idle network costs no CPU. Packets are queued raw and
+# parsed in batches every `batch_interval` seconds; repeats within a batch
+# (devices announce everything several times in a row) are parsed once, and
+# the inventory is updated once per batch. Whatever cannot be bound (ports
+# in use, no privileges) is skipped and the rest keeps working.
+
+tracer = get_tracer('passive_discovery')
+
+MDNS_GROUP = '224.0.0.251'
+SSDP_GROUP = '239.255.255.250'
+ETH_P_ARP = 0x0806
+ETH_P_IP = 0x0800
+
+
+def decode_frame(frame, linktype=LINKTYPE_ETHERNET):
+    """
+    (kind, data, sender ip) for a captured frame carrying an announcement,
+    or None.
+    """
+    if linktype == LINKTYPE_ETHERNET:
+        ethertype = struct.unpack('>H', frame[12:14])[0]
+        offset = 14
+        if ethertype == 0x8100:
+            ethertype = struct.unpack('>H', frame[16:18])[0]
+            offset = 18
+    elif linktype == LINKTYPE_LINUX_SLL:
+        ethertype = struct.unpack('>H', frame[14:16])[0]
+        offset = 16
+    elif linktype == LINKTYPE_RAW:
+        ethertype = ETH_P_IP
+        offset = 0
+    else:
+        return None
+
+    if ethertype == ETH_P_ARP:
+        arp = frame[offset:offset + 28]
+        if len(arp) < 28:
+            return None
+        mac = ":".join(f"{b:02x}" for b in arp[8:14])
+        ip = socket.inet_ntoa(arp[14:18])
+        return 'arp', (ip, mac), ip
+    if ethertype != ETH_P_IP or frame[offset + 9] != socket.IPPROTO_UDP:
+        return None
+    header = (frame[offset] & 0x0F) * 4
+    ip = socket.inet_ntoa(frame[offset + 12:offset + 16])
+    udp = offset + header
+    source_port, dest_port = struct.unpack('>HH', frame[udp:udp + 4])
+    kind = PORTS.get(dest_port) or PORTS.get(source_port)
+    if kind is None:
+        return None
+    return kind, bytes(frame[udp + 8:]), ip
+
+
+def _multicast_socket(group, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, 'SO_REUSEPORT'):
+        # Shares the port with avahi/mDNSResponder and other listeners
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(('', port))
+    if group is not None:
+        membership = struct.pack('4s4s', socket.inet_aton(group), socket.inet_aton('0.0.0.0'))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    sock.setblocking(False)
+    return sock
+
+
+class PassiveListener:
+    """
+    See the module comment. on_update(devices) gets the inventory Devices
+    a batch changed; on_event(kind, device) the joined/moved events from
+    devices first heard through ARP.
+    """
+    def __init__(self, inventory=None, batch_interval=0.5, arp=True, on_update=None,
+                 on_event=None):
+        self.inventory = inventory
+        self.batch_interval = batch_interval
+        self.arp = arp
+        self.on_update = on_update
+        self.on_event = on_event
+        self.stats = {'packets': 0, 'parsed': 0, 'duplicates': 0, 'errors': 0,
+                      'batches': 0, 'updates': 0}
+        self.listening = []
+        self._queue = deque()
+        self._stopped = threading.Event()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._sniffer = None
+
+    def feed(self, kind, data, ip):
+        """
+        Queues one packet for the next batch; safe from any thread.
+        """
+        self._queue.append((kind, data, ip))
+
+    def flush(self):
+        """
+        Parses the queued packets and merges them into the inventory;
+        returns the Devices that changed.
+        """
+        batch = []
+        queue = self._queue
+        while queue:
+            batch.append(queue.popleft())
+        if not batch:
+            return []
+        self.stats['packets'] += len(batch)
+        announcements = []
+        seen = set()
+        for packet in batch:
+            if packet in seen:
+                self.stats['duplicates'] += 1
+                continue
+            seen.add(packet)
+            kind, data, ip = packet
+            try:
+                announcement = PARSERS[kind](data, ip)
+            except (IndexError, ValueError, struct.error, UnicodeError) as e:
+                self.stats['errors'] += 1
+                tracer.debug("parse_failed", kind=kind, ip=ip, error=repr(e))
+                continue
+            self.stats['parsed'] += 1
+            if announcement is not None:
+                announcements.append(announcement)
+
+        inventory = self.inventory if self.inventory is not None else get_inventory()
+        updated, events = inventory.observe(announcements)
+        self.stats['batches'] += 1
+        self.stats['updates'] += len(updated)
+        if self.on_event is not None:
+            for kind, device in events:
+                self.on_event(kind, device)
+        if updated and self.on_update is not None:
+            self.on_update(updated)
+        return updated
+
+    def replay(self, path):
+        """
+        Feeds a pcap capture through the listener, batching on the
+        capture's own clock; returns the Devices that changed.
+        """
+        updated = {}
+        batch_end = None
+        for timestamp, linktype, frame in read_pcap(path):
+            try:
+                packet = decode_frame(frame, linktype)
+            except (IndexError, struct.error, OSError):
+                packet = None
+            if packet is None:
+                continue
+            if batch_end is None:
+                batch_end = timestamp + self.batch_interval
+            elif timestamp >= batch_end:
+                updated.update((d.mac, d) for d in self.flush())
+                batch_end = timestamp + self.batch_interval
+            self.feed(*packet)
+        updated.update((d.mac, d) for d in self.flush())
+        return list(updated.values())
+
+    def run(self, duration=None):
+        """
+        Listens until stop() is called, or for `duration` seconds.
+        """
+        selector = selectors.DefaultSelector()
+        sockets = self._open_sockets()
+        for sock, handler in sockets:
+            selector.register(sock, selectors.EVENT_READ, handler)
+        selector.register(self._wake_r, selectors.EVENT_READ, None)
+        if self.arp and not any(name == 'arp' for name in self.listening):
+            self._start_sniffer()
+        tracer.info("listening", sources=self.listening)
+
+        deadline = time.monotonic() + duration if duration is not None else None
+        next_flush = None
+        try:
+            while not self._stopped.is_set():
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                # Block indefinitely while there is nothing to flush
+                timeouts = [t - now for t in (next_flush, deadline) if t is not None]
+                if self._queue and next_flush is None:
+                    next_flush = now + self.batch_interval
+                    timeouts.append(self.batch_interval)
+                for key, _ in selector.select(max(0, min(timeouts)) if timeouts else None):
+                    if key.data is None:
+                        self._wake_r.recv(64)
+                    else:
+                        key.data(key.fileobj)
+                if self._queue and next_flush is None:
+                    next_flush = time.monotonic() + self.batch_interval
+                if next_flush is not None and time.monotonic() >= next_flush:
+                    next_flush = None
+                    self.flush()
+        finally:
+            if self._sniffer is not None:
+                try:
+                    self._sniffer.stop()
+                except Exception:
+                    pass
+            selector.close()
+            for sock, _ in sockets:
+                sock.close()
+            self.flush()
+            tracer.info("stopped", **self.stats)
+
+    def start(self):
+        """
+        Runs the listener on a daemon thread.
+        """
+        thread = threading.Thread(target=self.run, name='passive-discovery', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stopped.set()
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'x')
+        except OSError:
+            pass
+
+    def _open_sockets(self):
+        sockets = []
+        self.listening = []
+        for name, group, port in (('mdns', MDNS_GROUP, 5353), ('ssdp', SSDP_GROUP, 1900),
+                                  ('netbios-ns', None, 137), ('netbios-dgm', None, 138)):
+            try:
+                sock = _multicast_socket(group, port)
+            except OSError as e:
+                tracer.info("source_unavailable", source=name, error=repr(e))
+                continue
+            sockets.append((sock, self._udp_reader(name)))
+            self.listening.append(name)
+        if self.arp and hasattr(socket, 'AF_PACKET'):
+            try:
+                sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+                sock.setblocking(False)
+                sockets.append((sock, self._arp_reader))
+                self.listening.append('arp')
+            except OSError as e:
+                tracer.info("source_unavailable", source='arp', error=repr(e))
+        return sockets
+
+    def _udp_reader(self, kind):
+        def read(sock):
+            while True:
+                try:
+                    data, (ip, _) = sock.recvfrom(9000)
+                except (BlockingIOError, InterruptedError):
+                    return
+                except OSError:
+                    return
+                self._queue.append((kind, data, ip))
+        return read
+
+    def _arp_reader(self, sock):
+        while True:
+            try:
+                frame = sock.recv(128)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            packet = decode_frame(frame) if len(frame) >= 42 else None
+            if packet is not None:
+                self._queue.append(packet)
+
+    def _start_sniffer(self):
+        """
+        scapy's sniffer for ARP where there are no packet sockets, only if
+        libpcap can filter in the kernel.
+        """
+        try:
+            from scapy.all import ARP, AsyncSniffer, conf
+            if not conf.use_pcap:
+                tracer.info("source_unavailable", source='arp', error="libpcap not available")
+                return
+
+            def on_packet(packet):
+                if ARP in packet:
+                    arp = packet[ARP]
+                    self.feed('arp', (arp.psrc, arp.hwsrc), arp.psrc)
+                    # Wakes the select() so a flush gets scheduled
+                    self._wake()
+
+            self._sniffer = AsyncSniffer(filter='arp', store=False, prn=on_packet)
+            self._sniffer.start()
+            self.listening.append('arp')
+        except Exception as e:
+            tracer.error("sniffer_failed", error=repr(e))
+
+    def close(self):
+        self._wake_r.close()
+        self._wake_w.close()
+
+
+def main():
+    """
+    Replays a capture and prints what it reveals:
+    python -m core.passive_discovery capture.pcap
+    """
+    from core.device_inventory import DeviceInventory
+    listener = PassiveListener(DeviceInventory())
+    for device in listener.replay(sys.argv[1]):
+        print(device.ip, device.mac, device.hostname, device.model, ",".join(device.services),
+              sep="\t")
+    print(listener.stats, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+import asyncio
+import re
+import socket
+import struct
+import time
+
+from core.streams import stream
+from utils.trace import get_tracer
+
+# Concurrent TCP/UDP port scanning and service identification for the
+# devices NetworkScanner finds.
+#
+# Every probe runs on one event loop, from a pool of `concurrency` workers
+# (so that many sockets at most are open), and a per-host cap keeps one
+# device from being flooded. Jobs are ordered port by port across hosts so
+# the workers spread over the hosts instead of queueing on one.
+#
+# Each host's timeout adapts to its measured round-trip time the way TCP's
+# retransmission timer does (RFC 6298): every connect that is accepted or
+# refused is an RTT sample, and the timeout becomes srtt + 4 * rttvar,
+# clamped to [min_timeout, timeout]. Until the first sample the full
+# `timeout` applies. On a LAN that brings the wait on a filtered port down
+# from a second to the 250 ms floor, which is kept well above LAN round
+# trips so a host that answers late (Wi-Fi power save, a busy embedded
+# device) is not mistaken for a filtered one.
+#
+# Open TCP ports get a banner grab: server-first protocols (SSH, FTP,
+# SMTP...) are given banner_timeout to speak, web ports get an HTTP HEAD,
+# anything else a blank line, and the reply is matched against known
+# signatures. UDP ports are sent a payload their service answers (DNS, NTP,
+# NetBIOS, SNMP, SSDP, mDNS); an ICMP port unreachable marks them closed
+# and silence leaves them open|filtered, which is not reported.
+
+tracer = get_tracer('port_scanner')
+
+SERVICES = {
+    21: 'ftp', 22: 'ssh', 23: 'telnet', 25: 'smtp', 53: 'dns', 80: 'http', 110: 'pop3',
+    123: 'ntp', 137: 'netbios-ns', 139: 'netbios-ssn', 143: 'imap', 161: 'snmp', 443: 'https',
+    445: 'smb', 548: 'afp', 554: 'rtsp', 587: 'submission', 631: 'ipp', 993: 'imaps',
+    995: 'pop3s', 1883: 'mqtt', 1900: 'ssdp', 3306: 'mysql', 3389: 'rdp', 5000: 'upnp',
+    5353: 'mdns', 5900: 'vnc', 8008: 'http', 8009: 'ajp13', 8080: 'http-proxy',
+    8443: 'https-alt', 9100: 'jetdirect', 62078: 'iphone-sync',
+}
+
+PORT_SETS = {
+    'common': (21, 22, 23, 25, 53, 80, 110, 139, 143, 443, 445, 548, 554, 587, 631, 993, 995,
+               1883, 3306, 3389, 5000, 5900, 8008, 8009, 8080, 8443, 9100, 62078),
+    'web': (80, 443, 8000, 8008, 8080, 8443, 8888),
+    'well-known': tuple(range(1, 1025)),
+}
+
+# Ports whose server speaks first, ports that expect HTTP, and TLS ports
+# (no plaintext banner to grab)
+SERVER_FIRST = {21, 22, 23, 25, 110, 143, 587, 3306, 5900}
+HTTP_PORTS = {80, 5000, 8000, 8008, 8080, 8888}
+TLS_PORTS = {443, 993, 995, 8443}
+
+_HTTP_PROBE = b"HEAD / HTTP/1.0\r\n\r\n"
+
+UDP_PROBES = {
+    # DNS: root NS query
+    53: struct.pack(">HHHHHH", 0x5057, 0x0100, 1, 0, 0, 0) + b"\x00\x00\x02\x00\x01",
+    # NTP: version 3 client request
+    123: b"\x1b" + b"\x00" * 47,
+    # NetBIOS: node status for the wildcard name "*"
+    137: (struct.pack(">HHHHHH", 0x5057, 0, 1, 0, 0, 0)
+          + b"\x20" + b"CKAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA" + b"\x00\x00\x21\x00\x01"),
+    # SNMP v1 get-request for sysDescr.0, community "public"
+    161: bytes.fromhex("302902010004067075626c6963a01c0204505750570201000201003010"
+                       "300e06082b060102010101000500"),
+    # SSDP discovery
+    1900: (b"M-SEARCH * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\n"
+           b"MAN: \"ssdp:discover\"\r\nMX: 1\r\nST: ssdp:all\r\n\r\n"),
+    # mDNS: DNS-SD service enumeration
+    5353: (struct.pack(">HHHHHH", 0, 0, 1, 0, 0, 0)
+           + b"\x09_services\x07_dns-sd\x04_udp\x05local\x00\x00\x0c\x00\x01"),
+}
+
+# (pattern, service); group 1, when present, is the product/version
+_SIGNATURES = [
+    (re.compile(rb'^SSH-[\d.]+-([^\r\n]+)'), 'ssh'),
+    (re.compile(rb'^HTTP/\d\.\d \d{3}.*?^server:[ \t]*([^\r\n]+)', re.I | re.M | re.S), 'http'),
+    (re.compile(rb'^HTTP/\d\.\d \d{3}'), 'http'),
+    (re.compile(rb'^220[ -]([^\r\n]*ftp[^\r\n]*)', re.I), 'ftp'),
+    (re.compile(rb'^220[ -]([^\r\n]*(?:smtp|mail)[^\r\n]*)', re.I), 'smtp'),
+    (re.compile(rb'^\+OK ?([^\r\n]*)'), 'pop3'),
+    (re.compile(rb'^\* OK ?([^\r\n]*)'), 'imap'),
+    (re.compile(rb'^RFB (\d{3}\.\d{3})'), 'vnc'),
+    (re.compile(rb'^.\x00\x00\x00\x0a([\d.]+[\w.-]*)\x00', re.S), 'mysql'),
+]
+
+
+def parse_ports(spec):
+    """
+    'common', '22,80,8000-8100' or a mix ('web,22') -> sorted tuple of ports.
+    """
+    if not spec:
+        return ()
+    ports = set()
+    for part in str(spec).split(','):
+        part = part.strip()
+        if part in PORT_SETS:
+            ports.update(PORT_SETS[part])
+        elif '-' in part:
+            first, last = part.split('-', 1)
+            ports.update(range(int(first), int(last) + 1))
+        elif part:
+            ports.add(int(part))
+    if any(not 0 < port < 65536 for port in ports):
+        raise ValueError(f"port out of range in {spec!r}")
+    return tuple(sorted(ports))
+
+
+def identify(port, data):
+    """
+    (service, product) for a banner read from `port`; the service falls
+    back to the port's usual one.
+    """
+    for pattern, service in _SIGNATURES:
+        match = pattern.search(data)
+        if match:
+            product = match.group(1) if pattern.groups else b''
+            return service, product.decode('latin-1').strip()[:80]
+    return SERVICES.get(port, 'unknown'), ''
+
+
+class PortResult:
+    """
+    One probed port. `state` is 'open', 'closed' or 'filtered';
+    `rtt` is in milliseconds.
+    """
+    __slots__ = ('ip', 'port', 'protocol', 'state', 'rtt', 'service', 'product', 'banner')
+
+    def __init__(self, ip, port, protocol, state, rtt=None, service='', product='', banner=''):
+        self.ip = ip
+        self.port = port
+        self.protocol = protocol
+        self.state = state
+        self.rtt = rtt
+        self.service = service
+        self.product = product
+        self.banner = banner
+
+    def as_dict(self):
+        fields = {f: getattr(self, f) for f in self.__slots__}
+        if self.rtt is not None:
+            fields['rtt'] = round(self.rtt, 3)
+        return fields
+
+    def label(self):
+        """Short form for tables: '22/tcp ssh (OpenSSH_9.6)'."""
+        text = f"{self.port}/{self.protocol} {self.service}"
+        return f"{text} ({self.product})" if self.product else text
+
+    def __repr__(self):
+        return f"PortResult({self.ip}:{self.port}/{self.protocol} {self.state} {self.service!r})"
+
+
+class _HostTiming:
+    """
+    Per-host concurrency cap and RFC 6298 smoothed RTT (seconds).
+    """
+    __slots__ = ('limit', 'srtt', 'rttvar')
+
+    def __init__(self, per_host):
+        self.limit = asyncio.Semaphore(per_host)
+        self.srtt = None
+        self.rttvar = None
+
+    def sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def timeout(self, maximum, minimum):
+        if self.srtt is None:
+            return maximum
+        return min(maximum, max(minimum, self.srtt + 4 * self.rttvar))
+
+
+class PortScanner:
+    """
+    Probes `tcp_ports` and `udp_ports` on a list of hosts (IPs or Devices).
+    on_result(PortResult) is called on the scanner's loop for each open
+    port as it is found.
+    """
+    def __init__(self, tcp_ports=PORT_SETS['common'], udp_ports=(), concurrency=256, per_host=16,
+                 timeout=1.0, min_timeout=0.25, banner_timeout=0.5, banners=True, on_result=None):
+        self.tcp_ports = tuple(tcp_ports)
+        self.udp_ports = tuple(udp_ports)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.min_timeout = min_timeout
+        self.banner_timeout = banner_timeout
+        self.banners = banners
+        self.on_result = on_result
+        self.counts = {'open': 0, 'closed': 0, 'filtered': 0}
+        self.elapsed = 0.0
+        self.cpu = 0.0
+        self._loop = None
+        self._task = None
+        self._cancelled = False
+
+    def scan(self, hosts, on_result=None):
+        """
+        Blocking entry point. Returns {ip: [open PortResults]}; a cancelled
+        scan returns what it found so far.
+        """
+        if on_result is not None:
+            self.on_result = on_result
+        return asyncio.run(self.run(hosts))
+
+    def stream(self, hosts):
+        """
+        Async iterator over the open PortResults, as they are found.
+        """
+        return stream(lambda on_result: self.scan(hosts, on_result), stop=self.cancel)
+
+    def cancel(self):
+        self._cancelled = True
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # Loop already closed, the scan is over
+                pass
+
+    def metrics(self):
+        probes = sum(self.counts.values())
+        return {
+            'probes': probes,
+            **self.counts,
+            'elapsed_s': round(self.elapsed, 3),
+            'probes_per_s': round(probes / self.elapsed, 1) if self.elapsed else 0.0,
+            'cpu_s': round(self.cpu, 3),
+            'cpu_us_per_probe': round(self.cpu / probes * 1e6, 1) if probes else 0.0,
+        }
+
+    async def run(self, hosts):
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        ips = list(dict.fromkeys(getattr(host, 'ip', host) for host in hosts))
+        timings = {ip: _HostTiming(self.per_host) for ip in ips}
+        jobs = [(ip, port, 'tcp') for port in self.tcp_ports for ip in ips]
+        jobs += [(ip, port, 'udp') for port in self.udp_ports for ip in ips]
+        found = {}
+        pending = iter(jobs)
+
+        async def worker():
+            # `pending` is shared: next() never yields, so no job is taken twice
+            for ip, port, protocol in pending:
+                timing = timings[ip]
+                async with timing.limit:
+                    if protocol == 'tcp':
+                        result = await self._tcp(ip, port, timing)
+                    else:
+                        result = await self._udp(ip, port, timing)
+                self.counts[result.state] += 1
+                if result.state == 'open':
+                    found.setdefault(ip, []).append(result)
+                    tracer.debug("open", ip=ip, port=port, protocol=protocol,
+                                 service=result.service)
+                    if self.on_result is not None:
+                        self.on_result(result)
+
+        tracer.info("scan_start", hosts=len(ips), probes=len(jobs), concurrency=self.concurrency)
+        started = time.perf_counter()
+        cpu = time.process_time()
+        workers = [asyncio.ensure_future(worker())
+                   for _ in range(min(self.concurrency, len(jobs)))]
+        try:
+            if not self._cancelled:
+                await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            tracer.info("scan_cancelled")
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.elapsed = time.perf_counter() - started
+            self.cpu = time.process_time() - cpu
+            self._task = None
+            tracer.info("scan_complete", **self.metrics())
+        return found
+
+    async def _tcp(self, ip, port, timing):
+        loop = self._loop
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            sent = time.perf_counter()
+            try:
+                await asyncio.wait_for(loop.sock_connect(sock, (ip, port)),
+                                       timing.timeout(self.timeout, self.min_timeout))
+            except ConnectionRefusedError:
+                rtt = time.perf_counter() - sent
+                timing.sample(rtt)
+                return PortResult(ip, port, 'tcp', 'closed', rtt * 1000)
+            except (asyncio.TimeoutError, OSError):
+                return PortResult(ip, port, 'tcp', 'filtered')
+            rtt = time.perf_counter() - sent
+            timing.sample(rtt)
+            result = PortResult(ip, port, 'tcp', 'open', rtt * 1000, SERVICES.get(port, 'unknown'))
+            if self.banners and port not in TLS_PORTS:
+                data = await self._banner(sock, port, timing)
+                if data:
+                    result.service, result.product = identify(port, data)
+                    result.banner = data.split(b'\n', 1)[0].decode('latin-1').strip()[:120]
+            return result
+        finally:
+            sock.close()
+
+    async def _banner(self, sock, port, timing):
+        loop = self._loop
+        try:
+            if port not in HTTP_PORTS:
+                # Give server-first protocols the time to speak; anything
+                # else only a couple of round trips
+                wait = (self.banner_timeout if port in SERVER_FIRST else
+                        min(self.banner_timeout, 2 * timing.timeout(self.timeout, self.min_timeout)))
+                try:
+                    data = await asyncio.wait_for(loop.sock_recv(sock, 1024), wait)
+                    if data:
+                        return data
+                except asyncio.TimeoutError:
+                    pass
+            await loop.sock_sendall(sock, _HTTP_PROBE if port in HTTP_PORTS else b"\r\n")
+            return await asyncio.wait_for(loop.sock_recv(sock, 1024), self.banner_timeout)
+        except (asyncio.TimeoutError, OSError):
+            return b''
+
+    async def _udp(self, ip, port, timing):
+        loop = self._loop
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            sent = time.perf_counter()
+            try:
+                sock.connect((ip, port))
+                sock.send(UDP_PROBES.get(port, b"\x00"))
+                data = await asyncio.wait_for(loop.sock_recv(sock, 2048),
+                                              timing.timeout(self.timeout, self.min_timeout))
+            except (ConnectionRefusedError, ConnectionResetError):
+                # ICMP port unreachable (WSAECONNRESET on Windows)
+                rtt = time.perf_counter() - sent
+                timing.sample(rtt)
+                return PortResult(ip, port, 'udp', 'closed', rtt * 1000)
+            except (asyncio.TimeoutError, OSError):
+                return PortResult(ip, port, 'udp', 'filtered')
+            rtt = time.perf_counter() - sent
+            timing.sample(rtt)
+            result = PortResult(ip, port, 'udp', 'open', rtt * 1000, SERVICES.get(port, 'unknown'))
+            server = re.search(rb'^server:[ \t]*([^\r\n]+)', data, re.I | re.M)
+            if server:
+                result.product = server.group(1).decode('latin-1').strip()[:80]
+            return result
+        finally:
+            sock.close()
@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import deque
+
+# Adaptive scheduling for the Wi-Fi scan loop.
+#
+# The loop calls wait() before every scan and finished() after it. wait()
+# returns as soon as the next scan is due, a scan was requested, or the
+# scheduler is stopped. The delay adapts to what the scans show:
+#
+#   - results changing fast (BSSIDs appearing/leaving, signals moving, the
+#     strongest BSSID of an SSID changing, i.e. roaming) halve it, down to
+#     min_interval
+#   - stable results stretch it by `backoff`, up to max_interval
+#
+# request() wakes the loop at once. Requests that arrive while one is
+# already pending, or while a scan is running, fold into a single extra
+# scan. pause() holds scheduled scans (tab hidden, window minimised) until
+# resume(); an explicit request still goes through.
+#
+# request() returns a ticket (the request count); `serving` is the newest
+# ticket the running scan answers, i.e. every request made before it
+# started. A caller that needs results taken after its request keeps only
+# scans with serving >= its ticket.
+
+class ScanScheduler:
+    """
+    Decides when the next scan runs; see the module comment.
+    """
+    def __init__(self, interval=5, min_interval=2, max_interval=30, backoff=1.5,
+                 churn_threshold=0.1, signal_threshold=10, window=60):
+        self.base_interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.churn_threshold = churn_threshold
+        self.signal_threshold = signal_threshold
+        self.window = window
+
+        self.interval = interval
+        self.scans = 0
+        self.requests = 0
+        self.coalesced = 0
+        self.serving = 0
+
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._paused = False
+        self._requested = False
+        self._scanning = False
+        self._next_due = 0.0
+        self._started_at = None
+        self._created = time.monotonic()
+        # (start, duration) of the scans inside the metrics window
+        self._history = deque()
+        self._previous = None
+
+    def start(self):
+        """
+        Re-arms a stopped scheduler; the first scan is due immediately.
+        """
+        with self._cond:
+            self._stopped = False
+            self._next_due = 0.0
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def request(self):
+        """
+        Asks for a scan now; returns the request's ticket.
+        """
+        with self._cond:
+            self.requests += 1
+            if self._requested or self._scanning:
+                self.coalesced += 1
+            self._requested = True
+            self._cond.notify_all()
+            return self.requests
+
+    def pause(self):
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def wait(self):
+        """
+        Blocks until a scan should run. Returns False once stopped.
+        """
+        with self._cond:
+            while not self._stopped:
+                if self._requested:
+                    break
+                if not self._paused:
+                    remaining = self._next_due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._cond.wait()
+            else:
+                return False
+            self._requested = False
+            self.serving = self.requests
+            self._scanning = True
+            self._started_at = time.monotonic()
+            return True
+
+    def finished(self, networks):
+        """
+        Records a completed scan and schedules the next one.
+        """
+        now = time.monotonic()
+        current = {ap.bssid: (ap.ssid, ap.signal) for ap in networks}
+        with self._cond:
+            self._scanning = False
+            self.scans += 1
+            self._history.append((self._started_at, now - self._started_at))
+            self._trim(now)
+            if self._previous is not None:
+                if self._changing(self._previous, current):
+                    self.interval = max(self.min_interval, self.interval / 2)
+                else:
+                    self.interval = min(self.max_interval, self.interval * self.backoff)
+            self._previous = current
+            self._next_due = now + self.interval
+
+    def _changing(self, previous, current):
+        if not previous and not current:
+            return False
+        churn = len(previous.keys() ^ current.keys()) / max(len(previous), len(current))
+        if churn >= self.churn_threshold:
+            return True
+        deltas = [abs(signal - previous[bssid][1])
+                  for bssid, (_, signal) in current.items() if bssid in previous]
+        if deltas and max(deltas) >= self.signal_threshold:
+            return True
+        return self._strongest(previous) != self._strongest(current)
+
+    @staticmethod
+    def _strongest(networks):
+        # Strongest BSSID per SSID; when it changes the client may roam
+        best = {}
+        for bssid, (ssid, signal) in networks.items():
+            if ssid not in best or signal > best[ssid][1]:
+                best[ssid] = (bssid, signal)
+        return {ssid: bssid for ssid, (bssid, _) in best.items()}
+
+    def _trim(self, now):
+        while self._history and self._history[0][0] < now - self.window:
+            self._history.popleft()
+
+    def metrics(self):
+        """
+        Scan rate (per minute) and duty cycle (share of time spent scanning)
+        over the last `window` seconds, plus the current interval and counters.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self._trim(now)
+            # At least a second, so the first scans do not read as a huge rate
+            span = max(min(self.window, 1.0), min(self.window, now - self._created))
+            busy = sum(duration for _, duration in self._history)
+            return {
+                'interval': round(self.interval, 2),
+                'scan_rate': round(len(self._history) / span * 60, 2),
+                'duty_cycle': round(busy / span, 4),
+                'scans': self.scans,
+                'requests': self.requests,
+                'coalesced': self.coalesced,
+                'paused': self._paused,
+            }
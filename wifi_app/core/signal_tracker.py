@@ -0,0 +1,300 @@
+import time
+from array import array
+
+import numpy as np
+
+from utils.records import AccessPointBatch, dbm_to_percent
+from utils.trace import get_tracer
+
+# Per-BSSID signal tracking across Wi-Fi scans.
+#
+# A single scan's RSSI jumps by several dB from one scan to the next, so
+# each BSSID keeps a small Kalman filter over (level in dBm, trend in dB/s)
+# with a constant-trend model:
+#
+#   predict   level += trend * dt, uncertainty grows with dt
+#   update    blend in the new reading by the Kalman gain
+#
+# so irregular scan intervals and missed scans are handled naturally: after
+# a gap the prediction is trusted less and the next reading counts more.
+# When the residuals pile up on one side (a decaying sum past JUMP_SIGMAS
+# standard deviations), the level's uncertainty is reset, so a real step
+# is followed within a scan or two instead of being smoothed away. The
+# filter states of all BSSIDs are rows of a few NumPy arrays; a scan updates
+# the rows of the BSSIDs it saw in one vectorized step, so the work per scan
+# depends on the scan's size, not on how long a BSSID has been tracked.
+#
+# A BSSID missing from a scan keeps its track (shown as not seen for N s)
+# for HOLD_S, which stops rows and chart curves flickering when a scan
+# misses a weak AP; its row is freed for reuse after EXPIRE_S.
+#
+# The connected BSSID comes from the scan (AccessPoint.associated); a change
+# of it is reported as a 'roamed' event, and its trend falling below
+# DEGRADING_DB_MIN as 'degrading'.
+
+tracer = get_tracer('signal_tracker')
+
+# Scan-to-scan spread of a reading, dB (standard deviation)
+MEASUREMENT_NOISE_DB = 4.0
+# How quickly a trend may change: white-noise acceleration, dB^2/s^3
+TREND_NOISE = 0.00002
+# Decaying sum of a BSSID's residuals, in standard deviations, that counts
+# as a jump
+JUMP_SIGMAS = 4.0
+# Spread of a new BSSID's trend, dB/s
+INITIAL_TREND_DB_S = 0.5
+# Missing BSSIDs stay on display this long, and are forgotten after EXPIRE_S
+HOLD_S = 20
+EXPIRE_S = 300
+# Trend (dB/min) at which a BSSID counts as degrading, once it has
+# MIN_SAMPLES readings
+DEGRADING_DB_MIN = -3.0
+MIN_SAMPLES = 4
+
+
+class SignalTrack:
+    """
+    A tracked BSSID: its latest AccessPoint record `ap`, smoothed `dbm`
+    and `signal` (0-100%), the last `raw_dbm` reading and the `trend` in
+    dB per minute. `present` says whether the last scan saw it.
+    """
+    __slots__ = ('bssid', 'ap', 'dbm', 'signal', 'raw_dbm', 'trend', 'first_seen', 'last_seen',
+                 'samples', 'present')
+
+    def __init__(self, bssid, ap, now):
+        self.bssid = bssid
+        self.ap = ap
+        self.dbm = self.raw_dbm = ap.dbm
+        self.signal = ap.signal
+        self.trend = 0.0
+        self.first_seen = self.last_seen = now
+        self.samples = 0
+        self.present = True
+
+    def age(self, now=None):
+        """Seconds since a scan last saw it."""
+        return (now if now is not None else time.time()) - self.last_seen
+
+    @property
+    def degrading(self):
+        return self.samples >= MIN_SAMPLES and self.trend <= DEGRADING_DB_MIN
+
+    def as_dict(self):
+        return {'bssid': self.bssid, 'ssid': self.ap.ssid, 'dbm': round(self.dbm, 1),
+                'raw_dbm': round(self.raw_dbm, 1), 'signal': self.signal,
+                'trend_db_min': round(self.trend, 2), 'samples': self.samples,
+                'first_seen': self.first_seen, 'last_seen': self.last_seen,
+                'present': self.present, 'associated': self.ap.associated}
+
+    def __repr__(self):
+        return (f"SignalTrack(bssid={self.bssid!r}, dbm={self.dbm:.1f}, "
+                f"trend={self.trend:+.1f} dB/min)")
+
+
+class LinkEvent:
+    """
+    A change of the connected BSSID ('connected', 'roamed',
+    'disconnected'), or the connected BSSID 'degrading'. `previous` is ''
+    when there was none, `bssid` is '' after a disconnect.
+    """
+    __slots__ = ('ts', 'bssid', 'previous', 'ssid', 'dbm', 'previous_dbm')
+
+    def __init__(self, ts, bssid, previous='', ssid='', dbm=None, previous_dbm=None):
+        self.ts = ts
+        self.bssid = bssid
+        self.previous = previous
+        self.ssid = ssid
+        self.dbm = dbm
+        self.previous_dbm = previous_dbm
+
+    def as_dict(self):
+        return {'ts': round(self.ts, 3), 'bssid': self.bssid, 'previous': self.previous,
+                'ssid': self.ssid,
+                'dbm': None if self.dbm is None else round(self.dbm, 1),
+                'previous_dbm': None if self.previous_dbm is None else round(self.previous_dbm, 1)}
+
+
+class SignalTracker:
+    """
+    Smooths successive scans (lists of AccessPoints) into SignalTracks.
+    Not thread-safe; feed it from one thread.
+    """
+    def __init__(self, hold=HOLD_S, expire_after=EXPIRE_S,
+                 noise_db=MEASUREMENT_NOISE_DB, trend_noise=TREND_NOISE):
+        self.hold = hold
+        self.expire_after = expire_after
+        self.noise = np.float64(noise_db * noise_db)
+        self.trend_noise = np.float64(trend_noise)
+        self.associated = None
+        self._degrading = False
+        self._index = {}
+        self._tracks = []
+        self._free = []
+        # Rows the last scan saw
+        self._seen = []
+        self._allocate_rows(64)
+
+    def _allocate_rows(self, count):
+        """
+        Grows the state arrays to `count` rows.
+        """
+        known = len(self._tracks)
+        for name in ('_level', '_rate', '_p00', '_p01', '_p11', '_surprise', '_last_seen'):
+            grown = np.zeros(count, np.float64)
+            if known:
+                grown[:known] = getattr(self, name)
+            setattr(self, name, grown)
+        live = np.zeros(count, bool)
+        if known:
+            live[:known] = self._live
+        self._live = live
+        self._tracks += [None] * (count - known)
+        self._free += range(count - 1, known - 1, -1)
+
+    def __len__(self):
+        return len(self._index)
+
+    def update(self, networks, now=None):
+        """
+        Folds one scan into the tracks. Returns (tracks seen within
+        `hold` seconds, strongest first; [(kind, LinkEvent)]).
+        """
+        now = time.time() if now is None else now
+        rows = []
+        readings = []
+        fresh = []
+        associated = None
+        for ap in networks:
+            row = self._index.get(ap.bssid)
+            if row is None:
+                if not self._free:
+                    self._allocate_rows(2 * len(self._tracks))
+                row = self._free.pop()
+                self._index[ap.bssid] = row
+                self._tracks[row] = SignalTrack(ap.bssid, ap, now)
+                self._live[row] = True
+                fresh.append(len(rows))
+            else:
+                self._tracks[row].ap = ap
+            rows.append(row)
+            readings.append(ap.dbm)
+            if ap.associated and associated is None:
+                associated = ap.bssid
+
+        if rows:
+            self._filter(np.array(rows), np.array(readings, np.float64), np.array(fresh, np.intp),
+                         now)
+        for row in self._seen:
+            track = self._tracks[row]
+            if track is not None:
+                track.present = False
+        self._seen = rows
+        for row, reading, level, rate in zip(rows, readings, self._level[rows].tolist(),
+                                             self._rate[rows].tolist()):
+            track = self._tracks[row]
+            track.raw_dbm = reading
+            track.dbm = level
+            track.signal = dbm_to_percent(level)
+            track.trend = rate * 60
+            track.last_seen = now
+            track.samples += 1
+            track.present = True
+
+        # An empty scan is a failed one, not a disconnect
+        events = self._link_events(associated, now) if networks else []
+        self._expire(now)
+        held = [self._tracks[row] for row in
+                np.flatnonzero(self._live & (now - self._last_seen <= self.hold)).tolist()]
+        held.sort(key=lambda track: track.dbm, reverse=True)
+        return held, events
+
+    def _filter(self, rows, readings, fresh, now):
+        """
+        One Kalman step for the given rows; `fresh` indexes the ones just
+        allocated, which start at their reading with a flat trend.
+        """
+        level, rate = self._level[rows], self._rate[rows]
+        p00, p01, p11 = self._p00[rows], self._p01[rows], self._p11[rows]
+        dt = np.maximum(now - self._last_seen[rows], 0)
+        q = self.trend_noise
+
+        # Predict
+        level = level + rate * dt
+        p00 = p00 + dt * (2 * p01 + dt * p11) + q * dt ** 3 / 3
+        p01 = p01 + dt * p11 + q * dt ** 2 / 2
+        p11 = p11 + q * dt
+
+        # Update. Readings that keep landing on one side of the prediction
+        # are a real jump (a door closed, the AP changed power), so the
+        # level restarts from the reading.
+        residual = readings - level
+        surprise = self._surprise[rows] / 2 + residual / np.sqrt(p00 + self.noise)
+        jumped = np.abs(surprise) > JUMP_SIGMAS
+        p00 = np.where(jumped, p00 + residual * residual, p00)
+        surprise[jumped] = 0
+        gain0 = p00 / (p00 + self.noise)
+        gain1 = p01 / (p00 + self.noise)
+        level = level + gain0 * residual
+        rate = rate + gain1 * residual
+        p11 = p11 - gain1 * p01
+        p00, p01 = (1 - gain0) * p00, (1 - gain0) * p01
+
+        if len(fresh):
+            level[fresh] = readings[fresh]
+            rate[fresh] = 0
+            p00[fresh] = self.noise
+            p01[fresh] = 0
+            p11[fresh] = INITIAL_TREND_DB_S ** 2
+            surprise[fresh] = 0
+
+        self._level[rows], self._rate[rows] = level, rate
+        self._p00[rows], self._p01[rows], self._p11[rows] = p00, p01, p11
+        self._surprise[rows] = surprise
+        self._last_seen[rows] = now
+
+    def _link_events(self, associated, now):
+        events = []
+        previous = self.associated
+        if associated != previous:
+            old = self.track(previous) if previous else None
+            new = self.track(associated) if associated else None
+            kind = 'roamed' if previous and associated else 'connected' if associated \
+                else 'disconnected'
+            events.append((kind, LinkEvent(now, associated or '', previous or '',
+                                           new.ap.ssid if new else old.ap.ssid if old else '',
+                                           new.dbm if new else None,
+                                           old.dbm if old else None)))
+            self.associated = associated
+            tracer.info("link_" + kind, bssid=associated, previous=previous)
+        elif associated:
+            track = self.track(associated)
+            # Once per decline, as it crosses the threshold
+            if track.degrading and not self._degrading:
+                events.append(('degrading', LinkEvent(now, associated, ssid=track.ap.ssid,
+                                                      dbm=track.dbm)))
+            self._degrading = track.degrading
+            return events
+        self._degrading = False
+        return events
+
+    def _expire(self, now):
+        rows = np.flatnonzero(self._live & (now - self._last_seen > self.expire_after))
+        for row in rows.tolist():
+            del self._index[self._tracks[row].bssid]
+            self._tracks[row] = None
+            self._free.append(row)
+        self._live[rows] = False
+
+    def track(self, bssid):
+        """The SignalTrack of `bssid`, or None."""
+        row = self._index.get(bssid)
+        return None if row is None else self._tracks[row]
+
+    def batch(self, tracks):
+        """
+        AccessPointBatch of `tracks` with their smoothed signals, for the
+        channel chart and analyzer.
+        """
+        batch = AccessPointBatch.from_records(track.ap for track in tracks)
+        batch.signal = array('B', (track.signal for track in tracks))
+        return batch
@@ -0,0 +1,223 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from utils.trace import get_tracer
+
+# Site survey: Wi-Fi scans tagged with positions on a floor plan, turned
+# into per-BSSID and best-signal heatmaps.
+#
+# Interpolation is inverse-distance weighting on a grid over the plan, with
+# a weight that falls to zero at `radius`:
+#
+#     w(d) = 1 / (d^2 + s^2) - 1 / (radius^2 + s^2)     (d < radius)
+#     map[b] = sum(w * signal[b]) / sum(w)
+#
+# where s (one grid cell) keeps the weight finite at the sample itself. A
+# BSSID a sample did not see counts as signal 0 there, so coverage fades
+# where an AP drops out of the scans; cells no sample reaches are NaN
+# (not surveyed).
+#
+# Both sums are kept as running totals, one shared denominator grid and a
+# numerator grid per BSSID, so a new sample only adds its weights into the
+# cells inside its radius: a NumPy update of (BSSIDs it saw) x (cells in
+# the window), independent of how many samples came before. The best-signal
+# map is refreshed over the same window.
+
+tracer = get_tracer('site_survey')
+
+# Grid cells along the plan's longer side
+GRID_CELLS = 200
+# Default reach of a sample, in grid cells
+RADIUS_CELLS = 16
+
+
+class SurveyHeatmap:
+    """
+    Incremental IDW heatmaps over a width x height plan (any units, e.g.
+    image pixels). Not thread-safe; feed it from one thread.
+    """
+    def __init__(self, width, height, cells=GRID_CELLS, radius=None):
+        self.width = width
+        self.height = height
+        self.cell = max(width, height) / cells
+        self.columns = max(1, int(np.ceil(width / self.cell)))
+        self.rows = max(1, int(np.ceil(height / self.cell)))
+        self.radius = radius if radius is not None else RADIUS_CELLS * self.cell
+        self.samples = 0
+        self.bssids = []
+        self._index = {}
+        # Cell centres
+        self._x = (np.arange(self.columns, dtype=np.float32) + 0.5) * self.cell
+        self._y = (np.arange(self.rows, dtype=np.float32) + 0.5) * self.cell
+        self._smooth = np.float32(self.cell * self.cell)
+        self._floor = np.float32(1.0 / (self.radius * self.radius + self._smooth))
+        self._weights = np.zeros((self.rows, self.columns), np.float32)
+        self._values = np.zeros((8, self.rows, self.columns), np.float32)
+        self._best = np.full((self.rows, self.columns), np.nan, np.float32)
+
+    @property
+    def extent(self):
+        """(left, right, bottom, top) of the grid, for imshow."""
+        return (0, self.columns * self.cell, self.rows * self.cell, 0)
+
+    def add(self, x, y, readings):
+        """
+        Adds one sample at (x, y); `readings` is an iterable of
+        (bssid, signal).
+        """
+        rows, columns, weights = self._window(x, y)
+        if weights is None:
+            return
+        indices = []
+        signals = []
+        for bssid, signal in readings:
+            index = self._index.get(bssid)
+            if index is None:
+                index = self._add_bssid(bssid)
+            indices.append(index)
+            signals.append(signal)
+        self._weights[rows, columns] += weights
+        if indices:
+            signals = np.asarray(signals, np.float32)
+            values = self._values[:len(self.bssids), rows, columns]
+            values[indices] += signals[:, np.newaxis, np.newaxis] * weights
+        self._refresh_best(rows, columns)
+        self.samples += 1
+
+    def best(self):
+        """
+        Strongest interpolated signal of any BSSID per cell; NaN where
+        nothing was surveyed. A live view: do not modify.
+        """
+        return self._best
+
+    def bssid_map(self, bssid):
+        """
+        Interpolated signal of one BSSID per cell, NaN where nothing was
+        surveyed (or all NaN for a BSSID never seen).
+        """
+        index = self._index.get(bssid)
+        result = np.full((self.rows, self.columns), np.nan, np.float32)
+        if index is not None:
+            np.divide(self._values[index], self._weights, out=result, where=self._weights > 0)
+        return result
+
+    def value_at(self, x, y, bssid=None):
+        """
+        The interpolated signal at plan position (x, y): of `bssid`, or
+        the best of all.
+        """
+        row = min(int(y / self.cell), self.rows - 1)
+        column = min(int(x / self.cell), self.columns - 1)
+        if bssid is None:
+            return float(self._best[row, column])
+        index = self._index.get(bssid)
+        weight = self._weights[row, column]
+        if index is None or weight <= 0:
+            return float('nan')
+        return float(self._values[index, row, column] / weight)
+
+    def nbytes(self):
+        return self._weights.nbytes + self._values.nbytes + self._best.nbytes
+
+    def _window(self, x, y):
+        """
+        Slices of the cells within `radius` of (x, y), and their weights.
+        """
+        reach = self.radius / self.cell
+        column, row = x / self.cell, y / self.cell
+        c0, c1 = max(0, int(column - reach)), min(self.columns, int(column + reach) + 1)
+        r0, r1 = max(0, int(row - reach)), min(self.rows, int(row + reach) + 1)
+        if c0 >= c1 or r0 >= r1:
+            return None, None, None
+        dx = self._x[c0:c1] - np.float32(x)
+        dy = self._y[r0:r1] - np.float32(y)
+        distance = dy[:, np.newaxis] ** 2 + dx[np.newaxis, :] ** 2
+        weights = 1.0 / (distance + self._smooth) - self._floor
+        np.maximum(weights, 0, out=weights)
+        return slice(r0, r1), slice(c0, c1), weights
+
+    def _add_bssid(self, bssid):
+        index = len(self.bssids)
+        if index == len(self._values):
+            grown = np.zeros((index * 2, self.rows, self.columns), np.float32)
+            grown[:index] = self._values
+            self._values = grown
+        self.bssids.append(bssid)
+        self._index[bssid] = index
+        return index
+
+    def _refresh_best(self, rows, columns):
+        weights = self._weights[rows, columns]
+        best = np.full(weights.shape, np.nan, np.float32)
+        if self.bssids:
+            top = self._values[:len(self.bssids), rows, columns].max(axis=0)
+            np.divide(top, weights, out=best, where=weights > 0)
+        self._best[rows, columns] = best
+
+
+class SurveySample:
+    """
+    One scan at a position: `readings` is [(bssid, ssid, signal)].
+    """
+    __slots__ = ('x', 'y', 'ts', 'readings')
+
+    def __init__(self, x, y, readings, ts=None):
+        self.x = x
+        self.y = y
+        self.readings = readings
+        self.ts = ts if ts is not None else time.time()
+
+    def as_dict(self):
+        return {'x': self.x, 'y': self.y, 'ts': self.ts, 'readings': self.readings}
+
+
+class SiteSurvey:
+    """
+    The samples of a walk-through survey over a floor plan image of
+    width x height pixels, with their heatmaps. Saved as JSON next to a
+    reference to the plan image.
+    """
+    def __init__(self, width, height, floor_plan=None, **heatmap_options):
+        self.floor_plan = floor_plan
+        self.samples = []
+        self.ssids = {}
+        self.heatmap = SurveyHeatmap(width, height, **heatmap_options)
+
+    def add_scan(self, x, y, access_points, ts=None):
+        """
+        Records a scan result (AccessPoints) taken at (x, y).
+        """
+        readings = [(ap.bssid, ap.ssid, ap.signal) for ap in access_points]
+        return self.add_sample(SurveySample(x, y, readings, ts))
+
+    def add_sample(self, sample):
+        self.samples.append(sample)
+        for bssid, ssid, _ in sample.readings:
+            self.ssids[bssid] = ssid
+        self.heatmap.add(sample.x, sample.y,
+                         ((bssid, signal) for bssid, _, signal in sample.readings))
+        return sample
+
+    def save(self, path):
+        data = {'floor_plan': self.floor_plan, 'width': self.heatmap.width,
+                'height': self.heatmap.height, 'samples': [s.as_dict() for s in self.samples]}
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        tracer.info("saved", path=path, samples=len(self.samples))
+
+    @classmethod
+    def load(cls, path, **heatmap_options):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        survey = cls(data['width'], data['height'], data.get('floor_plan'), **heatmap_options)
+        for s in data['samples']:
+            survey.add_sample(SurveySample(s['x'], s['y'], [tuple(r) for r in s['readings']],
+                                           s['ts']))
+        tracer.info("loaded", path=path, samples=len(survey.samples))
+        return survey
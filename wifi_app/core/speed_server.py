@@ -0,0 +1,195 @@
+import asyncio
+import os
+import re
+import socket
+import sys
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from utils.trace import get_tracer
+
+# Minimal HTTP/1.1 speed test server, for running the speed test engine
+# offline (loopback or LAN) and for benchmarking it.
+#
+#   GET  /download?bytes=N   N bytes of incompressible data
+#   POST /upload             reads and discards the body, replies with its size
+#   GET  /ping               empty 200
+#
+# Connections are keep-alive. Data is served from one preallocated random
+# buffer and received into one scratch buffer with the event loop's
+# sock_sendall/sock_recv_into, so a single Python thread can push several
+# Gbit/s over loopback.
+
+tracer = get_tracer('speed_server')
+
+_CHUNK = 1 << 20
+_LENGTH_RE = re.compile(rb'^content-length:\s*(\d+)', re.IGNORECASE | re.MULTILINE)
+
+
+class LocalSpeedServer:
+    """
+    Runs the server on its own event loop thread. start() returns the base
+    URL, e.g. 'http://127.0.0.1:54321'.
+    """
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.url = None
+        self._payload = memoryview(os.urandom(_CHUNK))
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stopped = None
+        # Set by _run() when the server fails before it is listening
+        self._error = None
+
+    def start(self, timeout=5.0):
+        """
+        Returns once the server is listening; re-raises what stopped it from
+        getting there (e.g. the port is in use), or TimeoutError.
+        """
+        self._thread = threading.Thread(target=self._run, name='speed-server', daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"speed server not listening after {timeout} s")
+        if self._error is not None:
+            self._thread.join()
+            self._loop = None
+            raise self._error
+        return self.url
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+            self._thread.join(timeout=2)
+            self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        except Exception as e:
+            self._error = e
+            tracer.error("serve_failed", error=repr(e))
+        finally:
+            self._loop.close()
+            # Wakes start() if _serve() failed before it was listening
+            self._ready.set()
+
+    async def _serve(self):
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            server.bind((self.host, self.port))
+            server.listen(128)
+        except OSError:
+            server.close()
+            raise
+        server.setblocking(False)
+        self.port = server.getsockname()[1]
+        self.url = f"http://{self.host}:{self.port}"
+        tracer.info("listening", url=self.url)
+        self._ready.set()
+
+        connections = set()
+        accept = asyncio.ensure_future(loop.sock_accept(server))
+        stopped = asyncio.ensure_future(self._stopped.wait())
+        try:
+            while True:
+                await asyncio.wait({accept, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                if stopped.done():
+                    break
+                conn, _ = accept.result()
+                task = asyncio.ensure_future(self._handle(conn))
+                connections.add(task)
+                task.add_done_callback(connections.discard)
+                accept = asyncio.ensure_future(loop.sock_accept(server))
+        finally:
+            accept.cancel()
+            for task in list(connections):
+                task.cancel()
+            await asyncio.gather(accept, *connections, return_exceptions=True)
+            server.close()
+
+    async def _handle(self, conn):
+        loop = asyncio.get_running_loop()
+        conn.setblocking(False)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        scratch = bytearray(_CHUNK)
+        view = memoryview(scratch)
+        pending = b''
+        try:
+            while True:
+                # Request line and headers
+                while b'\r\n\r\n' not in pending:
+                    n = await loop.sock_recv_into(conn, view)
+                    if not n:
+                        return
+                    pending += view[:n]
+                head, _, pending = pending.partition(b'\r\n\r\n')
+                method, target, _ = head.split(b'\r\n', 1)[0].decode('latin-1').split(' ', 2)
+                url = urlsplit(target)
+
+                if method == 'POST' and url.path == '/upload':
+                    match = _LENGTH_RE.search(head)
+                    remaining = int(match.group(1)) if match else 0
+                    received = min(remaining, len(pending))
+                    pending = pending[received:]
+                    remaining -= received
+                    while remaining > 0:
+                        n = await loop.sock_recv_into(conn, view[:min(remaining, _CHUNK)])
+                        if not n:
+                            return
+                        remaining -= n
+                    body = str(int(match.group(1)) if match else 0).encode()
+                    await self._respond(conn, b'200 OK', body)
+                elif method == 'GET' and url.path == '/download':
+                    size = int(parse_qs(url.query).get('bytes', ['0'])[0])
+                    await loop.sock_sendall(conn, self._header(b'200 OK', size))
+                    while size > 0:
+                        chunk = self._payload[:min(size, _CHUNK)]
+                        await loop.sock_sendall(conn, chunk)
+                        size -= len(chunk)
+                elif method == 'GET' and url.path == '/ping':
+                    await self._respond(conn, b'200 OK', b'')
+                else:
+                    await self._respond(conn, b'404 Not Found', b'')
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _header(status, length):
+        return (b'HTTP/1.1 ' + status + b'\r\nContent-Type: application/octet-stream\r\n'
+                b'Content-Length: ' + str(length).encode() + b'\r\nConnection: keep-alive\r\n\r\n')
+
+    async def _respond(self, conn, status, body):
+        await asyncio.get_running_loop().sock_sendall(conn, self._header(status, len(body)) + body)
+
+
+def main():
+    """
+    Serves until interrupted: python -m core.speed_server [host] [port]
+    """
+    host = sys.argv[1] if len(sys.argv) > 1 else '127.0.0.1'
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8080
+    server = LocalSpeedServer(host, port)
+    print(server.start(), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+import asyncio
+import os
+import socket
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from utils.trace import get_tracer
+
+# Speed test engine.
+#
+# Each phase (download, then upload) runs `streams` parallel HTTP transfers
+# over plain TCP for `duration` seconds on one event loop, with the sockets
+# driven by sock_recv_into/sock_sendall on preallocated buffers. Every
+# `sample_interval` (10 Hz) the bytes moved since the last tick become a
+# throughput sample. The first `warmup` seconds of a phase (TCP slow start,
+# socket buffers filling) are left out of the phase's result.
+#
+# Latency is the TCP connect time to the server. It is sampled idle before
+# the transfers and continuously during them; the difference is the
+# bufferbloat the transfers cause.
+#
+# cancel() is safe from any thread and stops the run within one event loop
+# turn; run() then returns what was measured so far with cancelled=True.
+#
+# Endpoints say where to connect and which paths to use:
+#   HttpEndpoint('http://host:port')  a LocalSpeedServer or compatible server
+#   SpeedtestNetEndpoint.best()       nearest speedtest.net server (needs
+#                                     speedtest-cli, only for server selection)
+# select_endpoint() builds one from a spec: 'speedtest', 'local' or a URL.
+
+tracer = get_tracer('speed_test')
+
+_RECV_BUFFER = 1 << 18
+_SEND_CHUNK = 1 << 16
+
+
+class HttpEndpoint:
+    """
+    A server speaking the LocalSpeedServer protocol at `url`.
+    """
+    name = 'http'
+    # Bytes asked for per request; streams stop on the deadline, not on size
+    download_size = 1 << 34
+    upload_size = 1 << 34
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        if parts.scheme != 'http':
+            raise ValueError(f"only http:// endpoints are supported, got {url!r}")
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.base = parts.path.rstrip('/')
+        self.server = None
+
+    def download_path(self):
+        return f"{self.base}/download?bytes={self.download_size}"
+
+    def upload_path(self):
+        return f"{self.base}/upload"
+
+    def close(self):
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+
+
+class SpeedtestNetEndpoint(HttpEndpoint):
+    """
+    A speedtest.net server: large JPEGs to download, upload.php to post to.
+    """
+    name = 'speedtest.net'
+    download_size = 4000
+    upload_size = 25 * 1000 * 1000
+
+    def __init__(self, url, sponsor=None):
+        super().__init__(url)
+        self.base = self.base.rsplit('/', 1)[0]
+        self.sponsor = sponsor
+
+    @classmethod
+    def best(cls):
+        # speedtest-cli is only needed once a test is requested
+        import speedtest
+        server = speedtest.Speedtest().get_best_server()
+        return cls(server['url'], server.get('sponsor'))
+
+    def download_path(self):
+        return f"{self.base}/random{self.download_size}x{self.download_size}.jpg"
+
+    def upload_path(self):
+        return f"{self.base}/upload.php"
+
+
+def select_endpoint(spec=None):
+    """
+    'speedtest' (default), 'local' to start a LocalSpeedServer on loopback,
+    or an http:// URL. $PYWIFIMAN_SPEED_SERVER is used when spec is None.
+    """
+    spec = spec or os.environ.get('PYWIFIMAN_SPEED_SERVER', 'speedtest')
+    if spec == 'speedtest':
+        return SpeedtestNetEndpoint.best()
+    if spec == 'local':
+        from core.speed_server import LocalSpeedServer
+        server = LocalSpeedServer()
+        endpoint = HttpEndpoint(server.start())
+        endpoint.name = 'local'
+        endpoint.server = server
+        return endpoint
+    return HttpEndpoint(spec)
+
+
+class SpeedResult:
+    """
+    Outcome of a run. Throughput in Mbit/s, latencies are medians in ms;
+    fields of phases that did not run are None.
+    """
+    __slots__ = ('download_mbps', 'upload_mbps', 'idle_latency_ms',
+                 'download_latency_ms', 'upload_latency_ms', 'cancelled')
+
+    def __init__(self):
+        self.download_mbps = self.upload_mbps = None
+        self.idle_latency_ms = self.download_latency_ms = self.upload_latency_ms = None
+        self.cancelled = False
+
+    @property
+    def bufferbloat_ms(self):
+        """
+        Worst latency increase under load.
+        """
+        loaded = [ms for ms in (self.download_latency_ms, self.upload_latency_ms) if ms is not None]
+        if self.idle_latency_ms is None or not loaded:
+            return None
+        return max(loaded) - self.idle_latency_ms
+
+    def as_dict(self):
+        return {**{f: getattr(self, f) for f in self.__slots__}, 'bufferbloat_ms': self.bufferbloat_ms}
+
+
+class SpeedTestEngine:
+    """
+    Runs a speed test against `endpoint`; see the module comment.
+    on_sample(phase, elapsed_s, mbps, latency_ms) is called at 10 Hz during
+    transfers, on_progress(message) at phase changes.
+    """
+    def __init__(self, endpoint, streams=4, duration=10.0, warmup=2.0, sample_interval=0.1,
+                 on_sample=None, on_progress=None):
+        self.endpoint = endpoint
+        self.streams = streams
+        self.duration = duration
+        self.warmup = warmup
+        self.sample_interval = sample_interval
+        self.on_sample = on_sample or (lambda phase, elapsed, mbps, latency: None)
+        self.on_progress = on_progress or (lambda message: None)
+        self.result = None
+        self._loop = None
+        self._task = None
+        self._cancelled = False
+
+    def run(self, phases=('download', 'upload')):
+        """
+        Blocks until the test completes or is cancelled; returns a SpeedResult.
+        """
+        self.result = SpeedResult()
+        loop = asyncio.new_event_loop()
+        try:
+            self._loop = loop
+            self._task = loop.create_task(self._run(phases))
+            if self._cancelled:
+                self._task.cancel()
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            self.result.cancelled = True
+            tracer.info("cancelled")
+        finally:
+            self._loop = None
+            loop.close()
+        return self.result
+
+    def cancel(self):
+        self._cancelled = True
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # Loop already closed, the run is over
+                pass
+
+    async def _run(self, phases):
+        self.on_progress("Measuring latency...")
+        idle = await self._latency_samples(count=5)
+        self.result.idle_latency_ms = statistics.median(idle) if idle else None
+        for phase in phases:
+            self.on_progress(f"Testing {phase.capitalize()}...")
+            await self._phase(phase)
+            tracer.info("phase_complete", phase=phase, mbps=getattr(self.result, f"{phase}_mbps"),
+                        latency_ms=getattr(self.result, f"{phase}_latency_ms"))
+        self.on_progress("Done.")
+
+    async def _connect(self):
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(self.endpoint.host, self.endpoint.port,
+                                       type=socket.SOCK_STREAM)
+        family, type_, proto, _, address = infos[0]
+        sock = socket.socket(family, type_, proto)
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            await loop.sock_connect(sock, address)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    async def _connect_time(self):
+        start = time.perf_counter()
+        sock = await self._connect()
+        rtt = (time.perf_counter() - start) * 1000
+        sock.close()
+        return rtt
+
+    async def _latency_samples(self, count):
+        samples = []
+        for _ in range(count):
+            try:
+                samples.append(await self._connect_time())
+            except OSError as e:
+                tracer.error("latency_probe_failed", error=repr(e))
+            await asyncio.sleep(self.sample_interval)
+        return samples
+
+    async def _probe_loaded(self, samples):
+        while True:
+            try:
+                samples.append(await self._connect_time())
+            except OSError as e:
+                tracer.error("latency_probe_failed", error=repr(e))
+            await asyncio.sleep(self.sample_interval)
+
+    async def _phase(self, phase):
+        loop = asyncio.get_running_loop()
+        counter = [0]
+        latencies = []
+        transfer = self._download if phase == 'download' else self._upload
+        tasks = [asyncio.ensure_future(transfer(counter)) for _ in range(self.streams)]
+        tasks.append(asyncio.ensure_future(self._probe_loaded(latencies)))
+        start = loop.time()
+        warm_at = warm_bytes = None
+        last_bytes, last_time = 0, start
+        try:
+            tick = start
+            while True:
+                tick += self.sample_interval
+                await asyncio.sleep(max(0.0, tick - loop.time()))
+                now = loop.time()
+                moved = counter[0]
+                mbps = (moved - last_bytes) * 8 / (now - last_time) / 1e6
+                last_bytes, last_time = moved, now
+                self.on_sample(phase, now - start, mbps, latencies[-1] if latencies else None)
+                if warm_at is None and now - start >= self.warmup:
+                    warm_at, warm_bytes = now, moved
+                failed = [t for t in tasks if t.done() and t.exception() is not None]
+                if failed:
+                    raise failed[0].exception()
+                if now - start >= self.duration:
+                    break
+        finally:
+            # Also on cancel, so a stopped test still reports this phase
+            end = loop.time()
+            moved = counter[0]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if warm_at is None:
+                warm_at, warm_bytes = start, 0
+            if end > warm_at:
+                setattr(self.result, f"{phase}_mbps", (moved - warm_bytes) * 8 / (end - warm_at) / 1e6)
+            if latencies:
+                setattr(self.result, f"{phase}_latency_ms", statistics.median(latencies))
+
+    async def _read_headers(self, sock, view):
+        """
+        Reads a response head; returns (content length, body bytes already read).
+        """
+        loop = asyncio.get_running_loop()
+        data = b''
+        while b'\r\n\r\n' not in data:
+            n = await loop.sock_recv_into(sock, view)
+            if not n:
+                raise ConnectionError("server closed the connection")
+            data += view[:n]
+        head, _, body = data.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = lines[0].split(' ', 2)
+        if len(status) < 2 or status[1] != '200':
+            raise ConnectionError(f"server replied {lines[0]!r}")
+        length = 0
+        for line in lines[1:]:
+            key, _, value = line.partition(':')
+            if key.strip().lower() == 'content-length':
+                length = int(value)
+        return length, len(body)
+
+    def _request(self, method, path, length=None):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.endpoint.host}:{self.endpoint.port}",
+                 "User-Agent: pywifiman", "Connection: keep-alive"]
+        if length is not None:
+            lines += ["Content-Type: application/octet-stream", f"Content-Length: {length}"]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    async def _download(self, counter):
+        loop = asyncio.get_running_loop()
+        view = memoryview(bytearray(_RECV_BUFFER))
+        request = self._request('GET', self.endpoint.download_path())
+        sock = await self._connect()
+        try:
+            while True:
+                await loop.sock_sendall(sock, request)
+                length, already = await self._read_headers(sock, view)
+                counter[0] += already
+                remaining = length - already
+                while remaining > 0:
+                    n = await loop.sock_recv_into(sock, view[:min(remaining, _RECV_BUFFER)])
+                    if not n:
+                        raise ConnectionError("server closed the connection")
+                    counter[0] += n
+                    remaining -= n
+        finally:
+            sock.close()
+
+    async def _upload(self, counter):
+        loop = asyncio.get_running_loop()
+        view = memoryview(bytearray(_RECV_BUFFER))
+        payload = memoryview(os.urandom(_SEND_CHUNK))
+        size = self.endpoint.upload_size
+        request = self._request('POST', self.endpoint.upload_path(), size)
+        sock = await self._connect()
+        try:
+            while True:
+                await loop.sock_sendall(sock, request)
+                remaining = size
+                while remaining > 0:
+                    chunk = payload[:min(remaining, _SEND_CHUNK)]
+                    await loop.sock_sendall(sock, chunk)
+                    counter[0] += len(chunk)
+                    remaining -= len(chunk)
+                length, already = await self._read_headers(sock, view)
+                remaining = length - already
+                while remaining > 0:
+                    n = await loop.sock_recv_into(sock, view[:remaining])
+                    if not n:
+                        raise ConnectionError("server closed the connection")
+                    remaining -= n
+        finally:
+            sock.close()
+
+
+def run_speed_test(on_progress=None, on_sample=None, server=None, **options):
+    """
+    Runs a speed test against `server` (see select_endpoint). Returns
+    (download Mbps, upload Mbps, ping ms); on_progress receives status
+    messages along the way. Use SpeedTestEngine directly for the full
+    SpeedResult and cancellation.
+    """
+    progress = on_progress or (lambda message: None)
+    progress("Finding best server...")
+    endpoint = select_endpoint(server)
+    try:
+        result = SpeedTestEngine(endpoint, on_sample=on_sample, on_progress=progress,
+                                 **options).run()
+    finally:
+        endpoint.close()
+    return result.download_mbps, result.upload_mbps, result.idle_latency_ms
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+# Bridges the callback-style core scanners to async iterators.
+#
+# A blocking scanner call runs in a daemon thread; every callback value is
+# handed to the consuming event loop, so callers can write
+#     async for device in stream(scanner.scan):
+# without caring which thread produced it.
+
+_DONE = object()
+
+
+async def stream(run, *args, callback='on_result', stop=None, **kwargs):
+    """
+    Runs run(*args, <callback>=push, **kwargs) in a thread and yields each
+    pushed value. `stop` is called when the consumer stops iterating early.
+    """
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue()
+    failure = []
+
+    def push(item):
+        loop.call_soon_threadsafe(items.put_nowait, item)
+
+    def target():
+        try:
+            run(*args, **{callback: push}, **kwargs)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            loop.call_soon_threadsafe(items.put_nowait, _DONE)
+
+    threading.Thread(target=target, name=f"stream-{getattr(run, '__name__', 'run')}",
+                     daemon=True).start()
+    finished = False
+    try:
+        while True:
+            item = await items.get()
+            if item is _DONE:
+                finished = True
+                break
+            yield item
+    finally:
+        if not finished and stop is not None:
+            stop()
+    if failure:
+        raise failure[0]
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import deque
+
+from utils.trace import get_tracer
+
+# Coalescing update bus between the background workers and the widgets.
+#
+# Workers publish results as fast as they come (a ping sample per probe, a
+# device per answer, a scan every few seconds, bursts when requests pile
+# up); widgets only need to redraw as often as the screen can show it.
+# publish() may be called from any thread and only stores the value under
+# its topic:
+#
+#   - a plain topic keeps the latest snapshot; one that is replaced before
+#     it was shown counts as a dropped frame
+#   - a topic subscribed with `merge` folds each value into the pending one
+#     (e.g. appends samples to a list), so nothing is lost, it is just
+#     handed over in one piece
+#
+# dispatch() runs on the UI thread at most `fps` times a second and hands
+# each pending topic's value to its handler, the topic waiting longest
+# first. Once a frame has used `budget_ms` the remaining topics wait for
+# the next frame, so a slow chart cannot freeze the window; at least one
+# topic is handled per frame, so nothing starves either.
+#
+# The bus does not own a timer: `wake` is called (from the publishing
+# thread) when a value arrives while nothing was pending, and the UI side
+# (ui.frame_pump) then schedules dispatch() after next_frame() seconds.
+
+tracer = get_tracer('update_bus')
+
+FPS = 30
+# Handler time per frame, ms; leaves the rest of a 30 fps frame for painting
+BUDGET_MS = 12
+# Latencies and frame times kept for the percentiles in metrics()
+WINDOW = 512
+
+
+def append(pending, value):
+    """`merge` that collects every value published between frames in a list."""
+    if pending is None:
+        return [value]
+    pending.append(value)
+    return pending
+
+
+def extend(pending, values):
+    """`merge` that concatenates published lists."""
+    if pending is None:
+        return list(values)
+    pending.extend(values)
+    return pending
+
+
+class _Topic:
+    __slots__ = ('name', 'handler', 'merge', 'value', 'pending', 'since')
+
+    def __init__(self, name, handler, merge):
+        self.name = name
+        self.handler = handler
+        self.merge = merge
+        self.value = None
+        self.pending = False
+        # When the oldest value not yet handled was published
+        self.since = 0.0
+
+
+class UpdateBus:
+    """
+    Hands widgets the latest published value of each topic, at most `fps`
+    times a second; see the module comment. `clock` returns seconds.
+    """
+    def __init__(self, fps=FPS, budget_ms=BUDGET_MS, wake=None, clock=time.monotonic):
+        self.frame_interval = 1.0 / fps
+        self.budget = budget_ms / 1000
+        self.wake = wake
+        self.clock = clock
+        self._topics = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_frame = float('-inf')
+
+        self.frames = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.deferred = 0
+        self.over_budget = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=WINDOW)
+        self._frame_times = deque(maxlen=WINDOW)
+
+    def subscribe(self, topic, handler, merge=None):
+        """
+        Calls handler(value) on the UI thread with the latest value of
+        `topic`, or with merge(pending, value) folded over everything
+        published since the last frame (pending is None for the first).
+        """
+        with self._lock:
+            self._topics[topic] = _Topic(topic, handler, merge)
+
+    def publish(self, topic, value):
+        """
+        Stores `value` for the next frame; safe from any thread. Values of
+        topics nobody subscribed to are ignored.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._topics.get(topic)
+            if entry is None:
+                return
+            self.published += 1
+            if entry.merge is not None:
+                entry.value = entry.merge(entry.value if entry.pending else None, value)
+                if entry.pending:
+                    self.coalesced += 1
+            else:
+                if entry.pending:
+                    self.dropped += 1
+                entry.value = value
+            if entry.pending:
+                return
+            entry.pending = True
+            entry.since = now
+            self._pending += 1
+            woke = self._pending == 1
+        if woke and self.wake is not None:
+            self.wake()
+
+    def next_frame(self, now=None):
+        """
+        Seconds until the next frame may run, or None when nothing is pending.
+        """
+        with self._lock:
+            if not self._pending:
+                return None
+        now = self.clock() if now is None else now
+        return max(0.0, self._last_frame + self.frame_interval - now)
+
+    def dispatch(self):
+        """
+        Runs one frame on the UI thread. Returns the number of topics handled.
+        """
+        start = self.clock()
+        self._last_frame = start
+        with self._lock:
+            due = sorted((entry for entry in self._topics.values() if entry.pending),
+                         key=lambda entry: entry.since)
+        handled = 0
+        now = start
+        for entry in due:
+            if handled and now - start >= self.budget:
+                self.deferred += len(due) - handled
+                break
+            with self._lock:
+                value, since = entry.value, entry.since
+                entry.value = None
+                entry.pending = False
+                self._pending -= 1
+            try:
+                entry.handler(value)
+            except Exception as e:
+                self.errors += 1
+                print(f"UI update error ({entry.name}): {e}")
+                tracer.error("handler_failed", topic=entry.name, error=repr(e))
+            now = self.clock()
+            handled += 1
+            self.delivered += 1
+            self._latencies.append(now - since)
+        if handled:
+            self.frames += 1
+            elapsed = now - start
+            self._frame_times.append(elapsed)
+            if elapsed > self.budget:
+                self.over_budget += 1
+        return handled
+
+    def metrics(self):
+        """
+        Counters, plus percentiles (ms) of the UI latency (publish to
+        handled) and frame time over the last WINDOW frames.
+        """
+        def percentile(values, q):
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+        latencies = list(self._latencies)
+        frame_times = list(self._frame_times)
+        return {
+            'fps_cap': round(1 / self.frame_interval, 1),
+            'frames': self.frames,
+            'published': self.published,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'deferred': self.deferred,
+            'over_budget': self.over_budget,
+            'errors': self.errors,
+            'latency_p50_ms': percentile(latencies, 0.5),
+            'latency_p95_ms': percentile(latencies, 0.95),
+            'latency_max_ms': round(max(latencies, default=0) * 1000, 2),
+            'frame_p95_ms': percentile(frame_times, 0.95),
+        }
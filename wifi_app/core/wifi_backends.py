@@ -0,0 +1,219 @@
+import glob
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+from utils.iw_parser import parse_iw_scan
+from utils.netsh_parser import parse_netsh_interfaces, parse_netsh_output
+from utils.trace import get_tracer
+
+# Wi-Fi scan backends. A backend has a `name` and a `scan()` that returns a
+# list of AccessPoint records, raising on failure; WifiScanner handles the
+# errors and the scan loop. `available()` says whether it can run here.
+#
+#   netsh   Windows, 'netsh wlan show networks mode=bssid', plus 'show
+#           interfaces' for the connected BSSID
+#   iw      Linux, 'iw dev <iface> scan dump': reads the kernel's nl80211 scan
+#           cache, with a non-blocking 'scan trigger' every rescan_interval
+#           seconds to refresh it, so a cycle costs a dump rather than a
+#           full channel sweep
+#   replay  recorded netsh or iw captures from a file or directory, for
+#           running the scan->parse->render pipeline with no radio
+#
+# select_backend() picks one from a spec ('netsh', 'iw', 'replay:<path>')
+# or, by default, from $PYWIFIMAN_WIFI_BACKEND and then the platform.
+
+tracer = get_tracer('wifi_backends')
+
+_CREATE_NO_WINDOW = 0x08000000
+
+
+def _parse(parser, output, kind):
+    # Only collect parser diagnostics when someone is listening
+    debug_log = [] if tracer.is_enabled() else None
+    networks = parser(output, debug_log)
+    if debug_log:
+        for message in debug_log:
+            tracer.debug("parser", backend=kind, message=message)
+    tracer.debug("parsed", backend=kind, bssids=len(networks))
+    return networks
+
+
+def parse_netsh(output):
+    return _parse(parse_netsh_output, output, 'netsh')
+
+
+def parse_iw(output):
+    return _parse(parse_iw_scan, output, 'iw')
+
+
+class NetshBackend:
+    """
+    Scans with 'netsh wlan show networks mode=bssid', and marks the
+    network the interface is connected to from 'netsh wlan show interfaces'.
+    """
+    name = 'netsh'
+
+    @staticmethod
+    def available():
+        return os.name == 'nt' or shutil.which('netsh') is not None
+
+    @staticmethod
+    def _run(*args):
+        creation_flags = _CREATE_NO_WINDOW if os.name == 'nt' else 0
+        # Using check_output and decoding with cp850 as requested
+        output_bytes = subprocess.check_output(['netsh', 'wlan', 'show', *args],
+                                               creationflags=creation_flags)
+        try:
+            return output_bytes.decode('cp850', errors='replace')
+        except:
+            return output_bytes.decode('utf-8', errors='ignore')
+
+    def scan(self):
+        tracer.debug("netsh_start")
+        output = self._run('networks', 'mode=bssid')
+        tracer.debug("netsh_output", length=len(output))
+        networks = parse_netsh(output)
+        try:
+            associated = set(parse_netsh_interfaces(self._run('interfaces')))
+        except (OSError, subprocess.CalledProcessError) as e:
+            tracer.debug("netsh_interfaces_failed", error=repr(e))
+            associated = ()
+        for ap in networks:
+            if ap.bssid.lower() in associated:
+                ap.associated = True
+        return networks
+
+
+def wireless_interfaces():
+    """
+    Names of the wireless interfaces, from /sys/class/net/*/wireless.
+    """
+    return sorted(os.path.basename(os.path.dirname(path))
+                  for path in glob.glob('/sys/class/net/*/wireless'))
+
+
+class IwBackend:
+    """
+    Reads the nl80211 scan cache with 'iw dev <interface> scan dump'.
+    """
+    name = 'iw'
+
+    def __init__(self, interface=None, rescan_interval=30):
+        self.interface = interface
+        self.rescan_interval = rescan_interval
+        self._last_trigger = None
+
+    @staticmethod
+    def available():
+        return (sys.platform.startswith('linux') and shutil.which('iw') is not None
+                and bool(wireless_interfaces()))
+
+    def _trigger(self):
+        # Asks the driver for a fresh sweep without waiting for it; results
+        # land in the cache for a later dump. Needs CAP_NET_ADMIN, and a
+        # refusal (or EBUSY while another scan runs) just means we keep
+        # reading the cache the system's own scans maintain.
+        now = time.monotonic()
+        if self._last_trigger is not None and now - self._last_trigger < self.rescan_interval:
+            return
+        self._last_trigger = now
+        try:
+            subprocess.Popen(['iw', 'dev', self.interface, 'scan', 'trigger'],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            tracer.debug("iw_trigger", interface=self.interface)
+        except OSError as e:
+            tracer.error("iw_trigger_failed", error=repr(e))
+
+    def scan(self):
+        if self.interface is None:
+            interfaces = wireless_interfaces()
+            if not interfaces:
+                raise RuntimeError("no wireless interface found")
+            self.interface = interfaces[0]
+        self._trigger()
+        tracer.debug("iw_dump_start", interface=self.interface)
+        output = subprocess.check_output(['iw', 'dev', self.interface, 'scan', 'dump'])
+        output = output.decode('utf-8', errors='replace')
+        tracer.debug("iw_output", length=len(output))
+        return parse_iw(output)
+
+
+class ReplayBackend:
+    """
+    Plays back recorded captures, one per scan: a single file or every file
+    in a directory, in name order. netsh and iw captures can be mixed. With
+    `loop` the captures repeat, otherwise scans return [] once they run out.
+    """
+    name = 'replay'
+
+    def __init__(self, path, loop=True):
+        paths = sorted(glob.glob(os.path.join(path, '*'))) if os.path.isdir(path) else [path]
+        self.captures = [self._load(p) for p in paths if os.path.isfile(p)]
+        if not self.captures:
+            raise ValueError(f"no captures found in {path}")
+        self.loop = loop
+        self.position = 0
+
+    @staticmethod
+    def available():
+        return True
+
+    @staticmethod
+    def _load(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            # netsh writes in the console code page
+            text = data.decode('cp850', errors='replace')
+        is_iw = re.search(r'^BSS [0-9a-fA-F]{2}:', text, re.MULTILINE) is not None
+        return (parse_iw if is_iw else parse_netsh), text
+
+    def scan(self):
+        if self.position >= len(self.captures):
+            if not self.loop:
+                return []
+            self.position = 0
+        parse, text = self.captures[self.position]
+        self.position += 1
+        return parse(text)
+
+
+BACKENDS = {
+    'netsh': NetshBackend,
+    'iw': IwBackend,
+    'replay': ReplayBackend,
+}
+
+
+def select_backend(spec=None):
+    """
+    Builds a backend from `spec` ('netsh', 'iw', 'iw:<interface>',
+    'replay:<path>' or 'auto'). Without a spec, $PYWIFIMAN_WIFI_BACKEND is
+    used, then the platform default.
+    """
+    spec = spec or os.environ.get('PYWIFIMAN_WIFI_BACKEND', 'auto')
+    name, _, arg = spec.partition(':')
+    name = name.lower()
+    if name == 'auto':
+        if os.name != 'nt' and IwBackend.available():
+            name = 'iw'
+        else:
+            name = 'netsh'
+    if name not in BACKENDS:
+        raise ValueError(f"unknown Wi-Fi backend {spec!r}, expected one of {', '.join(BACKENDS)}")
+    if name == 'replay':
+        if not arg:
+            raise ValueError("the replay backend needs a path: replay:<file or directory>")
+        backend = ReplayBackend(arg)
+    elif name == 'iw':
+        backend = IwBackend(arg or None)
+    else:
+        backend = NetshBackend()
+    tracer.info("backend_selected", backend=backend.name)
+    return backend
@@ -0,0 +1,99 @@
+import subprocess
+import sys
+
+from core.scan_scheduler import ScanScheduler
+from core.streams import stream
+from core.wifi_backends import parse_netsh, select_backend
+from utils import history, oui
+from utils.trace import get_tracer
+
+tracer = get_tracer('wifi_scanner')
+
+class WifiScanner:
+    """
+    Scans visible Wi-Fi networks through a backend from core.wifi_backends:
+    netsh on Windows, iw on Linux, or replayed captures. `backend` is a
+    backend instance or a spec for select_backend(). run() paces its
+    scans with a ScanScheduler.
+    """
+    def __init__(self, backend=None, scheduler=None):
+        self.backend = backend if hasattr(backend, 'scan') else select_backend(backend)
+        self.scheduler = scheduler or ScanScheduler()
+
+    def scan(self):
+        """
+        Runs one scan on the backend; returns [] if it fails.
+        """
+        try:
+            networks = self.backend.scan()
+            for ap in networks:
+                ap.vendor = sys.intern(oui.vendor(ap.bssid))
+            tracer.info("scan_complete", backend=self.backend.name, networks=len(networks))
+            return networks
+            
+        except subprocess.CalledProcessError as e:
+            print(f"Error scanning wifi (CalledProcessError): {e}", file=sys.stderr)
+            tracer.error("scan_failed", backend=self.backend.name, error=str(e))
+            return []
+        except Exception as e:
+            print(f"Exception during wifi scan: {e}", file=sys.stderr)
+            tracer.error("scan_exception", backend=self.backend.name, error=repr(e))
+            return []
+
+    def parse_netsh_output(self, output):
+        """
+        Parses netsh output into one AccessPoint record per BSSID.
+        See utils.netsh_parser for the parsing engine.
+        """
+        return parse_netsh(output)
+
+    def run(self, on_scan, interval=None):
+        """
+        Scans until stop() is called, passing each list of AccessPoints to
+        on_scan. `interval` resets the scheduler's starting interval; from
+        there it adapts to how fast the results change.
+        """
+        if interval is not None:
+            self.scheduler.interval = self.scheduler.base_interval = interval
+        self.scheduler.start()
+        while self.scheduler.wait():
+            networks = self.scan()
+            self.scheduler.finished(networks)
+            tracer.debug("scan_metrics", **self.scheduler.metrics())
+            on_scan(networks)
+            store = history.get_store()
+            if store is not None and networks:
+                store.record_wifi_scan(networks)
+
+    def stream(self, interval=None):
+        """
+        Async iterator over successive scans.
+        """
+        return stream(self.run, callback='on_scan', stop=self.stop, interval=interval)
+
+    def request_scan(self):
+        """
+        Scans as soon as possible; overlapping requests coalesce. Returns a
+        ticket: scans with `serving` >= it started after this request.
+        """
+        return self.scheduler.request()
+
+    @property
+    def serving(self):
+        """Ticket of the newest request the current (or last) scan answers."""
+        return self.scheduler.serving
+
+    def pause(self):
+        """
+        Holds scheduled scans, e.g. while nobody is looking at the results.
+        """
+        self.scheduler.pause()
+
+    def resume(self):
+        self.scheduler.resume()
+
+    def metrics(self):
+        return self.scheduler.metrics()
+
+    def stop(self):
+        self.scheduler.stop()
@@ -1,14 +1,19 @@
 import sys
 from PySide6.QtWidgets import QApplication
 from ui.main_window import MainWindow
+from utils import history, trace
 
 def main():
+    trace.configure_from_env()
+    history.configure_from_env()
     app = QApplication(sys.argv)
     
     window = MainWindow()
     window.show()
     
-    sys.exit(app.exec())
+    code = app.exec()
+    history.close()
+    sys.exit(code)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,24 @@
+from PySide6.QtCore import QThread, Signal
+
+from core.passive_discovery import PassiveListener
+
+class PassiveDiscoveryWorker(QThread):
+    """
+    Runs the PassiveListener in the background for as long as the app is
+    open, reporting each batch of devices whose hostname, model or services
+    were announced.
+    """
+    devices_updated = Signal(list)
+    # kind ('joined', 'moved' or 'left'), Device
+    device_event = Signal(str, object)
+
+    def __init__(self, arp=True):
+        super().__init__()
+        self.listener = PassiveListener(arp=arp, on_update=self.devices_updated.emit,
+                                        on_event=self.device_event.emit)
+
+    def run(self):
+        self.listener.run()
+
+    def stop(self):
+        self.listener.stop()
@@ -1,54 +1,34 @@
 from PySide6.QtCore import QThread, Signal
-import subprocess
-import time
-import platform
-import re
+
+from core.latency_engine import LatencyEngine
+from utils.trace import get_tracer
+
+tracer = get_tracer('ping_test')
 
 class PingWorker(QThread):
-    # Signal emits (target, latency_ms, loss_percent)
+    # Signal emits (target, latency_ms, loss_percent); latency is NaN for a lost probe
     update_signal = Signal(str, float, float)
 
-    def __init__(self, target="8.8.8.8"):
+    def __init__(self, target="8.8.8.8", targets=None, interval=1.0, method='auto'):
         super().__init__()
         self.target = target
-        self.running = True
+        self.targets = list(targets) if targets else [target]
+        self.engine = LatencyEngine(self.targets, interval=interval, timeout=max(interval, 1.0),
+                                    method=method, on_sample=self.on_sample)
 
     def run(self):
-        # Determine command based on OS
-        param = '-n' if platform.system().lower() == 'windows' else '-c'
-        command = ['ping', param, '1', self.target]
-        
-        while self.running:
-            try:
-                # Run ping command
-                # On Windows, creationflags to hide window
-                creation_flags = 0x08000000 if platform.system().lower() == 'windows' else 0
-                result = subprocess.run(
-                    command,
-                    capture_output=True,
-                    text=True,
-                    creationflags=creation_flags
-                )
-                
-                if result.returncode == 0:
-                    # Parse time
-                    # Windows: "time=14ms" or "time<1ms"
-                    # Linux: "time=14.5 ms"
-                    match = re.search(r'time[=<](\d+)', result.stdout)
-                    latency = float(match.group(1)) if match else 0.0
-                    loss = 0.0
-                else:
-                    latency = 0.0
-                    loss = 100.0
+        try:
+            self.engine.run()
+        except Exception as e:
+            print(f"Ping error: {e}")
+            tracer.error("ping_failed", targets=self.targets, error=repr(e))
+            for target in self.targets:
+                self.update_signal.emit(target, float('nan'), 100.0)
 
-                self.update_signal.emit(self.target, latency, loss)
-                
-            except Exception as e:
-                print(f"Ping error: {e}")
-                self.update_signal.emit(self.target, 0.0, 100.0)
-            
-            time.sleep(1)
+    def on_sample(self, target, seq, rtt, stats):
+        tracer.debug("ping", target=target, seq=seq, latency_ms=rtt, jitter_ms=stats.jitter)
+        self.update_signal.emit(target, rtt if rtt is not None else float('nan'), stats.loss_percent)
 
     def stop(self):
-        self.running = False
+        self.engine.stop()
         self.wait()
@@ -0,0 +1,25 @@
+from PySide6.QtCore import QThread, Signal
+
+from core.port_scanner import PORT_SETS, PortScanner
+
+class PortScanWorker(QThread):
+    """
+    Runs one PortScanner scan over `hosts` (Devices or IPs) off the UI
+    thread, streaming each open port as it is found.
+    """
+    port_found = Signal(object) # PortResult
+    ports_found = Signal(dict) # ip -> [PortResult]
+    metrics_ready = Signal(dict)
+
+    def __init__(self, hosts, tcp_ports=PORT_SETS['common'], udp_ports=()):
+        super().__init__()
+        self.hosts = list(hosts)
+        self.scanner = PortScanner(tcp_ports, udp_ports, on_result=self.port_found.emit)
+
+    def run(self):
+        found = self.scanner.scan(self.hosts)
+        self.metrics_ready.emit(self.scanner.metrics())
+        self.ports_found.emit(found)
+
+    def cancel(self):
+        self.scanner.cancel()
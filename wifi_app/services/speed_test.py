@@ -1,31 +1,63 @@
 from PySide6.QtCore import QThread, Signal
-import speedtest
+
+from core.speed_test import SpeedTestEngine, select_endpoint
 
 class SpeedTestWorker(QThread):
+    """
+    Runs a SpeedTestEngine off the UI thread. `server` is a spec for
+    core.speed_test.select_endpoint ('speedtest', 'local' or a URL).
+    """
     # Signals for progress and results
     progress_signal = Signal(str) # Status messages
+    sample_signal = Signal(str, float, float, float) # phase, elapsed (s), Mbps, loaded latency (ms, NaN if none yet)
     result_signal = Signal(float, float, float) # download (Mbps), upload (Mbps), ping (ms)
+    bufferbloat_signal = Signal(float, float) # idle latency (ms), worst loaded latency (ms)
+    cancelled_signal = Signal()
     error_signal = Signal(str)
 
-    def __init__(self):
+    def __init__(self, server=None, streams=4, duration=10.0):
         super().__init__()
+        self.server = server
+        self.streams = streams
+        self.duration = duration
+        self.engine = None
+        self._cancelled = False
 
     def run(self):
         try:
             self.progress_signal.emit("Finding best server...")
-            st = speedtest.Speedtest()
-            st.get_best_server()
-            
-            self.progress_signal.emit("Testing Download...")
-            download_speed = st.download() / 1_000_000 # Convert to Mbps
-            
-            self.progress_signal.emit("Testing Upload...")
-            upload_speed = st.upload() / 1_000_000 # Convert to Mbps
-            
-            ping = st.results.ping
-            
-            self.progress_signal.emit("Done.")
-            self.result_signal.emit(download_speed, upload_speed, ping)
-            
+            endpoint = select_endpoint(self.server)
+            try:
+                self.engine = SpeedTestEngine(endpoint, streams=self.streams, duration=self.duration,
+                                              on_sample=self._on_sample,
+                                              on_progress=self.progress_signal.emit)
+                if self._cancelled:
+                    self.engine.cancel()
+                result = self.engine.run()
+            finally:
+                endpoint.close()
+            if result.cancelled:
+                self.cancelled_signal.emit()
+                return
+            self.result_signal.emit(result.download_mbps, result.upload_mbps,
+                                    _or_nan(result.idle_latency_ms))
+            if result.bufferbloat_ms is not None:
+                self.bufferbloat_signal.emit(result.idle_latency_ms,
+                                             result.idle_latency_ms + result.bufferbloat_ms)
         except Exception as e:
             self.error_signal.emit(str(e))
+
+    def _on_sample(self, phase, elapsed, mbps, latency):
+        self.sample_signal.emit(phase, elapsed, mbps, _or_nan(latency))
+
+    def cancel(self):
+        """
+        Stops the test from any thread; takes effect within one sample tick
+        once transfers have started.
+        """
+        self._cancelled = True
+        if self.engine is not None:
+            self.engine.cancel()
+
+def _or_nan(value):
+    return float('nan') if value is None else value
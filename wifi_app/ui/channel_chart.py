@@ -0,0 +1,143 @@
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+
+from core.channel_analyzer import BANDS, resolve_centers
+
+# Channel overlap chart renderer.
+#
+# All curves of a frame are computed with one broadcasted NumPy expression
+# (networks x samples) and pushed into a single LineCollection (outlines) and
+# PolyCollection (fills). The collections and axes styling are created once and
+# reused, so a frame is just "replace the vertex data and redraw".
+#
+# Each network is drawn over its real channel width (20-160 MHz around its
+# centre channel) with a flat top and steep skirts. Given a ChannelReport,
+# the per-channel utilization is drawn as bars under the curves and the
+# recommended channels are marked.
+
+CHANNEL_PLANS = {
+    '2.4': {
+        'label': 'Channel (2.4 GHz)',
+        'channels': list(range(1, 15)),
+        'xlim': (1, 14),
+        'ticks': list(range(1, 15)),
+        'samples': 500,
+    },
+    '5': {
+        'label': 'Channel (5 GHz)',
+        'channels': [36, 40, 44, 48, 52, 56, 60, 64,
+                     100, 104, 108, 112, 116, 120, 124, 128, 132, 136, 140, 144,
+                     149, 153, 157, 161, 165],
+        'xlim': (32, 169),
+        'ticks': [36, 44, 52, 60, 100, 108, 116, 124, 132, 140, 149, 157, 165],
+        'samples': 1500,
+    },
+    '6': {
+        'label': 'Channel (6 GHz)',
+        'channels': BANDS['6']['channels'],
+        'xlim': (-5, 239),
+        'ticks': list(range(1, 234, 32)),
+        'samples': 2500,
+    },
+}
+
+BAND_CODES = {'2.4': 24, '5': 5, '6': 6}
+
+COLORS = ['#007acc', '#28a745', '#dc3545', '#ffc107', '#17a2b8', '#e83e8c']
+
+
+def compute_spectra(x, centers, widths, amplitudes):
+    """
+    Returns a (networks, samples) array of flat-topped curves, each as wide
+    as its channel (`widths` in MHz, i.e. widths / 5 channel numbers) and
+    centred on `centers`, evaluated at `x`.
+    """
+    half = widths[:, np.newaxis] / 10.0
+    offsets = (x[np.newaxis, :] - centers[:, np.newaxis]) / half
+    offsets *= offsets
+    offsets *= offsets
+    return amplitudes[:, np.newaxis] / (1.0 + offsets * offsets)
+
+
+class ChannelChartRenderer:
+    """
+    Draws AccessPointBatch frames onto a matplotlib Axes.
+    """
+    def __init__(self, axes, plan='2.4'):
+        self.axes = axes
+        self.fills = PolyCollection([], alpha=0.2, linewidths=0)
+        self.lines = LineCollection([], linewidths=1.5, alpha=0.8)
+        self.usage = PolyCollection([], facecolors='#888888', alpha=0.35, linewidths=0, zorder=0)
+        self.picks = LineCollection([], colors='#28a745', linestyles='--', linewidths=1.5)
+        axes.add_collection(self.usage)
+        axes.add_collection(self.fills)
+        axes.add_collection(self.lines)
+        axes.add_collection(self.picks)
+        self._palette = np.array([to_rgba(c) for c in COLORS])
+        self.set_plan(plan)
+
+    def set_plan(self, plan):
+        self.band = plan
+        self.plan = CHANNEL_PLANS[plan]
+        self._channels = np.array(self.plan['channels'], dtype=np.uint16)
+        self._x = np.linspace(*self.plan['xlim'], self.plan['samples'])
+
+        axes = self.axes
+        axes.set_xlabel(self.plan['label'])
+        axes.set_ylabel('Signal Strength')
+        axes.set_ylim(0, 1.1)
+        axes.set_xlim(*self.plan['xlim'])
+        axes.set_xticks(self.plan['ticks'])
+        axes.grid(True, linestyle='--', alpha=0.3)
+
+    def update(self, batch, report=None):
+        """
+        Replaces the curves with the networks of `batch` in the current
+        band, and the utilization bars and recommendation markers with
+        those of `report` (a ChannelReport), if given.
+        """
+        bands = np.frombuffer(batch.band, dtype=np.uint8)
+        channels = np.frombuffer(batch.channel, dtype=np.uint16)
+        amplitudes = np.frombuffer(batch.signal, dtype=np.uint8) / 100.0
+        widths = np.frombuffer(batch.width, dtype=np.uint16)
+        centers = np.frombuffer(batch.center, dtype=np.uint16)
+
+        # Keep the index in the full scan so colours stay stable per row
+        index = np.flatnonzero((bands == BAND_CODES[self.band]) & np.isin(channels, self._channels))
+        widths = np.maximum(widths[index], 20).astype(np.float64)
+        centers = resolve_centers(bands[index], channels[index], widths, centers[index])
+        x = self._x
+        y = compute_spectra(x, centers.astype(np.float64), widths, amplitudes[index])
+
+        n, samples = y.shape
+        outlines = np.empty((n, samples, 2))
+        outlines[:, :, 0] = x
+        outlines[:, :, 1] = y
+
+        # Close each fill polygon along the baseline
+        fills = np.zeros((n, samples + 2, 2))
+        fills[:, 1:-1] = outlines
+        fills[:, 0, 0] = x[0]
+        fills[:, -1, 0] = x[-1]
+
+        colors = self._palette[index % len(self._palette)]
+        self.lines.set_segments(outlines)
+        self.lines.set_color(colors)
+        self.fills.set_verts(fills)
+        self.fills.set_facecolor(colors)
+
+        bars = []
+        picks = []
+        if report is not None:
+            table = report.bands[self.band]
+            # One bar per 20 MHz channel, 4 channel numbers wide (1 in 2.4 GHz)
+            half = 0.4 if self.band == '2.4' else 1.6
+            level = np.minimum(table['utilization'], 1.05)
+            for channel, height in zip(table['channels'].tolist(), level.tolist()):
+                if height > 0:
+                    bars.append([(channel - half, 0), (channel - half, height),
+                                 (channel + half, height), (channel + half, 0)])
+            picks = [[(r.channel, 0), (r.channel, 1.1)] for r in report.best(self.band)]
+        self.usage.set_verts(bars)
+        self.picks.set_segments(picks)
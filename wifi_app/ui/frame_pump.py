@@ -0,0 +1,68 @@
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+from core.update_bus import UpdateBus
+
+# Drives a core.update_bus.UpdateBus from the Qt event loop.
+#
+# Worker signals are connected to UpdateBus.publish with a direct
+# connection (route()), so a burst of emissions only overwrites or merges
+# the pending value in the worker's thread instead of queueing one slot
+# call per emission on the UI thread. The first value after an idle
+# period emits `_wake`, which crosses to the UI thread and starts a
+# single-shot timer for the next frame; the timer re-arms itself only
+# while something is pending, so an idle window gets no wake-ups.
+
+_shared = None
+
+
+class FramePump(QObject):
+    """
+    Runs bus.dispatch() on this object's (the UI) thread, frame by frame.
+    """
+    _wake = Signal()
+
+    def __init__(self, bus, parent=None):
+        super().__init__(parent)
+        self.bus = bus
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.frame)
+        self._wake.connect(self.schedule, Qt.QueuedConnection)
+        bus.wake = self._wake.emit
+
+    def schedule(self):
+        if self.timer.isActive():
+            return
+        delay = self.bus.next_frame()
+        if delay is not None:
+            self.timer.start(round(delay * 1000))
+
+    def frame(self):
+        self.bus.dispatch()
+        self.schedule()
+
+
+def shared_bus():
+    """
+    The UpdateBus all tabs share, so they split one frame budget. Needs a
+    QApplication.
+    """
+    global _shared
+    if _shared is None:
+        _shared = FramePump(UpdateBus())
+    return _shared.bus
+
+
+def route(signal, bus, topic, convert=None):
+    """
+    Publishes every emission of `signal` to `topic`, from the emitting
+    thread. The value is the signal's argument, the tuple of its arguments
+    when it has several, or convert(*args).
+    """
+    def publish(*args):
+        if convert is not None:
+            bus.publish(topic, convert(*args))
+        else:
+            bus.publish(topic, args[0] if len(args) == 1 else args)
+    signal.connect(publish, Qt.DirectConnection)
@@ -1,10 +1,21 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, 
                                QTabWidget, QLabel, QStatusBar)
+from PySide6.QtCore import QEvent, QTimer
 from PySide6.QtGui import QIcon
+import importlib
 
-from ui.wifi_tab import WifiTab
-from ui.network_tab import NetworkTab
-from ui.test_tab import TestTab
+from ui.frame_pump import shared_bus
+
+# Tabs are built the first time they are shown, so their modules and heavy
+# dependencies (matplotlib, pyqtgraph, NumPy) and their worker threads only
+# load when needed. The first tab is built right after the window's first
+# paint rather than before it.
+TABS = [
+    ("Wi-Fi Scanner", 'ui.wifi_tab', 'WifiTab'),
+    ("Local Network", 'ui.network_tab', 'NetworkTab'),
+    ("Speed & Latency", 'ui.test_tab', 'TestTab'),
+    ("Site Survey", 'ui.survey_tab', 'SurveyTab'),
+]
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -23,9 +34,13 @@ class MainWindow(QMainWindow):
         
         # Tabs
         self.tabs = QTabWidget()
-        self.tabs.addTab(WifiTab(), "Wi-Fi Scanner")
-        self.tabs.addTab(NetworkTab(), "Local Network")
-        self.tabs.addTab(TestTab(), "Speed & Latency")
+        self.pages = {}
+        for title, _, _ in TABS:
+            placeholder = QWidget()
+            QVBoxLayout(placeholder).setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(placeholder, title)
+        self.tabs.currentChanged.connect(self.build_tab)
+        self.tabs.installEventFilter(self)
         
         layout.addWidget(self.tabs)
         
@@ -34,22 +49,72 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ready")
 
+        # Dropped frames and UI latency of the update bus the tabs share
+        self.ui_stats = QLabel("")
+        self.ui_stats.setStyleSheet("color: gray;")
+        self.status_bar.addPermanentWidget(self.ui_stats)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_ui_stats)
+        self.stats_timer.start(2000)
+
+    def update_ui_stats(self):
+        metrics = shared_bus().metrics()
+        if not metrics['frames']:
+            return
+        self.ui_stats.setText(f"UI latency p95 {metrics['latency_p95_ms']:.0f} ms, "
+                              f"{metrics['dropped']} frames dropped")
+        self.ui_stats.setToolTip(", ".join(f"{key}: {value}" for key, value in metrics.items()))
+
+    def eventFilter(self, watched, event):
+        if watched is self.tabs and event.type() == QEvent.Paint:
+            # First frame is on screen, now build the visible tab
+            self.tabs.removeEventFilter(self)
+            QTimer.singleShot(0, lambda: self.build_tab(self.tabs.currentIndex()))
+        return super().eventFilter(watched, event)
+
+    def build_tab(self, index):
+        """
+        Imports and constructs the tab at `index` on its first activation.
+        """
+        if index < 0 or index in self.pages:
+            return self.pages.get(index)
+        _, module, name = TABS[index]
+        self.status_bar.showMessage(f"Loading {TABS[index][0]}...")
+        page = getattr(importlib.import_module(module), name)()
+        self.tabs.widget(index).layout().addWidget(page)
+        page.show()
+        self.pages[index] = page
+        self.status_bar.showMessage("Ready")
+        return page
+
     def closeEvent(self, event):
         """Handle application closure to stop all threads safely."""
-        # Stop WifiTab worker
-        if hasattr(self.tabs.widget(0), 'worker'):
-            self.tabs.widget(0).worker.stop()
-            self.tabs.widget(0).worker.wait(1000) # Wait up to 1s
+        # Tabs that were never opened have no workers to stop
+        wifi_tab = self.pages.get(0)
+        if hasattr(wifi_tab, 'worker'):
+            wifi_tab.worker.stop()
+            wifi_tab.worker.wait(1000) # Wait up to 1s
         
+        network_tab = self.pages.get(1)
+        if network_tab is not None:
+            network_tab.stop()
+        
+        survey_tab = self.pages.get(3)
+        if survey_tab is not None:
+            survey_tab.worker.stop()
+
         # Stop TestTab workers
-        test_tab = self.tabs.widget(2)
+        test_tab = self.pages.get(2)
         if hasattr(test_tab, 'ping_google'):
             test_tab.ping_google.stop()
             test_tab.ping_google.wait(1000)
         
         if hasattr(test_tab, 'speed_worker') and test_tab.speed_worker:
-            test_tab.speed_worker.terminate() # Speedtest is blocking, terminate might be needed if it hangs
-            test_tab.speed_worker.wait(1000)
+            test_tab.speed_worker.cancel()
+            if not test_tab.speed_worker.wait(1000):
+                # Still blocked in speedtest.net server selection
+                test_tab.speed_worker.terminate()
+                test_tab.speed_worker.wait(1000)
         
         # Accept close event
         event.accept()
@@ -97,7 +162,7 @@ class MainWindow(QMainWindow):
                 background-color: #555;
                 color: #888;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #333;
                 gridline-color: #555;
                 border: none;
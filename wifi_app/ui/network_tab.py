@@ -1,17 +1,15 @@
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTableWidget, 
-                               QTableWidgetItem, QHeaderView, QLabel,
-                               QHBoxLayout, QPushButton, QProgressBar)
-from PySide6.QtCore import QThread, Signal
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTableView,
+                               QHeaderView, QLabel, QHBoxLayout,
+                               QPushButton, QProgressBar, QComboBox)
 
-from services.network_scanner import NetworkScanner
+from core.interfaces import list_interfaces
+from core.update_bus import append, extend
 
-class ScanWorker(QThread):
-    finished = Signal(list)
-    
-    def run(self):
-        scanner = NetworkScanner()
-        devices = scanner.scan_network_enhanced()
-        self.finished.emit(devices)
+from services.network_scanner import NetworkScanWorker
+from services.passive_discovery import PassiveDiscoveryWorker
+from services.port_scanner import PortScanWorker
+from ui.frame_pump import route, shared_bus
+from ui.table_models import DeviceTableModel
 
 class NetworkTab(QWidget):
     def __init__(self):
@@ -27,11 +25,33 @@ class NetworkTab(QWidget):
         title.setStyleSheet("font-size: 18px; font-weight: bold;")
         header_layout.addWidget(title)
         
+        self.iface_combo = QComboBox()
+        self.iface_combo.addItem("All interfaces", None)
+        for interface in list_interfaces():
+            self.iface_combo.addItem(f"{interface.name} ({interface.network})", [interface.name])
+        header_layout.addWidget(self.iface_combo)
+
         refresh_btn = QPushButton("Scan Network")
         refresh_btn.clicked.connect(self.start_scan)
         header_layout.addWidget(refresh_btn)
+
+        full_btn = QPushButton("Full Sweep")
+        full_btn.setToolTip("Probe every address in the subnet instead of only stale devices")
+        full_btn.clicked.connect(lambda: self.start_scan(full=True))
+        header_layout.addWidget(full_btn)
+
+        self.ports_btn = QPushButton("Scan Ports")
+        self.ports_btn.setToolTip("Probe common TCP ports and identify services on the listed devices")
+        self.ports_btn.clicked.connect(self.toggle_port_scan)
+        header_layout.addWidget(self.ports_btn)
+        self.port_worker = None
+        self.worker = None
         
         layout.addLayout(header_layout)
+
+        self.events_label = QLabel("")
+        self.events_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.events_label)
         
         self.progress = QProgressBar()
         self.progress.setRange(0, 0) # Indeterminate
@@ -39,34 +59,113 @@ class NetworkTab(QWidget):
         layout.addWidget(self.progress)
         
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["IP Address", "MAC Address", "Hostname", "Type"])
+        self.model = DeviceTableModel(self)
+        
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         
         layout.addWidget(self.table)
         
         self.setLayout(layout)
 
-    def start_scan(self):
+        # Scan results and announcements reach the table through the update
+        # bus: devices found between two frames are upserted together. Every
+        # topic of a scan is published before its final device list, so the
+        # bus (oldest first) hands that list over last.
+        self.bus = shared_bus()
+        self.bus.subscribe('network.upserts', self.on_devices_announced, merge=extend)
+        self.bus.subscribe('network.events', self.on_device_events, merge=append)
+        self.bus.subscribe('network.interfaces', self.on_interfaces_scanned, merge=append)
+        self.bus.subscribe('network.devices', self.on_scan_finished)
+        self.bus.subscribe('network.ports', self.model.add_services, merge=append)
+
+        # Listens for mDNS/SSDP/NetBIOS/ARP announcements while the tab exists
+        self.listener = PassiveDiscoveryWorker()
+        route(self.listener.devices_updated, self.bus, 'network.upserts')
+        self.listener.start()
+
+    def start_scan(self, full=False):
+        # One scan at a time: a second worker would publish into the same topics
+        if self.worker is not None and self.worker.isRunning():
+            self.events_label.setText("A scan is already running")
+            return
+        # Keep the previous results visible, the model diffs them on completion
         self.progress.setVisible(True)
-        self.table.setRowCount(0)
+        self.events = {'joined': 0, 'moved': 0, 'left': 0}
+        
+        self.timings = []
         
-        self.worker = ScanWorker()
-        self.worker.finished.connect(self.on_scan_finished)
+        self.worker = NetworkScanWorker(full=full, interfaces=self.iface_combo.currentData())
+        route(self.worker.device_found, self.bus, 'network.upserts',
+              convert=lambda device: (device,))
+        route(self.worker.device_event, self.bus, 'network.events')
+        route(self.worker.interface_scanned, self.bus, 'network.interfaces')
+        route(self.worker.devices_found, self.bus, 'network.devices')
         self.worker.start()
         
+    def on_device_events(self, events):
+        for kind, device in events:
+            self.events[kind] += 1
+
+    def on_interfaces_scanned(self, timings):
+        self.timings += timings
+        self.events_label.setText("Scanned " + self.timing_summary())
+
+    def timing_summary(self):
+        return ", ".join(f"{t['interface']} {t['network']} in {t['elapsed_s']:.1f} s"
+                         + (" (failed)" if t['error'] else "") for t in self.timings)
+
+    def on_devices_announced(self, devices):
+        for device in devices:
+            self.model.upsert(device)
+
     def on_scan_finished(self, devices):
         self.progress.setVisible(False)
+        changes = [f"{count} {kind}" for kind, count in self.events.items() if count]
+        self.events_label.setText(f"{len(devices)} devices present"
+                                  + (": " + ", ".join(changes) if changes else ", no changes")
+                                  + (" | " + self.timing_summary() if self.timings else ""))
+        if not self.timings:
+            self.events_label.setText("No network interface to scan")
         self.update_table(devices)
 
     def update_table(self, devices):
-        self.table.setRowCount(0)
-        for dev in devices:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            self.table.setItem(row, 0, QTableWidgetItem(dev.get('ip', '')))
-            self.table.setItem(row, 1, QTableWidgetItem(dev.get('mac', '')))
-            self.table.setItem(row, 2, QTableWidgetItem(dev.get('hostname', '')))
-            self.table.setItem(row, 3, QTableWidgetItem(dev.get('type', '')))
+        self.model.update(devices)
+
+    def toggle_port_scan(self):
+        if self.port_worker is not None and self.port_worker.isRunning():
+            self.ports_btn.setEnabled(False)
+            self.port_worker.cancel()
+            return
+        hosts = [self.model.record(row) for row in range(self.model.rowCount())]
+        if not hosts:
+            self.events_label.setText("Scan the network first")
+            return
+        self.model.clear_services()
+        self.ports_btn.setText("Cancel")
+        self.events_label.setText(f"Scanning ports on {len(hosts)} devices...")
+
+        self.port_worker = PortScanWorker(hosts)
+        route(self.port_worker.port_found, self.bus, 'network.ports')
+        self.port_worker.metrics_ready.connect(self.on_port_scan_finished)
+        self.port_worker.start()
+
+    def on_port_scan_finished(self, metrics):
+        self.ports_btn.setText("Scan Ports")
+        self.ports_btn.setEnabled(True)
+        self.events_label.setText(f"{metrics['open']} open ports, {metrics['probes']} probes "
+                                  f"in {metrics['elapsed_s']:.1f} s")
+
+    def stop(self):
+        """Stops the scans, if any are running, and the listener before the window closes."""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait(3000)
+        if self.port_worker is not None:
+            self.port_worker.cancel()
+            self.port_worker.wait(1000)
+        self.listener.stop()
+        self.listener.wait(1000)
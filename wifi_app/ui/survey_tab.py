@@ -0,0 +1,187 @@
+import numpy as np
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QHBoxLayout,
+                               QPushButton, QComboBox, QFileDialog)
+
+from matplotlib.image import imread
+
+from core.site_survey import SiteSurvey
+from core.update_bus import append
+from services.wifi_scanner import WifiScannerWorker
+from ui.frame_pump import route, shared_bus
+from ui.wifi_tab import MplCanvas
+
+# Walk-through site survey: click where you stand on the floor plan, the
+# next scan is recorded there, and the heatmap under the plan is updated
+# for just that sample's neighbourhood (see core.site_survey). The image
+# artists are created once; a new sample only swaps their data.
+#
+# The scan worker stays paused, so it only scans when a click asks it to,
+# and a click keeps its request's ticket: a scan that was already running
+# when the user clicked answers an older ticket and is not recorded at the
+# new position. Scans reach the tab through the shared update bus.
+
+# Plan size when no floor plan image is loaded
+BLANK_PLAN = (1000, 600)
+
+
+class SurveyTab(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.survey = SiteSurvey(*BLANK_PLAN)
+        self.pending = None
+        self.plan_image = None
+        self.init_ui()
+
+        self.worker = WifiScannerWorker()
+        self.worker.pause()
+        self.bus = shared_bus()
+        self.bus.subscribe('survey.scans', self.on_scans_served, merge=append)
+        route(self.worker.scan_served, self.bus, 'survey.scans')
+        self.worker.start()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        header_layout = QHBoxLayout()
+        title = QLabel("Site Survey")
+        title.setStyleSheet("font-size: 18px; font-weight: bold;")
+        header_layout.addWidget(title)
+
+        self.view_combo = QComboBox()
+        self.view_combo.addItem("Best signal", None)
+        self.view_combo.currentIndexChanged.connect(self.redraw_heatmap)
+        header_layout.addWidget(self.view_combo)
+
+        plan_btn = QPushButton("Load Floor Plan")
+        plan_btn.clicked.connect(self.load_floor_plan)
+        header_layout.addWidget(plan_btn)
+
+        open_btn = QPushButton("Open Survey")
+        open_btn.clicked.connect(self.open_survey)
+        header_layout.addWidget(open_btn)
+
+        save_btn = QPushButton("Save Survey")
+        save_btn.clicked.connect(self.save_survey)
+        header_layout.addWidget(save_btn)
+
+        layout.addLayout(header_layout)
+
+        self.status_label = QLabel("Click your position on the plan to record a scan there")
+        self.status_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.status_label)
+
+        self.canvas = MplCanvas(self, width=8, height=5, dpi=100)
+        self.canvas.mpl_connect('button_press_event', self.on_click)
+        layout.addWidget(self.canvas)
+        self.setLayout(layout)
+        self.reset_axes()
+
+    def reset_axes(self):
+        """
+        Recreates the plan, heatmap and marker artists for the current survey.
+        """
+        axes = self.canvas.axes
+        axes.clear()
+        heatmap = self.survey.heatmap
+        width, height = heatmap.width, heatmap.height
+        if self.plan_image is not None:
+            axes.imshow(self.plan_image, extent=(0, width, height, 0), zorder=0)
+        self.heat_image = axes.imshow(heatmap.best(), extent=heatmap.extent, vmin=0, vmax=100,
+                                      cmap='RdYlGn', alpha=0.55, interpolation='bilinear',
+                                      zorder=1)
+        self.points = axes.scatter([], [], s=6, c='white', zorder=2)
+        self.marker, = axes.plot([], [], marker='+', markersize=16, color='#007acc', zorder=3)
+        axes.set_xlim(0, width)
+        axes.set_ylim(height, 0)
+        axes.set_aspect('equal')
+        self.view_combo.blockSignals(True)
+        self.view_combo.clear()
+        self.view_combo.addItem("Best signal", None)
+        for bssid in heatmap.bssids:
+            self.add_view(bssid)
+        self.view_combo.blockSignals(False)
+        self.update_points()
+        self.redraw_heatmap()
+
+    def add_view(self, bssid):
+        self.view_combo.addItem(f"{self.survey.ssids.get(bssid) or '(hidden)'} ({bssid})", bssid)
+
+    def on_click(self, event):
+        if event.inaxes is not self.canvas.axes or event.xdata is None:
+            return
+        self.marker.set_data([event.xdata], [event.ydata])
+        self.status_label.setText("Scanning...")
+        self.canvas.draw_idle()
+        self.pending = (event.xdata, event.ydata, self.worker.request_scan())
+
+    def on_scans_served(self, scans):
+        """
+        Records the first of [(ticket, networks)] that answers the pending click.
+        """
+        for ticket, networks in scans:
+            if self.pending is not None and ticket >= self.pending[2]:
+                self.record_scan(networks)
+
+    def record_scan(self, networks):
+        x, y, _ = self.pending
+        self.pending = None
+        known = len(self.survey.heatmap.bssids)
+        self.survey.add_scan(x, y, networks)
+        for bssid in self.survey.heatmap.bssids[known:]:
+            self.add_view(bssid)
+        self.status_label.setText(f"{len(self.survey.samples)} samples, "
+                                  f"{len(self.survey.heatmap.bssids)} BSSIDs; "
+                                  f"{len(networks)} networks at the last point")
+        self.update_points()
+        self.redraw_heatmap()
+
+    def update_points(self):
+        samples = self.survey.samples
+        self.points.set_offsets(np.array([(s.x, s.y) for s in samples]) if samples
+                                else np.empty((0, 2)))
+
+    def redraw_heatmap(self, *_):
+        bssid = self.view_combo.currentData()
+        heatmap = self.survey.heatmap
+        self.heat_image.set_data(heatmap.best() if bssid is None else heatmap.bssid_map(bssid))
+        self.canvas.draw_idle()
+
+    def load_floor_plan(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Floor plan", "",
+                                              "Images (*.png *.jpg *.jpeg *.bmp)")
+        if not path:
+            return
+        try:
+            self.plan_image = imread(path)
+        except Exception as e:
+            self.status_label.setText(f"Could not load {path}: {e}")
+            return
+        height, width = self.plan_image.shape[:2]
+        # A new plan starts a new survey; positions are in its pixels
+        self.survey = SiteSurvey(width, height, floor_plan=path)
+        self.reset_axes()
+
+    def open_survey(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open survey", "", "Survey (*.json)")
+        if not path:
+            return
+        try:
+            self.survey = SiteSurvey.load(path)
+            self.plan_image = imread(self.survey.floor_plan) if self.survey.floor_plan else None
+        except Exception as e:
+            self.status_label.setText(f"Could not open {path}: {e}")
+            return
+        self.status_label.setText(f"{len(self.survey.samples)} samples loaded")
+        self.reset_axes()
+
+    def save_survey(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save survey", "survey.json",
+                                              "Survey (*.json)")
+        if not path:
+            return
+        try:
+            self.survey.save(path)
+        except OSError as e:
+            self.status_label.setText(f"Could not save {path}: {e}")
+            return
+        self.status_label.setText(f"Saved {len(self.survey.samples)} samples to {path}")
@@ -0,0 +1,343 @@
+import ipaddress
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# Table models that diff each new scan against what is already displayed.
+#
+# Rows are keyed (BSSID for access points, MAC for devices). An update only
+# emits rowsRemoved/rowsInserted for keys that left/appeared and dataChanged
+# for rows whose values actually changed, so views keep their selection and
+# scroll position and don't rebuild every cell on each refresh. Sorting is
+# done by the model itself (QTableView.setSortingEnabled calls sort()), which
+# keeps the sort order across updates without a QSortFilterProxyModel calling
+# back into Python for every comparison. Records streamed in one at a time
+# (upsert) are placed at their sorted position by binary search instead of
+# re-sorting the whole table.
+
+# Resolved once: looking up and comparing Qt enum members costs several
+# microseconds per access in PySide6, and data() runs for every visible cell
+# and role on each repaint.
+DISPLAY_ROLE = Qt.DisplayRole.value
+SORT_ROLE = Qt.UserRole.value
+HORIZONTAL = Qt.Horizontal
+DESCENDING = Qt.DescendingOrder
+
+
+class RecordTableModel(QAbstractTableModel):
+    """
+    Base model: subclasses define `headers`, key() and values().
+    """
+    headers = []
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._records = []
+        self._values = []
+        self._display = []
+        self._rows = {}
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+
+    def key(self, record):
+        raise NotImplementedError
+
+    def values(self, record):
+        """Raw per-column values, also used as the sort role."""
+        raise NotImplementedError
+
+    def display(self, column, value):
+        return str(value)
+
+    def _format(self, values):
+        return [self.display(column, value) for column, value in enumerate(values)]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._records)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=DISPLAY_ROLE):
+        if role == DISPLAY_ROLE and orientation == HORIZONTAL:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=DISPLAY_ROLE):
+        if role == DISPLAY_ROLE:
+            return self._display[index.row()][index.column()]
+        if role == SORT_ROLE:
+            return self._values[index.row()][index.column()]
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self._resort()
+
+    def _resort(self):
+        """
+        Reorders rows for the current sort column, remapping persistent
+        indexes so the view's selection follows its rows.
+        """
+        column = self._sort_column
+        if column < 0 or not self._records:
+            return
+        values = self._values
+        order = sorted(range(len(values)), key=lambda row: values[row][column],
+                       reverse=self._sort_order == DESCENDING)
+        if all(old == new for new, old in enumerate(order)):
+            return
+
+        self.layoutAboutToBeChanged.emit()
+        moved_to = [0] * len(order)
+        for new, old in enumerate(order):
+            moved_to[old] = new
+        self._records = [self._records[row] for row in order]
+        self._values = [values[row] for row in order]
+        self._display = [self._display[row] for row in order]
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(
+            persistent, [self.index(moved_to[i.row()], i.column()) for i in persistent])
+        self.layoutChanged.emit()
+        self._reindex(0, len(self._records))
+
+    def record(self, row):
+        return self._records[row]
+
+    def update(self, records):
+        """
+        Brings the model in line with `records`, emitting only the
+        removals, insertions and changes between the two states (plus a
+        layout change if they moved rows out of sort order).
+        """
+        key = self.key
+        incoming = {}
+        for record in records:
+            incoming[key(record)] = record
+
+        # Removals, bottom-up in contiguous runs
+        removed = [row for row, record in enumerate(self._records) if key(record) not in incoming]
+        while removed:
+            last = removed.pop()
+            first = last
+            while removed and removed[-1] == first - 1:
+                first = removed.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._records[first:last + 1]
+            del self._values[first:last + 1]
+            del self._display[first:last + 1]
+            self.endRemoveRows()
+
+        # In-place changes
+        for row, record in enumerate(self._records):
+            new_record = incoming.pop(key(record))
+            new_values = self.values(new_record)
+            old_values = self._values[row]
+            self._records[row] = new_record
+            if new_values != old_values:
+                self._values[row] = new_values
+                self._display[row] = self._format(new_values)
+                changed = [c for c, value in enumerate(new_values) if value != old_values[c]]
+                self.dataChanged.emit(self.index(row, changed[0]), self.index(row, changed[-1]))
+
+        # Insertions, appended as one block
+        if incoming:
+            first = len(self._records)
+            self.beginInsertRows(QModelIndex(), first, first + len(incoming) - 1)
+            for record in incoming.values():
+                self._records.append(record)
+                values = self.values(record)
+                self._values.append(values)
+                self._display.append(self._format(values))
+            self.endInsertRows()
+
+        self._resort()
+        self._rows = {key(record): row for row, record in enumerate(self._records)}
+
+    def upsert(self, record):
+        """
+        Adds or refreshes a single record without touching the other rows,
+        for results streamed in before a scan completes.
+        """
+        key = self.key(record)
+        values = self.values(record)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._sorted_row(values)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._records.insert(row, record)
+            self._values.insert(row, values)
+            self._display.insert(row, self._format(values))
+            self.endInsertRows()
+            self._reindex(row, len(self._records))
+            return
+        self._records[row] = record
+        old_values = self._values[row]
+        if values == old_values:
+            return
+        self._values[row] = values
+        self._display[row] = self._format(values)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(values) - 1))
+        column = self._sort_column
+        if column >= 0 and values[column] != old_values[column]:
+            self._move(row)
+
+    def _sorted_row(self, values, skip=-1):
+        """
+        Binary search for where a row with `values` goes in the current sort
+        order (after equal rows), ignoring row `skip`; the end when unsorted.
+        """
+        column = self._sort_column
+        count = len(self._values)
+        if column < 0:
+            return count
+        value = values[column]
+        descending = self._sort_order == DESCENDING
+        low, high = 0, count - (skip >= 0)
+        while low < high:
+            middle = (low + high) // 2
+            other = self._values[middle + (0 <= skip <= middle)][column]
+            if (value > other) if descending else (value < other):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _move(self, row):
+        """
+        Moves a row whose sort value changed to its new sorted position.
+        """
+        to = self._sorted_row(self._values[row], skip=row)
+        if to == row:
+            return
+        # Qt's destination counts the moved row itself when moving down
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), to + 1 if to > row else to)
+        for rows in (self._records, self._values, self._display):
+            rows.insert(to, rows.pop(row))
+        self.endMoveRows()
+        self._reindex(min(row, to), max(row, to) + 1)
+
+    def _reindex(self, first, last):
+        key = self.key
+        records = self._records
+        for row in range(first, last):
+            self._rows[key(records[row])] = row
+
+    def row_for_key(self, key):
+        return self._rows.get(key)
+
+
+class AccessPointTableModel(RecordTableModel):
+    headers = ["SSID", "BSSID", "Vendor", "Signal", "Channel", "Security"]
+
+    def key(self, ap):
+        return ap.bssid
+
+    def values(self, ap):
+        return (ap.ssid, ap.bssid, ap.vendor, ap.signal, ap.channel, ap.authentication)
+
+    def display(self, column, value):
+        if column == 3:
+            return f"{value}%"
+        return str(value)
+
+
+class SignalTableModel(AccessPointTableModel):
+    """
+    Access points as SignalTracks (core.signal_tracker): smoothed signal,
+    trend, and how long ago a BSSID missing from the last scan was seen.
+    """
+    headers = ["SSID", "BSSID", "Vendor", "Signal", "Trend", "Channel", "Band", "Radio",
+               "Clients", "Security", "Seen"]
+
+    def key(self, track):
+        return track.bssid
+
+    def values(self, track):
+        ap = track.ap
+        return ((ap.ssid, ap.associated), track.bssid, ap.vendor,
+                (track.signal, int(round(track.dbm))), int(round(track.trend)),
+                (ap.channel, ap.width), ap.band_name(), ap.radio,
+                (ap.stations, ap.utilization), ap.authentication,
+                0 if track.present else int(track.age()))
+
+    def display(self, column, value):
+        if column == 0:
+            ssid, associated = value
+            return f"{ssid} (connected)" if associated else ssid
+        if column == 3:
+            percent, dbm = value
+            return f"{percent}% ({dbm} dBm)"
+        if column == 4:
+            return f"{value:+d} dB/min" if value else "0 dB/min"
+        if column == 5:
+            channel, width = value
+            return f"{channel} ({width} MHz)" if width > 20 else str(channel)
+        if column == 6:
+            return f"{value} GHz"
+        if column == 8:
+            # From the BSS Load element, which not every AP sends
+            stations, utilization = value
+            if stations < 0:
+                return ""
+            return f"{stations} ({utilization}% busy)" if utilization >= 0 else str(stations)
+        if column == 10:
+            return f"{value} s ago" if value else "now"
+        return str(value)
+
+
+def _ip_key(ip):
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return (0, 0)
+    return (address.version, int(address))
+
+
+class DeviceTableModel(RecordTableModel):
+    headers = ["IP Address", "MAC Address", "Vendor", "Hostname", "Model", "Type", "Services"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # MAC -> open PortResults from the last port scan
+        self.services = {}
+
+    def key(self, device):
+        return device.mac
+
+    def values(self, device):
+        # The IP sorts numerically (10.0.0.2 before 10.0.0.10)
+        ports = sorted(self.services.get(device.mac, ()), key=lambda r: (r.protocol, r.port))
+        # Open ports first, then what the device announces about itself
+        services = [result.label() for result in ports] + list(device.services)
+        return ((_ip_key(device.ip), device.ip), device.mac, device.vendor, device.hostname, device.model, device.type,
+                ", ".join(services))
+
+    def display(self, column, value):
+        if column == 0:
+            return value[1]
+        return str(value)
+
+    def add_service(self, result):
+        """
+        Shows an open port on the row of the device at result.ip.
+        """
+        self.add_services([result])
+
+    def add_services(self, results):
+        """
+        add_service() for a batch of results; each row is refreshed once.
+        """
+        by_ip = {device.ip: device for device in self._records}
+        changed = {}
+        for result in results:
+            device = by_ip.get(result.ip)
+            if device is not None:
+                self.services.setdefault(device.mac, []).append(result)
+                changed[device.mac] = device
+        for device in changed.values():
+            self.upsert(device)
+
+    def clear_services(self):
+        self.services = {}
+        self.update(list(self._records))
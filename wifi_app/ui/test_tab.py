@@ -1,28 +1,40 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                               QPushButton, QGridLayout, QFrame)
+                               QPushButton, QGridLayout, QFrame, QFileDialog)
 from PySide6.QtCore import Qt
 import pyqtgraph as pg
+import math
+import time
 
+from core.update_bus import append
 from services.ping_test import PingWorker
 from services.speed_test import SpeedTestWorker
+from ui.frame_pump import route, shared_bus
+from utils.latency_store import LatencyStore
+
+# Points shown on the latency graph; the store keeps far more history
+GRAPH_POINTS = 60
 
 class TestTab(QWidget):
     def __init__(self):
         super().__init__()
         self.init_ui()
         
-        # Ping Workers
+        # Latency history for graphs and export
+        self.latency = LatencyStore()
+        self.started = time.monotonic()
+
+        # Ping Workers. Samples are timestamped as they arrive and handed
+        # over through the update bus, so a burst redraws the graph once.
         self.ping_google = PingWorker("8.8.8.8")
-        self.ping_google.update_signal.connect(self.update_ping_graph)
+        self.bus = shared_bus()
+        self.bus.subscribe('ping', self.update_ping_samples, merge=append)
+        route(self.ping_google.update_signal, self.bus, 'ping',
+              convert=lambda target, latency, loss:
+                  (time.monotonic() - self.started, target, latency, loss))
         self.ping_google.start()
         
         # Speedtest Worker
         self.speed_worker = None
-        
-        # Data for graphs
-        self.ping_data_x = []
-        self.ping_data_y = []
-        self.ptr = 0
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -39,7 +51,7 @@ class TestTab(QWidget):
         btn_layout = QHBoxLayout()
         self.start_btn = QPushButton("Start Speedtest")
         self.start_btn.setMinimumHeight(40)
-        self.start_btn.clicked.connect(self.start_speedtest)
+        self.start_btn.clicked.connect(self.toggle_speedtest)
         btn_layout.addWidget(self.start_btn)
         speed_layout.addLayout(btn_layout)
         
@@ -58,6 +70,9 @@ class TestTab(QWidget):
         results_grid.addWidget(self.ul_label, 0, 1)
         results_grid.addWidget(self.ping_label, 0, 2)
         
+        self.bloat_label = QLabel("Latency under load: -- ms")
+        results_grid.addWidget(self.bloat_label, 1, 0, 1, 3)
+        
         speed_layout.addLayout(results_grid)
         layout.addWidget(speed_frame)
         
@@ -66,60 +81,133 @@ class TestTab(QWidget):
         ping_frame.setFrameShape(QFrame.StyledPanel)
         ping_layout = QVBoxLayout(ping_frame)
         
+        ping_header_layout = QHBoxLayout()
         ping_header = QLabel("Latency Monitor (8.8.8.8)")
         ping_header.setStyleSheet("font-size: 16px; font-weight: bold;")
-        ping_layout.addWidget(ping_header)
+        ping_header_layout.addWidget(ping_header)
+        ping_header_layout.addStretch()
+        export_btn = QPushButton("Export...")
+        export_btn.setToolTip("Save the latency history as CSV or Parquet")
+        export_btn.clicked.connect(self.choose_export)
+        ping_header_layout.addWidget(export_btn)
+        ping_layout.addLayout(ping_header_layout)
         
         self.plot_widget = pg.PlotWidget()
         self.plot_widget.setBackground('k')
         self.plot_widget.setLabel('left', 'Latency (ms)')
         self.plot_widget.setYRange(0, 100) # Initial range
-        self.ping_curve = self.plot_widget.plot(pen='g')
+        self.plot_widget.setLabel('bottom', 'Time (s)')
+        self.ping_curve = self.plot_widget.plot(pen='g', connect='finite')
         
         ping_layout.addWidget(self.plot_widget)
+        
+        self.ping_stats_label = QLabel("p50: -- ms   p95: -- ms   p99: -- ms   Jitter: -- ms   Loss: --%")
+        self.ping_stats_label.setAlignment(Qt.AlignCenter)
+        ping_layout.addWidget(self.ping_stats_label)
+
+        self.export_label = QLabel("")
+        self.export_label.setStyleSheet("color: gray;")
+        self.export_label.setAlignment(Qt.AlignCenter)
+        ping_layout.addWidget(self.export_label)
         layout.addWidget(ping_frame)
         
         self.setLayout(layout)
 
+    def toggle_speedtest(self):
+        if self.speed_worker is not None and self.speed_worker.isRunning():
+            self.start_btn.setEnabled(False)
+            self.status_label.setText("Cancelling...")
+            self.speed_worker.cancel()
+        else:
+            self.start_speedtest()
+
     def start_speedtest(self):
-        self.start_btn.setEnabled(False)
+        self.start_btn.setText("Cancel")
         self.status_label.setText("Starting...")
         
         self.speed_worker = SpeedTestWorker()
         self.speed_worker.progress_signal.connect(self.on_speed_progress)
+        self.speed_worker.sample_signal.connect(self.on_speed_sample)
         self.speed_worker.result_signal.connect(self.on_speed_result)
+        self.speed_worker.bufferbloat_signal.connect(self.on_speed_bufferbloat)
+        self.speed_worker.cancelled_signal.connect(self.on_speed_cancelled)
         self.speed_worker.error_signal.connect(self.on_speed_error)
         self.speed_worker.start()
 
+    def reset_speed_button(self):
+        self.start_btn.setText("Start Speedtest")
+        self.start_btn.setEnabled(True)
+
     def on_speed_progress(self, msg):
         self.status_label.setText(msg)
 
+    def on_speed_sample(self, phase, elapsed, mbps, latency):
+        # Live 10 Hz throughput of the running phase
+        label = self.dl_label if phase == 'download' else self.ul_label
+        label.setText(f"{phase.capitalize()}: {mbps:.2f} Mbps")
+        if not math.isnan(latency):
+            self.bloat_label.setText(f"Latency under load: {latency:.0f} ms")
+
     def on_speed_result(self, dl, ul, ping):
         self.dl_label.setText(f"Download: {dl:.2f} Mbps")
         self.ul_label.setText(f"Upload: {ul:.2f} Mbps")
         self.ping_label.setText(f"Ping: {ping:.0f} ms")
         self.status_label.setText("Test Complete")
-        self.start_btn.setEnabled(True)
+        self.reset_speed_button()
+
+    def on_speed_bufferbloat(self, idle, loaded):
+        self.bloat_label.setText(f"Latency under load: {loaded:.0f} ms (+{loaded - idle:.0f} ms over idle)")
+
+    def on_speed_cancelled(self):
+        self.status_label.setText("Cancelled")
+        self.reset_speed_button()
 
     def on_speed_error(self, err):
         self.status_label.setText(f"Error: {err}")
-        self.start_btn.setEnabled(True)
+        self.reset_speed_button()
 
-    def update_ping_graph(self, target, latency, loss):
+    def update_ping_samples(self, samples):
+        """
+        Stores [(elapsed, target, latency, loss)], then redraws once.
+        """
         try:
-            self.ping_data_y.append(latency)
-            self.ping_data_x.append(self.ptr)
-            self.ptr += 1
+            for elapsed, target, latency, loss in samples:
+                series = self.latency.append(target, elapsed, latency)
+            
+            # Views into the store's ring buffer, no copies
+            self.ping_curve.setData(series.timestamps[-GRAPH_POINTS:], series.rtts[-GRAPH_POINTS:])
             
-            # Keep last 60 points
-            if len(self.ping_data_y) > 60:
-                self.ping_data_y.pop(0)
-                self.ping_data_x.pop(0)
-                
-            self.ping_curve.setData(self.ping_data_x, self.ping_data_y)
+            p = series.percentiles
+            self.ping_stats_label.setText(
+                f"p50: {p['p50']:.1f} ms   p95: {p['p95']:.1f} ms   p99: {p['p99']:.1f} ms   "
+                f"Jitter: {series.jitter:.1f} ms   Loss: {series.loss_rate * 100:.0f}%")
         except Exception as e:
             print(f"Ping graph error: {e}")
 
+    def choose_export(self):
+        path, chosen = QFileDialog.getSaveFileName(self, "Export latency history", "latency.csv",
+                                                   "CSV (*.csv);;Parquet (*.parquet)")
+        if not path:
+            return
+        if chosen.startswith("Parquet") and not path.endswith('.parquet'):
+            path += '.parquet'
+        try:
+            self.export_latency(path)
+        except Exception as e:
+            # Parquet needs pandas and pyarrow, which are optional
+            self.export_label.setText(f"Could not export to {path}: {e}")
+            return
+        self.export_label.setText(f"Exported latency history to {path}")
+
+    def export_latency(self, path):
+        """
+        Saves the latency history; Parquet for a .parquet path, else CSV.
+        """
+        if path.endswith('.parquet'):
+            self.latency.export_parquet(path)
+        else:
+            self.latency.export_csv(path)
+
     def closeEvent(self, event):
         if self.ping_google:
             self.ping_google.stop()
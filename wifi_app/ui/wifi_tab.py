@@ -1,15 +1,22 @@
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTableWidget, 
-                               QTableWidgetItem, QHeaderView, QLabel,
-                               QHBoxLayout, QPushButton)
-from PySide6.QtCore import Qt, Slot
+import time
+
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTableView,
+                               QHeaderView, QLabel, QHBoxLayout,
+                               QPushButton, QComboBox)
 
 import matplotlib
 matplotlib.use('QtAgg')
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
-import numpy as np
 
+from core.channel_analyzer import BANDS, ChannelAnalyzer
+from core.signal_tracker import SignalTracker
+from core.update_bus import append
 from services.wifi_scanner import WifiScannerWorker
+from ui.channel_chart import ChannelChartRenderer
+from ui.frame_pump import route, shared_bus
+from ui.table_models import SignalTableModel
+from utils.records import AccessPointBatch
 
 class MplCanvas(FigureCanvasQTAgg):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
@@ -38,15 +45,30 @@ class WifiTab(QWidget):
         super().__init__()
         self.init_ui()
         
-        # Worker for auto-refresh
+        # Worker for auto-refresh. Scans go through the update bus: every
+        # scan still reaches the tracker, but scans that arrive within one
+        # frame redraw the table and chart once.
         self.worker = WifiScannerWorker()
-        self.worker.networks_found.connect(self.on_networks_found)
+        self.bus = shared_bus()
+        self.bus.subscribe('wifi.networks', self.on_scans, merge=append)
+        route(self.worker.networks_found, self.bus, 'wifi.networks',
+              convert=lambda networks: (time.time(), networks))
         self.worker.start()
 
     def closeEvent(self, event):
         self.worker.stop()
         super().closeEvent(event)
 
+    # Switching tabs and minimising the window both hide this widget; no
+    # point scanning while the results are off screen.
+    def showEvent(self, event):
+        self.worker.resume()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.worker.pause()
+        super().hideEvent(event)
+
     def init_ui(self):
         layout = QVBoxLayout()
         
@@ -56,6 +78,18 @@ class WifiTab(QWidget):
         title.setStyleSheet("font-size: 18px; font-weight: bold;")
         header_layout.addWidget(title)
         
+        self.band_combo = QComboBox()
+        self.band_combo.addItem("2.4 GHz", '2.4')
+        self.band_combo.addItem("5 GHz", '5')
+        self.band_combo.addItem("6 GHz", '6')
+        self.band_combo.currentIndexChanged.connect(self.change_band)
+        header_layout.addWidget(self.band_combo)
+        
+        # Roams and a weakening connection, from the signal tracker
+        self.link_label = QLabel("")
+        self.link_label.setStyleSheet("color: gray;")
+        header_layout.addWidget(self.link_label)
+
         refresh_btn = QPushButton("Force Refresh")
         refresh_btn.clicked.connect(self.scan_networks)
         header_layout.addWidget(refresh_btn)
@@ -64,14 +98,28 @@ class WifiTab(QWidget):
         
         # Matplotlib Chart
         self.canvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.chart = ChannelChartRenderer(self.canvas.axes)
+        self.analyzer = ChannelAnalyzer()
+        self.last_batch = AccessPointBatch()
         layout.addWidget(self.canvas)
 
+        # Least congested channels per band, from the same analysis as the chart
+        self.recommendations = QLabel("Channel recommendations appear after the first scan")
+        self.recommendations.setStyleSheet("color: #bbb;")
+        self.recommendations.setWordWrap(True)
+        layout.addWidget(self.recommendations)
+
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["SSID", "BSSID", "Signal", "Channel", "Security"])
+        # Smoothed per-BSSID signals; rows outlive a scan or two that misses them
+        self.tracker = SignalTracker()
+        self.model = SignalTableModel(self)
+        
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.alternatingRowColors()
+        self.table.setAlternatingRowColors(True)
         self.table.setStyleSheet("gridline-color: #555;")
         
         layout.addWidget(self.table)
@@ -79,84 +127,62 @@ class WifiTab(QWidget):
         self.setLayout(layout)
 
     def scan_networks(self):
-        # Trigger scan manually if needed, but worker loops automatically
-        pass
-
-    @Slot(list)
-    def on_networks_found(self, networks):
-        # Throttle updates if needed, or just proceed. 
-        # Matplotlib draw can be slow.
-        self.update_table(networks)
+        # The worker loops on its own; this just moves the next scan up
+        self.worker.request_scan()
+
+    def on_scans(self, scans):
+        """
+        Folds [(time, networks)] into the tracker, then redraws once.
+        """
+        for now, networks in scans:
+            tracks, events = self.tracker.update(networks, now=now)
+            for kind, event in events:
+                self.show_link_event(kind, event)
+        self.update_table(tracks)
         try:
-            self.update_chart(networks)
+            self.update_chart(self.tracker.batch(tracks))
         except Exception as e:
             print(f"Chart update error: {e}")
 
-    def update_table(self, networks):
-        self.table.setSortingEnabled(False) # Disable sorting while updating
-        self.table.setRowCount(0)
-        for net in networks:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            self.table.setItem(row, 0, QTableWidgetItem(net.get('SSID', 'Unknown')))
-            self.table.setItem(row, 1, QTableWidgetItem(net.get('BSSID', '')))
-            
-            signal = str(net.get('Signal', 0))
-            self.table.setItem(row, 2, QTableWidgetItem(f"{signal}%"))
-            
-            self.table.setItem(row, 3, QTableWidgetItem(str(net.get('Channel', ''))))
-            
-            auth = net.get('Authentication', '')
-            self.table.setItem(row, 4, QTableWidgetItem(auth))
-        self.table.setSortingEnabled(True)
+    def update_table(self, tracks):
+        self.model.update(tracks)
 
-    def update_chart(self, networks):
-        self.canvas.axes.clear()
-        
-        # Setup axes
-        self.canvas.axes.set_xlabel('Channel (2.4 GHz)')
-        self.canvas.axes.set_ylabel('Signal Strength')
-        self.canvas.axes.set_ylim(0, 1.1)
-        self.canvas.axes.set_xlim(1, 14)
-        self.canvas.axes.set_xticks(range(1, 15))
-        self.canvas.axes.grid(True, linestyle='--', alpha=0.3)
-        
-        # Plot Gaussian curves
-        x = np.linspace(1, 14, 500)
-        
-        # Colors for different networks
-        colors = ['#007acc', '#28a745', '#dc3545', '#ffc107', '#17a2b8', '#e83e8c']
-        
-        for i, net in enumerate(networks):
-            try:
-                channel = int(float(net.get('Channel', 0))) # Handle strings or floats
-                if channel > 14 or channel < 1: 
-                    continue
-                    
-                full_signal = int(float(net.get('Signal', 0)))
-                amplitude = full_signal / 100.0
-                
-                sigma = 1.0 
-                y = amplitude * np.exp(-0.5 * ((x - channel) / sigma)**2)
-                
-                color = colors[i % len(colors)]
-                self.canvas.axes.plot(x, y, label=net.get('SSID', '')[:10], color=color, alpha=0.8)
-                self.canvas.axes.fill_between(x, y, alpha=0.2, color=color)
-                
-            except Exception:
-                continue
-        
-        # Re-apply dark theme
-        self.canvas.axes.set_facecolor('#2b2b2b')
-        self.canvas.axes.spines['top'].set_visible(False)
-        self.canvas.axes.spines['right'].set_visible(False)
-        self.canvas.axes.spines['bottom'].set_color('white')
-        self.canvas.axes.spines['left'].set_color('white')
-        self.canvas.axes.tick_params(axis='x', colors='white')
-        self.canvas.axes.tick_params(axis='y', colors='white')
-        self.canvas.axes.yaxis.label.set_color('white')
-        self.canvas.axes.xaxis.label.set_color('white')
-        
+    def show_link_event(self, kind, event):
+        at = time.strftime('%H:%M:%S', time.localtime(event.ts))
+        if kind == 'roamed':
+            text = f"Roamed {event.previous} -> {event.bssid}"
+            if event.dbm is not None and event.previous_dbm is not None:
+                text += f" ({event.previous_dbm:.0f} -> {event.dbm:.0f} dBm)"
+        elif kind == 'connected':
+            text = f"Connected to {event.ssid} ({event.bssid})"
+        elif kind == 'disconnected':
+            text = f"Disconnected from {event.ssid}"
+        else:
+            text = f"{event.ssid} signal falling ({event.dbm:.0f} dBm)"
+        self.link_label.setText(f"{text} at {at}")
+
+    def update_chart(self, batch):
+        """
+        Draws the channel overlap chart from an AccessPointBatch.
+        """
+        self.last_batch = batch
+        # Cached per scan: switching bands on the same scan reuses the report
+        report = self.analyzer.analyze(batch)
+        self.chart.update(batch, report)
+        self.update_recommendations(report)
         # Use draw_idle to be thread-safe(r) / non-blocking
         self.canvas.draw_idle()
+
+    def update_recommendations(self, report):
+        if not report.aps:
+            return
+        parts = []
+        for band in BANDS:
+            best = report.best(band)
+            if best:
+                parts.append(f"<b>{band} GHz</b>: " + ", ".join(r.label() for r in best))
+        self.recommendations.setText("Least congested: " + " &nbsp; ".join(parts))
+
+    def change_band(self, index):
+        self.chart.set_plan(self.band_combo.itemData(index))
+        self.update_chart(self.last_batch)
@@ -0,0 +1,201 @@
+import re
+import struct
+
+# Parsers for the announcements devices broadcast on their own: mDNS
+# (5353), SSDP/UPnP NOTIFY (1900), NetBIOS name registrations (137) and
+# browser datagrams (138), and ARP. Each takes the UDP payload (or, for
+# ARP, the (ip, mac) pair) and the sender's address and returns an
+# Announcement, or None for packets that say nothing about the sender
+# (queries, byebyes, group names). Malformed packets raise.
+
+# TXT keys that carry a model name, most specific first: Google Cast,
+# AirPlay, Apple, printers
+_MODEL_KEYS = ('md', 'model', 'am', 'rpMd', 'usb_MDL', 'ty')
+
+_SSDP_HEADER_RE = re.compile(rb'^([A-Za-z0-9-]+):[ \t]*([^\r\n]*)', re.M)
+_UPNP_TYPE_RE = re.compile(r'^urn:[^:]+:(device|service):([^:]+):\d+$')
+
+
+class Announcement:
+    """
+    What one packet says about its sender. `services` is a tuple of
+    service names ('_airplay._tcp', 'upnp:MediaRenderer', 'smb').
+    """
+    __slots__ = ('source', 'ip', 'mac', 'hostname', 'model', 'services')
+
+    def __init__(self, source, ip, mac=None, hostname='', model='', services=()):
+        self.source = source
+        self.ip = ip
+        self.mac = mac
+        self.hostname = hostname
+        self.model = model
+        self.services = services
+
+    def __repr__(self):
+        return (f"Announcement({self.source}, ip={self.ip!r}, mac={self.mac!r}, "
+                f"hostname={self.hostname!r}, model={self.model!r}, services={self.services!r})")
+
+
+def read_dns_name(data, offset):
+    """
+    Decodes a possibly compressed DNS name at `offset`; returns
+    (name, offset just past it).
+    """
+    labels = []
+    end = None
+    for _ in range(64):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+        elif length == 0:
+            return ".".join(labels), end if end is not None else offset + 1
+        else:
+            labels.append(data[offset + 1:offset + 1 + length].decode('utf-8', 'replace'))
+            offset += 1 + length
+    raise ValueError("DNS name too long or looping")
+
+
+def _strip_local(name):
+    return name[:-len(".local")] if name.endswith(".local") else name
+
+
+def parse_mdns(data, ip):
+    """
+    mDNS responses (announcements): A/SRV records give the hostname, PTR
+    records the DNS-SD service types, TXT records the model.
+    """
+    ident, flags, questions, answers, authority, additional = struct.unpack(">HHHHHH", data[:12])
+    if not flags & 0x8000:
+        return None
+    offset = 12
+    for _ in range(questions):
+        offset = read_dns_name(data, offset)[1] + 4
+    hostname = ''
+    target = ''
+    model = ''
+    services = set()
+    address = bytes(int(part) for part in ip.split('.'))
+    for _ in range(answers + authority + additional):
+        name, offset = read_dns_name(data, offset)
+        rtype, _, _, length = struct.unpack(">HHIH", data[offset:offset + 10])
+        offset += 10
+        rdata = offset
+        offset += length
+        if rtype == 1 and length == 4 and data[rdata:offset] == address:
+            hostname = _strip_local(name)
+        elif rtype == 33:
+            target = _strip_local(read_dns_name(data, rdata + 6)[0])
+        elif rtype == 12:
+            if name.endswith(".in-addr.arpa"):
+                hostname = hostname or _strip_local(read_dns_name(data, rdata)[0])
+            elif name.startswith('_') and not name.startswith('_services._dns-sd'):
+                services.add(_strip_local(name))
+        elif rtype == 16 and not model:
+            txt = {}
+            position = rdata
+            while position < offset:
+                size = data[position]
+                key, _, value = data[position + 1:position + 1 + size].partition(b'=')
+                txt[key.decode('ascii', 'replace')] = value.decode('utf-8', 'replace')
+                position += 1 + size
+            model = next((txt[key] for key in _MODEL_KEYS if txt.get(key)), '')
+    hostname = hostname or target
+    if not (hostname or model or services):
+        return None
+    return Announcement('mdns', ip, hostname=hostname, model=model, services=tuple(sorted(services)))
+
+
+def parse_ssdp(data, ip):
+    """
+    SSDP NOTIFY alive messages and search responses: SERVER gives the
+    model, NT/ST the UPnP device or service type.
+    """
+    first = data.split(b'\r\n', 1)[0]
+    if not (first.startswith(b'NOTIFY') or first.startswith(b'HTTP/1.')):
+        return None
+    headers = {key.upper(): value.decode('utf-8', 'replace').strip()
+               for key, value in _SSDP_HEADER_RE.findall(data)}
+    if headers.get(b'NTS') == 'ssdp:byebye':
+        return None
+    services = ()
+    kind = headers.get(b'NT') or headers.get(b'ST') or ''
+    match = _UPNP_TYPE_RE.match(kind)
+    if match:
+        services = (f"upnp:{match.group(2)}",)
+    # "Linux/4.9 UPnP/1.0 Sonos/70.3 (ZPS12)": drop the OS and UPnP tokens
+    server = headers.get(b'SERVER', '')
+    tokens = server.replace(',', ' ').split()
+    product = [token for i, token in enumerate(tokens)
+               if not token.upper().startswith('UPNP/')
+               and not (i == 0 and '/' in token and len(tokens) > 1)]
+    model = " ".join(product) or server
+    if not (model or services):
+        return None
+    return Announcement('ssdp', ip, model=model, services=services)
+
+
+def decode_netbios_name(encoded):
+    """
+    First-level decoding of a 32-character NetBIOS name; returns
+    (name, suffix byte).
+    """
+    raw = bytes(((encoded[i] - 0x41) << 4) | (encoded[i + 1] - 0x41) for i in range(0, 32, 2))
+    return raw[:15].decode('ascii', 'replace').strip(), raw[15]
+
+
+def parse_netbios_ns(data, ip):
+    """
+    NetBIOS name registrations and refreshes (opcodes 5, 8, 9): the
+    registered workstation/server name is the hostname.
+    """
+    flags = struct.unpack(">H", data[2:4])[0]
+    opcode = (flags >> 11) & 0xF
+    if flags & 0x8000 or opcode not in (5, 8, 9) or data[12] != 0x20:
+        return None
+    name, suffix = decode_netbios_name(data[13:45])
+    # Additional record after the question (12 + 34 + 4): compressed name
+    # (2), type, class, TTL, length (10), then the NB flags' group bit
+    group = len(data) >= 64 and data[62] & 0x80
+    if suffix not in (0x00, 0x20) or group or not name:
+        return None
+    return Announcement('netbios', ip, hostname=name,
+                        services=('smb',) if suffix == 0x20 else ())
+
+
+def parse_netbios_dgm(data, ip):
+    """
+    NetBIOS datagrams (browser host announcements and the like): the
+    source name and address are in the datagram header.
+    """
+    kind = data[0]
+    if kind not in (0x10, 0x11, 0x12) or data[14] != 0x20:
+        return None
+    name, suffix = decode_netbios_name(data[15:47])
+    if suffix not in (0x00, 0x20) or not name:
+        return None
+    source = ".".join(str(b) for b in data[4:8])
+    return Announcement('netbios', source, hostname=name)
+
+
+def parse_arp(data, ip):
+    """
+    `data` is the (ip, mac) pair the sniffer pulled out of an ARP packet.
+    """
+    sender, mac = data
+    if sender == '0.0.0.0' or mac in ('00:00:00:00:00:00', 'ff:ff:ff:ff:ff:ff'):
+        return None
+    return Announcement('arp', sender, mac=mac.lower())
+
+
+PARSERS = {
+    'mdns': parse_mdns,
+    'ssdp': parse_ssdp,
+    'netbios-ns': parse_netbios_ns,
+    'netbios-dgm': parse_netbios_dgm,
+    'arp': parse_arp,
+}
+
+# UDP port -> parser kind
+PORTS = {5353: 'mdns', 1900: 'ssdp', 137: 'netbios-ns', 138: 'netbios-dgm'}
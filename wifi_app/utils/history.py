@@ -0,0 +1,370 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from utils.records import int_to_mac, mac_to_int
+from utils.trace import get_tracer
+
+# Persistent scan history.
+#
+# Wi-Fi scans, ARP sweeps and ping samples are appended to a SQLite database
+# in WAL mode. Recording only enqueues rows; a background thread writes them
+# in batched transactions, so neither the UI nor the scanners ever wait on
+# disk. Raw samples live in WITHOUT ROWID tables keyed by (bssid/mac/target,
+# time), which makes "BSSID X over the last 24h" an index range scan. Raw
+# rows older than `raw_days` are rolled up into hourly aggregates, and the
+# aggregates are dropped after `keep_days`, so the file stays bounded.
+#
+# Off by default: the history holds SSIDs, BSSIDs, LAN MACs and addresses,
+# so nothing is written unless asked for. Enable from the environment (or
+# the CLI's --history):
+#   PYWIFIMAN_HISTORY=on                          ~/.pywifiman/history.sqlite3
+#   PYWIFIMAN_HISTORY=/path/to/history.sqlite3
+
+tracer = get_tracer('history')
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.pywifiman', 'history.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS networks (
+    bssid INTEGER PRIMARY KEY, ssid TEXT, authentication TEXT,
+    first_seen INTEGER, last_seen INTEGER);
+CREATE TABLE IF NOT EXISTS wifi_samples (
+    bssid INTEGER, ts INTEGER, signal INTEGER, channel INTEGER,
+    PRIMARY KEY (bssid, ts)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS wifi_hourly (
+    bssid INTEGER, hour INTEGER, signal_avg REAL, signal_min INTEGER,
+    signal_max INTEGER, samples INTEGER,
+    PRIMARY KEY (bssid, hour)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS devices (
+    mac INTEGER PRIMARY KEY, ip TEXT, hostname TEXT,
+    first_seen INTEGER, last_seen INTEGER);
+CREATE TABLE IF NOT EXISTS device_sightings (
+    mac INTEGER, ts INTEGER, ip TEXT,
+    PRIMARY KEY (mac, ts)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ping_targets (
+    id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS ping_samples (
+    target INTEGER, ts_ms INTEGER, rtt_ms REAL,
+    PRIMARY KEY (target, ts_ms)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ping_hourly (
+    target INTEGER, hour INTEGER, rtt_avg REAL, rtt_max REAL,
+    sent INTEGER, lost INTEGER,
+    PRIMARY KEY (target, hour)) WITHOUT ROWID;
+"""
+
+_store = None
+_lock = threading.Lock()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class HistoryStore:
+    """
+    Append-only scan history in the SQLite file at `path`.
+    """
+    def __init__(self, path, raw_days=2, keep_days=90, batch_size=20000,
+                 flush_interval=1.0, maintenance_interval=3600, max_pending=10000):
+        self.path = path
+        self.raw_days = raw_days
+        self.keep_days = keep_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.maintenance_interval = maintenance_interval
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write = _connect(path)
+        self._write.executescript(_SCHEMA)
+        self._targets = dict(
+            (name, target) for target, name in self._write.execute("SELECT id, name FROM ping_targets"))
+        self._readers = threading.local()
+        # Every thread's reader connection, closed by close()
+        self._reader_conns = []
+        self._reader_lock = threading.Lock()
+        # Bounded: if the disk can't keep up, new records are dropped (and counted)
+        self._queue = queue.Queue(max_pending)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    # --- recording (any thread, never blocks on disk) ---
+
+    def record_wifi_scan(self, access_points, ts=None):
+        ts = int(ts if ts is not None else time.time())
+        self._enqueue(('wifi', ts, [(mac_to_int(ap.bssid), ap.signal, ap.channel, ap.ssid,
+                                       ap.authentication) for ap in access_points]))
+
+    def record_devices(self, devices, ts=None):
+        ts = int(ts if ts is not None else time.time())
+        self._enqueue(('devices', ts, [(mac_to_int(d.mac), d.ip, d.hostname) for d in devices]))
+
+    def record_ping(self, target, rtt_ms, ts=None):
+        """`rtt_ms` is None (or NaN) for a lost probe."""
+        ts_ms = int((ts if ts is not None else time.time()) * 1000)
+        if rtt_ms is not None and rtt_ms != rtt_ms:
+            rtt_ms = None
+        self._enqueue(('ping', ts_ms, [(target, rtt_ms)]))
+
+    def _enqueue(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            tracer.warning("queue_full", dropped=self.dropped)
+
+    def flush(self, timeout=None):
+        """
+        Blocks until everything recorded so far has been written.
+        """
+        done = threading.Event()
+        self._queue.put(('flush', done, None))
+        return done.wait(timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._write.close()
+        with self._reader_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns = []
+
+    # --- writer thread ---
+
+    def _run(self):
+        next_maintenance = time.monotonic() + self.maintenance_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+            batch = [item] if item else []
+            stop = item is None
+            # Drain whatever else is waiting, up to the batch size
+            rows = sum(len(entry[2]) for entry in batch if entry and entry[2])
+            while not stop and rows < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                if item[2]:
+                    rows += len(item[2])
+            try:
+                self._write_batch(batch)
+            except sqlite3.Error as e:
+                tracer.error("write_failed", error=repr(e))
+            if time.monotonic() >= next_maintenance:
+                self.apply_retention()
+                next_maintenance = time.monotonic() + self.maintenance_interval
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        wifi, networks, sightings, devices, pings, flushes = [], {}, [], {}, [], []
+        for kind, ts, rows in batch:
+            if kind == 'wifi':
+                for bssid, signal, channel, ssid, auth in rows:
+                    wifi.append((bssid, ts, signal, channel))
+                    first = networks[bssid][3] if bssid in networks else ts
+                    networks[bssid] = (bssid, ssid, auth, min(first, ts), ts)
+            elif kind == 'devices':
+                for mac, ip, hostname in rows:
+                    sightings.append((mac, ts, ip))
+                    first = devices[mac][3] if mac in devices else ts
+                    devices[mac] = (mac, ip, hostname, min(first, ts), ts)
+            elif kind == 'ping':
+                for target, rtt in rows:
+                    pings.append((self._target_id(target), ts, rtt))
+            elif kind == 'flush':
+                flushes.append(ts)
+        try:
+            if wifi or sightings or pings:
+                with self._write:
+                    self._write.executemany(
+                        "INSERT OR REPLACE INTO wifi_samples VALUES (?, ?, ?, ?)", wifi)
+                    self._write.executemany(
+                        "INSERT INTO networks VALUES (?, ?, ?, ?, ?) ON CONFLICT(bssid) DO UPDATE SET "
+                        "ssid = excluded.ssid, authentication = excluded.authentication, "
+                        "first_seen = MIN(first_seen, excluded.first_seen), "
+                        "last_seen = MAX(last_seen, excluded.last_seen)", networks.values())
+                    self._write.executemany(
+                        "INSERT OR REPLACE INTO device_sightings VALUES (?, ?, ?)", sightings)
+                    self._write.executemany(
+                        "INSERT INTO devices VALUES (?, ?, ?, ?, ?) ON CONFLICT(mac) DO UPDATE SET "
+                        "ip = excluded.ip, hostname = excluded.hostname, "
+                        "first_seen = MIN(first_seen, excluded.first_seen), "
+                        "last_seen = MAX(last_seen, excluded.last_seen)", devices.values())
+                    self._write.executemany(
+                        "INSERT OR REPLACE INTO ping_samples VALUES (?, ?, ?)", pings)
+                tracer.debug("batch_written", wifi=len(wifi), devices=len(sightings), pings=len(pings))
+        finally:
+            # Wake flush() callers even if the write failed
+            for done in flushes:
+                done.set()
+
+    def _target_id(self, name):
+        target = self._targets.get(name)
+        if target is None:
+            target = self._write.execute(
+                "INSERT INTO ping_targets (name) VALUES (?)", (name,)).lastrowid
+            self._targets[name] = target
+        return target
+
+    def apply_retention(self, now=None):
+        """
+        Rolls raw samples older than raw_days into hourly aggregates and
+        drops aggregates older than keep_days. Runs hourly on the writer
+        thread; call flush() first when invoking it directly.
+        """
+        now = int(now if now is not None else time.time())
+        raw_cutoff = now - self.raw_days * 86400
+        # Only roll up whole hours, so an hour is never aggregated twice
+        raw_cutoff -= raw_cutoff % 3600
+        keep_cutoff = now - self.keep_days * 86400
+        with self._write:
+            self._write.execute(
+                "INSERT OR REPLACE INTO wifi_hourly "
+                "SELECT bssid, ts / 3600 * 3600, AVG(signal), MIN(signal), MAX(signal), COUNT(*) "
+                "FROM wifi_samples WHERE ts < ? GROUP BY bssid, ts / 3600", (raw_cutoff,))
+            self._write.execute("DELETE FROM wifi_samples WHERE ts < ?", (raw_cutoff,))
+            self._write.execute("DELETE FROM wifi_hourly WHERE hour < ?", (keep_cutoff,))
+            self._write.execute(
+                "INSERT OR REPLACE INTO ping_hourly "
+                "SELECT target, ts_ms / 3600000 * 3600, AVG(rtt_ms), MAX(rtt_ms), COUNT(*), "
+                "COUNT(*) - COUNT(rtt_ms) FROM ping_samples WHERE ts_ms < ? "
+                "GROUP BY target, ts_ms / 3600000", (raw_cutoff * 1000,))
+            self._write.execute("DELETE FROM ping_samples WHERE ts_ms < ?", (raw_cutoff * 1000,))
+            self._write.execute("DELETE FROM ping_hourly WHERE hour < ?", (keep_cutoff,))
+            self._write.execute("DELETE FROM device_sightings WHERE ts < ?", (keep_cutoff,))
+        tracer.info("retention_applied", raw_cutoff=raw_cutoff, keep_cutoff=keep_cutoff)
+
+    # --- queries (any thread) ---
+
+    def _reader(self):
+        conn = getattr(self._readers, 'conn', None)
+        if conn is None:
+            conn = self._readers.conn = _connect(self.path)
+            with self._reader_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    def signal_history(self, bssid, since=None, until=None):
+        """
+        [(ts, signal)] for `bssid` between since and until (unix seconds).
+        """
+        return self._reader().execute(
+            "SELECT ts, signal FROM wifi_samples WHERE bssid = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+            (mac_to_int(bssid), since or 0, until or 2 ** 62)).fetchall()
+
+    def signal_hourly(self, bssid, since=None, until=None):
+        """
+        [(hour, avg, min, max, samples)] of rolled-up history for `bssid`.
+        """
+        return self._reader().execute(
+            "SELECT hour, signal_avg, signal_min, signal_max, samples FROM wifi_hourly "
+            "WHERE bssid = ? AND hour BETWEEN ? AND ? ORDER BY hour",
+            (mac_to_int(bssid), since or 0, until or 2 ** 62)).fetchall()
+
+    def networks_seen(self, since=None):
+        return [(int_to_mac(bssid), ssid, first, last) for bssid, ssid, first, last in
+                self._reader().execute(
+                    "SELECT bssid, ssid, first_seen, last_seen FROM networks WHERE last_seen >= ?",
+                    (since or 0,))]
+
+    def devices_seen(self, since=None):
+        """
+        [(mac, ip, hostname, first_seen, last_seen)] of devices seen since `since`.
+        """
+        return [(int_to_mac(mac), ip, hostname, first, last) for mac, ip, hostname, first, last in
+                self._reader().execute(
+                    "SELECT mac, ip, hostname, first_seen, last_seen FROM devices WHERE last_seen >= ?",
+                    (since or 0,))]
+
+    def device_first_seen(self, mac):
+        row = self._reader().execute(
+            "SELECT first_seen FROM devices WHERE mac = ?", (mac_to_int(mac),)).fetchone()
+        return row[0] if row else None
+
+    def device_sightings(self, mac, since=None, until=None):
+        """
+        [(ts, ip)] for every sweep that found `mac`.
+        """
+        return self._reader().execute(
+            "SELECT ts, ip FROM device_sightings WHERE mac = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+            (mac_to_int(mac), since or 0, until or 2 ** 62)).fetchall()
+
+    def ping_history(self, target, since=None, until=None):
+        """
+        [(ts, rtt_ms)] for `target`, rtt_ms None for lost probes.
+        """
+        target = self._targets.get(target)
+        if target is None:
+            return []
+        since_ms = int((since or 0) * 1000)
+        until_ms = int(until * 1000) if until else 2 ** 62
+        return [(ts_ms / 1000, rtt) for ts_ms, rtt in self._reader().execute(
+            "SELECT ts_ms, rtt_ms FROM ping_samples WHERE target = ? AND ts_ms BETWEEN ? AND ? "
+            "ORDER BY ts_ms", (target, since_ms, until_ms))]
+
+
+def open_store(path=DEFAULT_PATH, **options):
+    """
+    Opens (or replaces) the process-wide history store.
+    """
+    global _store
+    with _lock:
+        if _store is not None:
+            _store.close()
+        _store = HistoryStore(path, **options)
+    return _store
+
+
+def get_store():
+    """
+    The process-wide store, or None when history is disabled.
+    """
+    return _store
+
+
+def close():
+    global _store
+    with _lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+def resolve_path(value):
+    """
+    PYWIFIMAN_HISTORY / --history value -> database path, or None for off.
+    """
+    if value is None or value.lower() in ('', 'off', '0', 'false'):
+        return None
+    if value.lower() in ('on', '1', 'true'):
+        return DEFAULT_PATH
+    return value
+
+
+def configure_from_env(environ=os.environ):
+    """
+    Opens the store if PYWIFIMAN_HISTORY asks for it; history is off otherwise.
+    """
+    path = resolve_path(environ.get('PYWIFIMAN_HISTORY'))
+    if path is None:
+        return
+    try:
+        open_store(path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"History store disabled: {e}")
+        tracer.error("open_failed", path=path, error=repr(e))
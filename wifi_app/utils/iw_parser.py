@@ -0,0 +1,242 @@
+import re
+import sys
+
+from utils.records import AccessPoint
+
+# Single-pass parser for 'iw dev <iface> scan [dump]' (Linux, nl80211).
+#
+# Each access point starts with a "BSS <mac>(on <iface>)" line followed by
+# tab-indented "<key>: <value>" fields; RSN/WPA details are nested one level
+# deeper as "* <key>: <value>". Security is mapped onto the names netsh uses
+# so both backends produce the same AccessPoint records. Signal is kept in
+# dBm as reported. Channel width and centre
+# come from the HT (40 MHz), VHT (80/160 MHz) and 6 GHz HE operation
+# elements, resolved once the whole BSS has been read. The BSS we are
+# connected to is marked "-- associated" on its BSS line. The radio type is
+# the newest capabilities element present (EHT: 802.11be, HE: 802.11ax,
+# VHT: 802.11ac, HT: 802.11n), rates marked '*' are basic rates, and the BSS Load element
+# gives the station count and channel utilization.
+
+_BSS_RE = re.compile(r'BSS ([0-9a-fA-F]{2}(?::[0-9a-fA-F]{2}){5})')
+_ESCAPE_RE = re.compile(rb'\\x([0-9a-fA-F]{2})')
+_INT_RE = re.compile(r'-?\d+')
+
+
+def _to_int(value):
+    match = _INT_RE.search(value)
+    return int(match.group()) if match else 0
+
+
+def frequency_to_channel(freq):
+    """
+    Channel number for a centre frequency in MHz (2.4, 5 and 6 GHz bands).
+    """
+    if freq == 2484:
+        return 14
+    if 2412 <= freq < 2484:
+        return (freq - 2407) // 5
+    if 5955 <= freq <= 7115:
+        return (freq - 5950) // 5
+    if 5000 <= freq < 5955:
+        return (freq - 5000) // 5
+    return 0
+
+
+def frequency_to_band(freq):
+    if freq < 3000:
+        return '2.4'
+    return '6' if freq >= 5925 else '5'
+
+
+# "channel width" codes of the VHT operation element and of the HE
+# operation's 6 GHz information, in MHz (0 for VHT: see the HT element)
+_VHT_WIDTHS = {0: 0, 1: 80, 2: 160, 3: 160}
+_6GHZ_WIDTHS = {0: 20, 1: 40, 2: 80, 3: 160}
+
+
+def _channel_width(ap, operation):
+    """
+    Sets ap.width and ap.center from the operation fields of its BSS:
+    'offset' (HT secondary channel, +1/-1), 'vht' and 'he6' width codes
+    and the centre frequency 'segments'.
+    """
+    segments = [s for s in operation.get('segments', ()) if s]
+    if 'he6' in operation:
+        width = _6GHZ_WIDTHS.get(operation['he6'], 20)
+    else:
+        width = _VHT_WIDTHS.get(operation.get('vht', 0), 0)
+    if width:
+        if len(segments) >= 2 and abs(segments[1] - segments[0]) == 8:
+            # 160 MHz given as two adjacent 80 MHz segments: centred on the second
+            width = 160
+            ap.center = segments[1]
+        elif segments:
+            ap.center = segments[0]
+        ap.width = width
+    elif operation.get('offset'):
+        ap.width = 40
+        ap.center = ap.channel + 2 * operation['offset']
+
+
+# Capabilities elements, newest first, and the PHY they mean
+_RADIO_TYPES = (('EHT capabilities', '802.11be'), ('HE capabilities', '802.11ax'), ('VHT capabilities', '802.11ac'),
+                ('HT capabilities', '802.11n'))
+
+
+def _radio_type(ap, capabilities):
+    for element, radio in _RADIO_TYPES:
+        if element in capabilities:
+            return radio
+    if not ap.max_rate():
+        return ''
+    return '802.11g' if ap.band_name() == '2.4' and ap.max_rate() > 11 else \
+        '802.11b' if ap.band_name() == '2.4' else '802.11a'
+
+
+def _add_rates(ap, value, cache):
+    """
+    Splits "1.0* 2.0* 6.0 9.0" into basic (starred) and other rates.
+    """
+    basic = []
+    other = []
+    for rate in value.split():
+        try:
+            (basic if rate.endswith('*') else other).append(float(rate.rstrip('*')))
+        except ValueError:
+            continue
+    ap.basic_rates = cache.setdefault(tuple(basic), tuple(basic)) if basic else ap.basic_rates
+    if other:
+        merged = ap.other_rates + tuple(other)
+        ap.other_rates = cache.setdefault(merged, merged)
+
+
+def _decode_ssid(value):
+    # iw prints non-printable and non-ASCII bytes as \xNN
+    if '\\x' not in value:
+        return value
+    raw = _ESCAPE_RE.sub(lambda m: bytes([int(m.group(1), 16)]), value.encode('latin-1', 'replace'))
+    return raw.decode('utf-8', errors='replace')
+
+
+def _security(rsn, wpa, privacy):
+    """
+    (authentication, encryption) in netsh's vocabulary.
+    """
+    if rsn is None and wpa is None:
+        return ('Open', 'WEP') if privacy else ('Open', 'None')
+    suites, ciphers = rsn if rsn is not None else wpa
+    if 'SAE' in suites and 'PSK' not in suites:
+        authentication = 'WPA3-Personal'
+    elif 'OWE' in suites:
+        authentication = 'OWE'
+    elif '802.1X' in suites:
+        authentication = 'WPA2-Enterprise' if rsn is not None else 'WPA-Enterprise'
+    else:
+        authentication = 'WPA2-Personal' if rsn is not None else 'WPA-Personal'
+    cipher = ciphers.split()[0] if ciphers else 'Unknown'
+    return authentication, cipher
+
+
+def parse_iw_scan(output, debug_log=None):
+    """
+    Parses the output of 'iw dev <iface> scan dump'.
+    Returns one AccessPoint per BSS.
+
+    If `debug_log` is a list, BSS lines whose MAC could not be parsed are
+    appended to it.
+    """
+    networks = []
+    current_ap = None
+    # RSN/WPA element being read, and [auth suites, pairwise ciphers] of each
+    block = None
+    security = {}
+    privacy = False
+    operation = {}
+    capabilities = set()
+    rates = {}
+    bss_match = _BSS_RE.match
+
+    def finish():
+        if current_ap is not None:
+            if operation:
+                _channel_width(current_ap, operation)
+            current_ap.radio = _radio_type(current_ap, capabilities)
+            current_ap.authentication, current_ap.encryption = (
+                sys.intern(s) for s in _security(security.get('RSN'), security.get('WPA'), privacy))
+
+    for line in output.splitlines():
+        if line.startswith('BSS '):
+            finish()
+            match = bss_match(line)
+            if match is None:
+                current_ap = None
+                if debug_log is not None:
+                    debug_log.append(f"FAILED BSS MATCH: '{line.strip()}'")
+                continue
+            current_ap = AccessPoint("<Hidden>", match.group(1).lower(),
+                                     associated=line.rstrip().endswith('-- associated'))
+            networks.append(current_ap)
+            block = None
+            security = {}
+            privacy = False
+            operation = {}
+            capabilities = set()
+            continue
+        if current_ap is None:
+            continue
+
+        stripped = line.strip()
+        if stripped.startswith('* '):
+            key, _, value = stripped[2:].partition(':')
+            if block is not None and key == 'Authentication suites':
+                security[block][0] = value.strip()
+            elif block is not None and key == 'Pairwise ciphers':
+                security[block][1] = value.strip()
+            elif key == 'primary channel' and not current_ap.channel:
+                current_ap.channel = _to_int(value)
+            elif key == 'secondary channel offset':
+                operation['offset'] = 1 if 'above' in value else -1 if 'below' in value else 0
+            elif key == 'channel width':
+                operation['vht'] = _to_int(value)
+            elif key == 'Channel Width':
+                operation['he6'] = _to_int(value)
+            elif key.lower().startswith('center freq'):
+                operation.setdefault('segments', []).append(_to_int(value))
+            elif key == 'station count':
+                current_ap.stations = _to_int(value)
+            elif key == 'channel utilisation':
+                # "25/255"
+                current_ap.utilization = round(_to_int(value) * 100 / 255)
+            continue
+
+        key, sep, value = stripped.partition(':')
+        if not sep:
+            continue
+        value = value.strip()
+        block = None
+        if key == 'SSID':
+            if value:
+                current_ap.ssid = sys.intern(_decode_ssid(value))
+        elif key == 'signal':
+            current_ap.dbm = float(value.split()[0])
+        elif key == 'freq':
+            freq = int(float(value))
+            current_ap.band = frequency_to_band(freq)
+            if not current_ap.channel:
+                current_ap.channel = frequency_to_channel(freq)
+        elif key == 'DS Parameter set':
+            current_ap.channel = _to_int(value) or current_ap.channel
+        elif key == 'capability':
+            flags = value.split()
+            privacy = 'Privacy' in flags
+            current_ap.network_type = 'Adhoc' if 'IBSS' in flags else 'Infrastructure'
+        elif key in ('RSN', 'WPA'):
+            block = key
+            security[key] = ['', '']
+        elif key in ('Supported rates', 'Extended supported rates'):
+            _add_rates(current_ap, value, rates)
+        elif key.endswith('capabilities'):
+            capabilities.add(key)
+
+    finish()
+    return networks
@@ -0,0 +1,214 @@
+import csv
+import math
+
+import numpy as np
+
+# Fixed-memory latency history per target.
+#
+# Each target keeps a NumPy ring buffer of (timestamp, rtt) samples, with lost
+# probes stored as NaN. Every sample is written twice, at i and i + capacity,
+# so the most recent `count` samples are always one contiguous slice: views
+# for plotting are zero-copy, however often the ring has wrapped. Percentiles
+# (P-squared estimators), RFC 3550 jitter and loss counters are updated per
+# sample, so reading them never scans the history.
+#
+# The p50/p95/p99 estimates cover every sample the series has seen since it
+# was created, not just the buffered window; the graph and the loss rate are
+# over the buffer. P-squared can't forget old samples, and percentiles over
+# the window would mean sorting up to `capacity` samples on every read.
+
+
+class P2Quantile:
+    """
+    Streaming estimate of the q-quantile with Jain & Chlamtac's P-squared
+    algorithm: five markers, O(1) memory and time per sample.
+    """
+    __slots__ = ('q', 'heights', 'positions', 'desired', 'increments', 'count')
+
+    def __init__(self, q):
+        self.q = q
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+        self.count = 0
+
+    def add(self, x):
+        self.count += 1
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(x)
+            heights.sort()
+            return
+
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= heights[k + 1]:
+                k += 1
+
+        positions = self.positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (d <= -1 and positions[i - 1] - positions[i] < -1):
+                d = 1 if d > 0 else -1
+                h = self._parabolic(i, d)
+                if not heights[i - 1] < h < heights[i + 1]:
+                    h = heights[i] + d * (heights[i + d] - heights[i]) / (positions[i + d] - positions[i])
+                heights[i] = h
+                positions[i] += d
+
+    def _parabolic(self, i, d):
+        n, h = self.positions, self.heights
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def value(self):
+        heights = self.heights
+        if not heights:
+            return math.nan
+        if len(heights) < 5:
+            return heights[min(int(self.q * len(heights)), len(heights) - 1)]
+        return heights[2]
+
+
+class LatencySeries:
+    """
+    Ring buffer of the last `capacity` samples for one target, plus running
+    statistics over everything it has seen.
+    """
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._time = np.zeros(2 * capacity, dtype=np.float64)
+        self._rtt = np.zeros(2 * capacity, dtype=np.float32)
+        self._next = 0
+        self.count = 0
+        self.total = 0
+        self.lost_total = 0
+        # Lost samples currently held in the buffer
+        self.lost_window = 0
+        self.jitter = 0.0
+        self._last_rtt = None
+        self._quantiles = [P2Quantile(q) for q in self.QUANTILES]
+
+    def append(self, timestamp, rtt):
+        """
+        Records one probe; `rtt` is None or NaN for a lost one.
+        """
+        lost = rtt is None or rtt != rtt
+        if lost:
+            rtt = math.nan
+
+        i = self._next
+        capacity = self.capacity
+        if self.count == capacity and self._rtt[i] != self._rtt[i]:
+            self.lost_window -= 1
+        self._time[i] = self._time[i + capacity] = timestamp
+        self._rtt[i] = self._rtt[i + capacity] = rtt
+        self._next = (i + 1) % capacity
+        if self.count < capacity:
+            self.count += 1
+
+        self.total += 1
+        if lost:
+            self.lost_total += 1
+            self.lost_window += 1
+            return
+        if self._last_rtt is not None:
+            self.jitter += (abs(rtt - self._last_rtt) - self.jitter) / 16
+        self._last_rtt = rtt
+        for quantile in self._quantiles:
+            quantile.add(rtt)
+
+    def _window(self):
+        end = self._next + self.capacity if self.count == self.capacity else self._next
+        return end - self.count, end
+
+    @property
+    def timestamps(self):
+        """Zero-copy, oldest-first view of the buffered timestamps."""
+        start, end = self._window()
+        return self._time[start:end]
+
+    @property
+    def rtts(self):
+        """Zero-copy, oldest-first view of the buffered RTTs (NaN = lost)."""
+        start, end = self._window()
+        return self._rtt[start:end]
+
+    @property
+    def percentiles(self):
+        """p50/p95/p99 over the series' whole lifetime (see the module comment)."""
+        return {f"p{round(q.q * 100)}": q.value for q in self._quantiles}
+
+    @property
+    def loss_rate(self):
+        """Fraction of the buffered samples that were lost."""
+        return self.lost_window / self.count if self.count else 0.0
+
+    @property
+    def nbytes(self):
+        return self._time.nbytes + self._rtt.nbytes
+
+
+class LatencyStore:
+    """
+    LatencySeries per target. The default capacity holds four hours of
+    samples at 1 Hz (14400 samples, ~340 KB per target).
+    """
+    def __init__(self, capacity=4 * 3600):
+        self.capacity = capacity
+        self.series = {}
+
+    def append(self, target, timestamp, rtt):
+        series = self.series.get(target)
+        if series is None:
+            series = self.series[target] = LatencySeries(self.capacity)
+        series.append(timestamp, rtt)
+        return series
+
+    def __getitem__(self, target):
+        return self.series[target]
+
+    def __contains__(self, target):
+        return target in self.series
+
+    def export_csv(self, path):
+        """
+        Writes every buffered sample as target,timestamp,rtt_ms rows (an
+        empty rtt_ms for lost probes).
+        """
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['target', 'timestamp', 'rtt_ms'])
+            for target, series in self.series.items():
+                for timestamp, rtt in zip(series.timestamps.tolist(), series.rtts.tolist()):
+                    writer.writerow([target, timestamp, '' if rtt != rtt else f"{rtt:.3f}"])
+
+    def export_parquet(self, path):
+        """
+        Writes the buffered samples to Parquet (needs pandas and pyarrow).
+        """
+        import pandas as pd
+        frames = [pd.DataFrame({'target': target, 'timestamp': series.timestamps,
+                                'rtt_ms': series.rtts})
+                  for target, series in self.series.items()]
+        frame = pd.concat(frames, ignore_index=True) if frames else \
+            pd.DataFrame(columns=['target', 'timestamp', 'rtt_ms'])
+        frame.to_parquet(path, index=False)
@@ -0,0 +1,193 @@
+import re
+import sys
+
+from utils.records import AccessPoint
+
+# Single-pass parser for 'netsh wlan show networks mode=bssid'.
+#
+# Every line of the output is "<key> : <value>". Instead of probing each line
+# with a series of loose regex searches we split once on the first colon and
+# classify the key with one precompiled, anchored pattern built from the key
+# names of every display language in _KEYS; each distinct key is classified
+# once per parse. Accented letters in those names are matched as .{1,2}, so
+# keys still match when the output was decoded with the wrong code page.
+# Fields newer Windows versions add (Band, the BSS Load station count and
+# channel utilization) are simply absent on older ones.
+#
+# netsh reports neither dBm nor channel width; signal is the 0-100% quality
+# (see utils.records) and APs are taken to be 20 MHz wide.
+
+_KEYS = {
+    'bssid': (r'BSSID\s*\d*',),
+    'ssid': (r'SSID\s*\d+',),
+    'network_type': ("Network type", "Type de réseau", "Netzwerktyp", "Tipo de red",
+                     "Tipo di rete", "Tipo de rede"),
+    'auth': ("Authentication", "Authentification", "Authentifizierung", "Autenticación",
+             "Autenticazione", "Autenticação"),
+    'enc': ("Encryption", "Chiffrement", "Chiffrage", "Verschlüsselung", "Cifrado",
+            "Crittografia", "Criptografia"),
+    'signal': ("Signal", "Signaux", "Señal", "Segnale", "Sinal"),
+    'radio': ("Radio type", "Type de radio", "Funktyp", "Tipo de radio", "Tipo di radio",
+              "Tipo frequenza radio", "Tipo de rádio"),
+    'band': ("Band", "Bande", "Banda"),
+    'channel': ("Channel", "Canal", "Kanal", "Canale"),
+    'basic_rates': ("Basic rates", "Taux de base", "Basisraten", "Velocidades básicas",
+                    "Velocità di base", "Taxas básicas"),
+    'other_rates': ("Other rates", "Autres taux", "Andere Raten", "Otras velocidades",
+                    "Altre velocità", "Outras taxas"),
+    'stations': ("Connected Stations", "Stations connectées", "Verbundene Stationen",
+                 "Estaciones conectadas", "Stazioni connesse", "Estações conectadas"),
+    'utilization': ("Channel Utilization", "Utilisation du canal", "Kanalauslastung",
+                    "Uso del canal", "Utilizzo canale", "Utilização do canal"),
+}
+
+# Keys followed by a unit, e.g. "Basic rates (Mbps)"
+_WITH_UNIT = ('basic_rates', 'other_rates')
+
+
+def _key_pattern(kind, names):
+    if kind in ('bssid', 'ssid'):
+        alternatives = names
+    else:
+        alternatives = [re.sub(r'[^\x00-\x7f]', '.{1,2}', re.escape(name)) for name in names]
+    pattern = '|'.join(alternatives)
+    if kind in _WITH_UNIT:
+        pattern = rf'(?:{pattern})(?:\s*\(.*\))?'
+    return rf'(?P<{kind}>{pattern})'
+
+
+_KEY_RE = re.compile(
+    '(?:' + '|'.join(_key_pattern(kind, names) for kind, names in _KEYS.items()) + ')$',
+    re.IGNORECASE
+)
+
+_MAC_RE = re.compile(r'[0-9a-fA-F]{2}(?:[:-][0-9a-fA-F]{2}){5}')
+_INT_RE = re.compile(r'\d+')
+# "25 (9 %)": raw 0-255 utilization, then the percentage
+_UTILIZATION_RE = re.compile(r'(\d+)(?:\s*\((\d+)\s*%\))?')
+
+
+def _to_int(value):
+    match = _INT_RE.search(value)
+    return int(match.group()) if match else 0
+
+
+def _rates(value, cache):
+    """
+    "1 2 5.5 11" (or "5,5" with a decimal comma) -> (1.0, 2.0, 5.5, 11.0),
+    shared between APs advertising the same set.
+    """
+    rates = cache.get(value)
+    if rates is None:
+        try:
+            rates = tuple(float(rate) for rate in value.replace(',', '.').split())
+        except ValueError:
+            rates = ()
+        cache[value] = rates
+    return rates
+
+
+def _utilization(value):
+    match = _UTILIZATION_RE.search(value)
+    if match is None:
+        return -1
+    if match.group(2) is not None:
+        return int(match.group(2))
+    return round(int(match.group(1)) * 100 / 255)
+
+
+def parse_netsh_output(output, debug_log=None):
+    """
+    Parses the output of 'netsh wlan show networks mode=bssid'.
+    Returns one AccessPoint per BSSID, inheriting the SSID, authentication
+    and encryption of its parent network block.
+
+    If `debug_log` is a list, lines that look like a BSSID but could not
+    be parsed are appended to it.
+    """
+    networks = []
+    ssid = None
+    authentication = encryption = 'Unknown'
+    network_type = ''
+    current_ap = None
+    rates = {}
+    key_match = _KEY_RE.match
+    # The same few dozen keys repeat on every network; classify each once
+    kinds = {}
+
+    for line in output.splitlines():
+        key, sep, value = line.partition(':')
+        if not sep:
+            continue
+        try:
+            kind = kinds[key]
+        except KeyError:
+            match = key_match(key.strip())
+            kind = kinds[key] = match.lastgroup if match is not None else None
+        if kind is None:
+            continue
+        value = value.strip()
+
+        if kind == 'ssid':
+            ssid = sys.intern(value or "<Hidden>")
+            authentication = encryption = 'Unknown'
+            network_type = ''
+            current_ap = None
+        elif ssid is None:
+            continue
+        elif kind == 'bssid':
+            mac = _MAC_RE.match(value)
+            if mac is None:
+                current_ap = None
+                if debug_log is not None:
+                    debug_log.append(f"FAILED BSSID MATCH: '{line.strip()}'")
+                continue
+            current_ap = AccessPoint(ssid, mac.group().replace('-', ':'),
+                                     authentication=authentication, encryption=encryption)
+            current_ap.network_type = network_type
+            networks.append(current_ap)
+        elif kind == 'auth':
+            authentication = sys.intern(value)
+        elif kind == 'enc':
+            encryption = sys.intern(value)
+        elif kind == 'network_type':
+            # "Infrastructure", "Infrastruktur", "Ad hoc", "Adhoc", ...
+            network_type = 'Adhoc' if 'hoc' in value.lower() else 'Infrastructure'
+        elif current_ap is None:
+            continue
+        elif kind == 'signal':
+            current_ap.signal = _to_int(value)
+        elif kind == 'channel':
+            current_ap.channel = _to_int(value)
+        elif kind == 'band':
+            # "2.4 GHz", "5 GHz", "6 GHz" (Windows 11 and later)
+            band = value.split()[0].replace(',', '.') if value else ''
+            if band in ('2.4', '5', '6'):
+                current_ap.band = sys.intern(band)
+        elif kind == 'radio':
+            current_ap.radio = sys.intern(value)
+        elif kind == 'basic_rates':
+            current_ap.basic_rates = _rates(value, rates)
+        elif kind == 'other_rates':
+            current_ap.other_rates = _rates(value, rates)
+        elif kind == 'stations':
+            current_ap.stations = _to_int(value)
+        elif kind == 'utilization':
+            current_ap.utilization = _utilization(value)
+
+    return networks
+
+
+def parse_netsh_interfaces(output):
+    """
+    BSSIDs the wireless interfaces are connected to, from
+    'netsh wlan show interfaces' (lower case, colon separated).
+    """
+    bssids = []
+    for line in output.splitlines():
+        key, sep, value = line.partition(':')
+        if sep and key.strip().upper() == 'BSSID':
+            mac = _MAC_RE.search(value)
+            if mac is not None:
+                bssids.append(mac.group().replace('-', ':').lower())
+    return bssids
@@ -0,0 +1,324 @@
+import argparse
+import csv
+import mmap
+import os
+import struct
+import sys
+import threading
+from bisect import bisect_left
+
+from utils.records import mac_to_int
+from utils.trace import get_tracer
+
+# IEEE OUI vendor lookup over a compact, memory-mapped index.
+#
+# The registry (MA-L /24, MA-M /28 and MA-S /36 blocks) is compiled once
+# into a sorted binary file that is mmap'd, so startup does not parse the
+# multi-megabyte source and a lookup is a bisect over the mapped keys.
+# Layout, little-endian:
+#
+#   header   b'OUI3', then n24, n28, n36 and the names offset, uint32 each,
+#            padded to 24 bytes
+#   keys36   n36 x uint64  first 36 bits of the MAC, sorted
+#   fanout   65537 x uint32 index in keys24 of the first OUI whose top 16
+#                          bits are >= i, so a bisect only covers its bucket
+#   keys24   n24 x uint32  first 24 bits, sorted
+#   vals24   n24 x uint32  name offset << 1, | 1 if the OUI is split into
+#                          /28 or /36 blocks
+#   keys28   n28 x uint32  first 28 bits, sorted
+#   vals28   n28 x uint32  name offset
+#   vals36   n36 x uint32  name offset
+#   names    length-prefixed UTF-8, deduplicated; offset 0 is ""
+#
+# Split OUIs are listed in the /24 table even when IEEE registered no /24
+# name for them, so most MACs cost one bisect of a key or two and none
+# more than three bisects. Results are also cached per MAC string, since
+# scans keep seeing the same addresses.
+#
+# Sources are the IEEE CSV exports (oui.csv, mam.csv, oui36.csv, iab.csv)
+# or a Wireshark 'manuf' file. By default the index is built on first use
+# from the copy of manuf bundled with scapy and kept under ~/.pywifiman.
+# Locally administered (randomised) MACs have no vendor.
+
+tracer = get_tracer('oui')
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.pywifiman', 'oui.idx')
+
+MAGIC = b'OUI3'
+
+_FANOUT_BITS = 16
+_FANOUT = (1 << _FANOUT_BITS) + 1
+
+# Cached lookups, dropped wholesale past this many
+_CACHE_SIZE = 8192
+_MISSING = object()
+
+_HEADER = struct.Struct('<4s4I4x')
+
+# Locally administered bit of the first octet, in a 48-bit MAC
+_LOCAL_BIT = 1 << 41
+
+
+def read_ieee_csv(path):
+    """
+    (bits, prefix, name) for each row of an IEEE registry CSV export.
+    """
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        rows = csv.reader(f)
+        next(rows, None)
+        for row in rows:
+            if len(row) < 3 or not row[1]:
+                continue
+            assignment = row[1].strip()
+            yield len(assignment) * 4, int(assignment, 16), row[2].strip()
+
+
+def read_manuf(lines):
+    """
+    (bits, prefix, name) for each /24, /28 and /36 entry of a Wireshark
+    manuf file, preferring the long vendor name.
+    """
+    for line in lines:
+        if not line or line.startswith('#'):
+            continue
+        fields = [field.strip() for field in line.split('\t')]
+        if len(fields) < 2:
+            continue
+        prefix, _, bits = fields[0].partition('/')
+        octets = prefix.replace('-', ':').split(':')
+        bits = int(bits) if bits else len(octets) * 8
+        if bits not in (24, 28, 36):
+            continue
+        name = fields[2] if len(fields) > 2 and fields[2] else fields[1]
+        yield bits, int(''.join(octets), 16) >> (len(octets) * 8 - bits), name
+
+
+def read_source(path):
+    if path.lower().endswith('.csv'):
+        return read_ieee_csv(path)
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return list(read_manuf(f.read().splitlines()))
+
+
+def scapy_manuf():
+    """
+    Entries of the manuf database bundled with scapy.
+    """
+    from scapy.libs.manuf import DATA
+    return read_manuf(DATA.splitlines())
+
+
+def compile_index(entries, path):
+    """
+    Writes the index for `entries` ((bits, prefix, name) tuples; later
+    entries win) to `path` atomically. Returns the counts per prefix length.
+    """
+    tables = {24: {}, 28: {}, 36: {}}
+    for bits, prefix, name in entries:
+        tables[bits][prefix] = name
+    split = {prefix >> 4 for prefix in tables[28]} | {prefix >> 12 for prefix in tables[36]}
+
+    names = bytearray(b'\x00')
+    offsets = {'': 0}
+
+    def name_offset(name):
+        offset = offsets.get(name)
+        if offset is None:
+            encoded = name.encode('utf-8')[:255]
+            offset = offsets[name] = len(names)
+            names.append(len(encoded))
+            names.extend(encoded)
+        return offset
+
+    keys24 = sorted(tables[24].keys() | split)
+    vals24 = [name_offset(tables[24].get(key, '')) << 1 | (key in split) for key in keys24]
+    keys28 = sorted(tables[28])
+    vals28 = [name_offset(tables[28][key]) for key in keys28]
+    keys36 = sorted(tables[36])
+    vals36 = [name_offset(tables[36][key]) for key in keys36]
+
+    fanout = [bisect_left(keys24, bucket << (24 - _FANOUT_BITS)) for bucket in range(_FANOUT)]
+
+    n24, n28, n36 = len(keys24), len(keys28), len(keys36)
+    names_at = _HEADER.size + 8 * n36 + 4 * _FANOUT + 8 * n24 + 8 * n28 + 4 * n36
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, n24, n28, n36, names_at))
+        f.write(struct.pack(f'<{n36}Q', *keys36))
+        f.write(struct.pack(f'<{_FANOUT}I', *fanout))
+        f.write(struct.pack(f'<{n24}I', *keys24))
+        f.write(struct.pack(f'<{n24}I', *vals24))
+        f.write(struct.pack(f'<{n28}I', *keys28))
+        f.write(struct.pack(f'<{n28}I', *vals28))
+        f.write(struct.pack(f'<{n36}I', *vals36))
+        f.write(names)
+    os.replace(tmp, path)
+    tracer.info("compiled", path=path, oui24=n24, oui28=n28, oui36=n36, bytes=names_at + len(names))
+    return {24: n24, 28: n28, 36: n36}
+
+
+class OuiIndex:
+    """
+    Read-only view of a compiled index file; see the module comment.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        magic, n24, n28, n36, names_at = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            view.release()
+            self._map.close()
+            raise ValueError(f"{path}: not an OUI index")
+        offset = _HEADER.size
+
+        def table(count, size, code):
+            nonlocal offset
+            part = view[offset:offset + count * size].cast(code)
+            offset += count * size
+            return part
+
+        self._keys36 = table(n36, 8, 'Q')
+        self._fanout = table(_FANOUT, 4, 'I')
+        self._keys24 = table(n24, 4, 'I')
+        self._vals24 = table(n24, 4, 'I')
+        self._keys28 = table(n28, 4, 'I')
+        self._vals28 = table(n28, 4, 'I')
+        self._vals36 = table(n36, 4, 'I')
+        self._view = view
+        self._names_at = names_at
+        self._names = {}
+        self._cache = {}
+        self.path = path
+
+    def __len__(self):
+        return len(self._keys24) + len(self._keys28) + len(self._keys36)
+
+    @property
+    def size(self):
+        return len(self._map)
+
+    def _name(self, offset):
+        name = self._names.get(offset)
+        if name is None:
+            at = self._names_at + offset
+            name = self._names[offset] = bytes(self._view[at + 1:at + 1 + self._view[at]]).decode('utf-8', 'replace')
+        return name or None
+
+    def lookup(self, mac):
+        """
+        Vendor name for `mac` (string or 48-bit integer), or None.
+        """
+        cache = self._cache
+        name = cache.get(mac, _MISSING)
+        if name is not _MISSING:
+            return name
+        value = mac_to_int(mac) if isinstance(mac, str) else mac
+        name = None
+        if not value & _LOCAL_BIT:
+            name = self._lookup(value)
+        if len(cache) >= _CACHE_SIZE:
+            cache.clear()
+        cache[mac] = name
+        return name
+
+    def _lookup(self, value):
+        keys = self._keys24
+        fanout = self._fanout
+        oui = value >> 24
+        bucket = oui >> (24 - _FANOUT_BITS)
+        hi = fanout[bucket + 1]
+        i = bisect_left(keys, oui, fanout[bucket], hi)
+        if i == hi or keys[i] != oui:
+            return None
+        entry = self._vals24[i]
+        if entry & 1:
+            for keys, vals, shift in ((self._keys36, self._vals36, 12),
+                                      (self._keys28, self._vals28, 20)):
+                prefix = value >> shift
+                j = bisect_left(keys, prefix)
+                if j < len(keys) and keys[j] == prefix:
+                    return self._name(vals[j])
+        name = self._names.get(entry >> 1)
+        return self._name(entry >> 1) if name is None else name or None
+
+    def close(self):
+        for part in (self._keys36, self._fanout, self._keys24, self._vals24, self._keys28,
+                     self._vals28, self._vals36, self._view):
+            part.release()
+        self._map.close()
+
+
+_index = None
+_index_failed = False
+_index_lock = threading.Lock()
+
+
+def get_index(path=DEFAULT_PATH):
+    """
+    The process-wide index, compiled from scapy's manuf database if `path`
+    does not hold a usable one yet. None if there is no registry.
+    """
+    global _index, _index_failed
+    with _index_lock:
+        if _index is None and not _index_failed:
+            try:
+                try:
+                    _index = OuiIndex(path)
+                except (OSError, ValueError):
+                    # Missing, or written by an older version
+                    compile_index(scapy_manuf(), path)
+                    _index = OuiIndex(path)
+            except Exception as e:
+                print(f"OUI index error: {e}", file=sys.stderr)
+                tracer.error("index_failed", error=repr(e))
+                _index_failed = True
+        return _index
+
+
+def vendor(mac):
+    """
+    Vendor name for `mac`, or "" if unknown.
+    """
+    index = get_index()
+    if index is None or not mac:
+        return ""
+    try:
+        return index.lookup(mac) or ""
+    except ValueError:
+        return ""
+
+
+def main(argv=None):
+    """
+    python -m utils.oui build [SOURCE ...] [-o PATH]
+    python -m utils.oui lookup MAC ...
+    """
+    parser = argparse.ArgumentParser(prog='python -m utils.oui')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="compile the index")
+    build.add_argument('sources', nargs='*',
+                       help="IEEE CSV exports or a Wireshark manuf file (default: scapy's manuf)")
+    build.add_argument('-o', '--output', default=DEFAULT_PATH)
+    lookup = commands.add_parser('lookup', help="look up MAC addresses")
+    lookup.add_argument('macs', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if args.sources:
+            entries = [entry for source in args.sources for entry in read_source(source)]
+        else:
+            entries = scapy_manuf()
+        counts = compile_index(entries, args.output)
+        print(f"{args.output}: {counts[24]} /24, {counts[28]} /28, {counts[36]} /36, "
+              f"{os.path.getsize(args.output)} bytes")
+    else:
+        for mac in args.macs:
+            print(f"{mac}\t{vendor(mac) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
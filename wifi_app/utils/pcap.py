@@ -0,0 +1,52 @@
+import struct
+
+# Minimal libpcap file reader and writer (the classic format, not
+# pcapng), enough to record and replay captures without scapy or libpcap.
+
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+
+_MAGIC_USEC = 0xA1B2C3D4
+_MAGIC_NSEC = 0xA1B23C4D
+
+
+def read_pcap(path):
+    """
+    Yields (timestamp, linktype, frame) for each record of a pcap file.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(24)
+        if len(header) < 24:
+            raise ValueError(f"{path}: not a pcap file")
+        for order in ('<', '>'):
+            magic = struct.unpack(order + 'I', header[:4])[0]
+            if magic in (_MAGIC_USEC, _MAGIC_NSEC):
+                break
+        else:
+            raise ValueError(f"{path}: not a pcap file (pcapng is not supported)")
+        scale = 1e-6 if magic == _MAGIC_USEC else 1e-9
+        linktype = struct.unpack(order + 'I', header[20:24])[0] & 0x0FFFFFFF
+        record = struct.Struct(order + 'IIII')
+        while True:
+            head = f.read(16)
+            if len(head) < 16:
+                return
+            seconds, fraction, captured, _ = record.unpack(head)
+            frame = f.read(captured)
+            if len(frame) < captured:
+                return
+            yield seconds + fraction * scale, linktype, frame
+
+
+def write_pcap(path, frames, linktype=LINKTYPE_ETHERNET, snaplen=65535):
+    """
+    Writes (timestamp, frame) pairs to a microsecond pcap file.
+    """
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', _MAGIC_USEC, 2, 4, 0, 0, snaplen, linktype))
+        for timestamp, frame in frames:
+            seconds = int(timestamp)
+            f.write(struct.pack('<IIII', seconds, int((timestamp - seconds) * 1e6),
+                                len(frame), len(frame)))
+            f.write(frame)
@@ -0,0 +1,204 @@
+import sys
+from array import array
+
+# Compact records passed from the scanners to the UI.
+#
+# Scans run every few seconds and each result list crosses the Qt signal
+# boundary, so records use __slots__ (no per-instance __dict__) and intern
+# their repeated strings (SSIDs, authentication, encryption and vendor
+# names).
+#
+# Access points keep their signal in dBm, the unit the analytics work in;
+# `signal` is the 0-100% quality Windows reports, derived from it. Windows
+# defines that quality as linear from -100 dBm (0%) to -50 dBm (100%), so
+# the two convert exactly within that range; iw readings above -50 dBm
+# keep their real value and show as 100%.
+
+# dBm at 0% and 100% signal quality
+DBM_AT_0_PERCENT = -100.0
+DBM_AT_100_PERCENT = -50.0
+
+
+def mac_to_int(mac):
+    """'aa:bb:cc:dd:ee:ff' (or with dashes) -> 48-bit integer."""
+    return int(mac.replace(':', '').replace('-', ''), 16)
+
+
+def int_to_mac(value):
+    hex_str = f"{value:012x}"
+    return ":".join(hex_str[i:i + 2] for i in range(0, 12, 2))
+
+
+def percent_to_dbm(percent):
+    """
+    Signal quality (0-100%) -> dBm; works on NumPy arrays too.
+    """
+    return DBM_AT_0_PERCENT + percent * ((DBM_AT_100_PERCENT - DBM_AT_0_PERCENT) / 100)
+
+
+def dbm_to_percent(dbm):
+    """
+    dBm -> signal quality, rounded and clamped to 0-100%.
+    """
+    percent = (dbm - DBM_AT_0_PERCENT) * (100 / (DBM_AT_100_PERCENT - DBM_AT_0_PERCENT))
+    return int(min(100, max(0, round(percent))))
+
+
+class AccessPoint:
+    """
+    One BSSID seen in a Wi-Fi scan. Pass `signal` as a percentage or `dbm`.
+    """
+    __slots__ = ('ssid', 'bssid', 'dbm', 'channel', 'authentication', 'encryption', 'vendor',
+                 'band', 'width', 'center', 'associated', 'radio', 'network_type',
+                 'basic_rates', 'other_rates', 'stations', 'utilization')
+
+    def __init__(self, ssid, bssid, signal=0, channel=0,
+                 authentication='Unknown', encryption='Unknown', vendor='',
+                 band='', width=20, center=0, associated=False, dbm=None):
+        self.ssid = sys.intern(ssid)
+        self.bssid = bssid
+        self.dbm = dbm if dbm is not None else percent_to_dbm(signal)
+        # Primary 20 MHz channel
+        self.channel = channel
+        self.authentication = sys.intern(authentication)
+        self.encryption = sys.intern(encryption)
+        self.vendor = sys.intern(vendor)
+        # '2.4', '5' or '6' GHz; '' when the scan did not say
+        self.band = sys.intern(band)
+        # Channel width in MHz, and the centre channel of a bonded
+        # 40/80/160 MHz channel (0 when not reported)
+        self.width = width
+        self.center = center
+        # Whether this machine is connected to it
+        self.associated = associated
+        # PHY ('802.11ax'), 'Infrastructure' or 'Adhoc', and the basic and
+        # other supported rates in Mbps ('' and () when not reported)
+        self.radio = ''
+        self.network_type = ''
+        self.basic_rates = ()
+        self.other_rates = ()
+        # From the BSS Load element: associated stations and channel
+        # utilization in percent, -1 when the AP does not advertise it
+        self.stations = -1
+        self.utilization = -1
+
+    @property
+    def signal(self):
+        """Signal quality, 0-100%."""
+        return dbm_to_percent(self.dbm)
+
+    @signal.setter
+    def signal(self, percent):
+        self.dbm = percent_to_dbm(percent)
+
+    def band_name(self):
+        """
+        The band, guessed from the channel number when the scan did not
+        report it (6 GHz channel numbers then read as 2.4 or 5 GHz).
+        """
+        return self.band or ('2.4' if 0 < self.channel <= 14 else '5')
+
+    def max_rate(self):
+        """Highest advertised rate in Mbps, 0 when none were reported."""
+        return max(self.basic_rates + self.other_rates, default=0)
+
+    def as_dict(self):
+        """Legacy dictionary form, as returned by the old parser."""
+        return {
+            'SSID': self.ssid,
+            'Authentication': self.authentication,
+            'Encryption': self.encryption,
+            'BSSID': self.bssid,
+            'Signal': self.signal,
+            'Channel': self.channel
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, AccessPoint):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    # Equal records share a BSSID, so hashing on it keeps sets and dict
+    # keys working while the other fields (signal, vendor) are updated
+    def __hash__(self):
+        return hash(self.bssid)
+
+    def __repr__(self):
+        return (f"AccessPoint(ssid={self.ssid!r}, bssid={self.bssid!r}, "
+                f"signal={self.signal}, dbm={self.dbm:g}, channel={self.channel})")
+
+
+class Device:
+    """
+    One host found on the local network.
+    """
+    __slots__ = ('ip', 'mac', 'hostname', 'type', 'vendor', 'model', 'services')
+
+    def __init__(self, ip, mac, hostname='', type='Dynamic', vendor='', model='', services=()):
+        self.ip = ip
+        self.mac = mac
+        self.hostname = hostname
+        self.type = sys.intern(type)
+        self.vendor = sys.intern(vendor)
+        self.model = model
+        # Announced services ('_ipp._tcp', 'upnp:MediaRenderer', 'smb'), sorted
+        self.services = services
+
+    def as_dict(self):
+        return {'ip': self.ip, 'mac': self.mac, 'type': self.type, 'hostname': self.hostname,
+                'vendor': self.vendor, 'model': self.model, 'services': list(self.services)}
+
+    def __eq__(self, other):
+        if not isinstance(other, Device):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    # By MAC, as for AccessPoint
+    def __hash__(self):
+        return hash(self.mac)
+
+    def __repr__(self):
+        return f"Device(ip={self.ip!r}, mac={self.mac!r}, hostname={self.hostname!r})"
+
+
+class AccessPointBatch:
+    """
+    Columnar form of a scan: parallel arrays of signal, channel, BSSID,
+    band (24, 5 or 6), channel width (MHz) and centre channel (0 when not
+    reported). The arrays support the buffer protocol, so NumPy can wrap
+    them without copying (np.frombuffer(batch.signal, dtype=np.uint8)).
+    """
+    __slots__ = ('signal', 'channel', 'bssid', 'band', 'width', 'center')
+
+    BAND_CODES = {'2.4': 24, '5': 5, '6': 6}
+
+    def __init__(self, signal=None, channel=None, bssid=None, band=None, width=None,
+                 center=None):
+        self.signal = signal if signal is not None else array('B')
+        self.channel = channel if channel is not None else array('H')
+        self.bssid = bssid if bssid is not None else array('Q')
+        self.band = band if band is not None else array('B')
+        self.width = width if width is not None else array('H')
+        self.center = center if center is not None else array('H')
+
+    @classmethod
+    def from_records(cls, access_points):
+        batch = cls()
+        signal = batch.signal
+        channel = batch.channel
+        bssid = batch.bssid
+        band = batch.band
+        width = batch.width
+        center = batch.center
+        codes = cls.BAND_CODES
+        for ap in access_points:
+            signal.append(ap.signal)
+            channel.append(ap.channel)
+            bssid.append(mac_to_int(ap.bssid))
+            band.append(codes[ap.band_name()])
+            width.append(ap.width)
+            center.append(ap.center)
+        return batch
+
+    def __len__(self):
+        return len(self.signal)
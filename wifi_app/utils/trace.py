@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Opt-in structured tracing for the background services.
+#
+# Tracing is off by default: every Tracer call returns after a single global
+# check. When enabled, records go to a bounded in-memory ring buffer and are
+# optionally spilled to a rotating JSON-lines file by a background thread, so
+# callers never block on disk.
+#
+# Enable from the environment:
+#   PYWIFIMAN_TRACE=debug PYWIFIMAN_TRACE_FILE=trace.jsonl python main.py
+# or from code with trace.enable('debug', path='trace.jsonl').
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+_LEVEL_NAMES = {DEBUG: 'debug', INFO: 'info', WARNING: 'warning', ERROR: 'error'}
+_LEVELS = {name: level for level, name in _LEVEL_NAMES.items()}
+
+_sink = None
+_tracers = {}
+_lock = threading.Lock()
+
+
+class _RotatingWriter(threading.Thread):
+    """
+    Drains pending records to a JSON-lines file, rotating it at `max_bytes`.
+    """
+    def __init__(self, path, max_bytes, backups, capacity, flush_interval):
+        super().__init__(name="trace-writer", daemon=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        # Bounded as well: if the disk can't keep up, the oldest records are dropped
+        self.pending = deque(maxlen=capacity)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        lines = []
+        pending = self.pending
+        while pending:
+            try:
+                lines.append(_format_record(pending.popleft()))
+            except IndexError:
+                break
+        try:
+            self._rotate_if_needed()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError:
+            pass
+
+    def _rotate_if_needed(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except OSError:
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=2)
+
+
+class _Sink:
+    def __init__(self, level, capacity, writer):
+        self.level = level
+        self.buffer = deque(maxlen=capacity)
+        self.writer = writer
+
+    def emit(self, record):
+        # deque.append is atomic, no lock needed on the hot path
+        self.buffer.append(record)
+        if self.writer is not None:
+            self.writer.pending.append(record)
+
+
+def _format_record(record):
+    ts, level, source, event, fields = record
+    data = {'ts': round(ts, 6), 'level': _LEVEL_NAMES.get(level, str(level)),
+            'source': source, 'event': event}
+    data.update(fields)
+    return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class Tracer:
+    """
+    Named trace source, e.g. get_tracer('wifi_scanner').
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def is_enabled(self, level=DEBUG):
+        return _sink is not None and level >= _sink.level
+
+    def log(self, level, event, **fields):
+        sink = _sink
+        if sink is None or level < sink.level:
+            return
+        sink.emit((time.time(), level, self.name, event, fields))
+
+    def debug(self, event, **fields):
+        if _sink is not None:
+            self.log(DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        if _sink is not None:
+            self.log(INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        if _sink is not None:
+            self.log(WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        if _sink is not None:
+            self.log(ERROR, event, **fields)
+
+
+def get_tracer(name):
+    tracer = _tracers.get(name)
+    if tracer is None:
+        tracer = _tracers.setdefault(name, Tracer(name))
+    return tracer
+
+
+def enable(level='debug', path=None, capacity=10000,
+           max_bytes=1_000_000, backups=3, flush_interval=0.5):
+    """
+    Starts tracing at `level` ('debug', 'info', 'warning', 'error').
+    Records are kept in a ring buffer of `capacity` entries and, if `path`
+    is given, appended to a rotating JSON-lines file in the background.
+    """
+    global _sink
+    if isinstance(level, str):
+        level = _LEVELS[level.lower()]
+    with _lock:
+        _stop_sink(_sink)
+        writer = None
+        if path:
+            writer = _RotatingWriter(path, max_bytes, backups, capacity, flush_interval)
+            writer.start()
+        _sink = _Sink(level, capacity, writer)
+
+
+def disable():
+    global _sink
+    with _lock:
+        _stop_sink(_sink)
+        _sink = None
+
+
+def _stop_sink(sink):
+    if sink is not None and sink.writer is not None:
+        sink.writer.stop()
+
+
+def records():
+    """
+    Returns a snapshot of the ring buffer as formatted JSON strings.
+    """
+    sink = _sink
+    if sink is None:
+        return []
+    return [_format_record(r) for r in list(sink.buffer)]
+
+
+def configure_from_env(environ=os.environ):
+    level = environ.get('PYWIFIMAN_TRACE')
+    if not level or level.lower() not in _LEVELS:
+        return
+    enable(level, path=environ.get('PYWIFIMAN_TRACE_FILE'))